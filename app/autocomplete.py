@@ -0,0 +1,282 @@
+import bisect
+import hashlib
+import logging
+import re
+import threading
+import time
+from itertools import takewhile
+
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+from community.models import Community
+from users.models import CustomUser
+from .constants import (
+    AUTOCOMPLETE_CACHE_TTL,
+    AUTOCOMPLETE_CHANGE_LOG_TTL,
+    AUTOCOMPLETE_LIMIT,
+    AUTOCOMPLETE_REBUILD_INTERVAL,
+    AUTOCOMPLETE_REPLAY_LIMIT,
+)
+from .models import Thread
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "autocomplete:version"
+
+
+class AutocompleteSource:
+    """
+    Describes which model field is suggested by autocomplete
+
+    :param name: Short source name used in index keys
+    :param model: Suggested model
+    :param label_field: Field shown as suggestion label and matched by prefix
+    :param link: Function that builds URL path from object pk and label
+    """
+
+    def __init__(self, name: str, model, label_field: str, link):
+        self.name = name
+        self.model = model
+        self.label_field = label_field
+        self.link = link
+
+
+AUTOCOMPLETE_SOURCES = (
+    AutocompleteSource("user", CustomUser, "username", lambda pk, label: f"/user-page/{label}/"),
+    AutocompleteSource("thread", Thread, "title", lambda pk, label: f"/thread-detail/{pk}"),
+    AutocompleteSource("community", Community, "name", lambda pk, label: f"/community/name-{label}/"),
+)
+SOURCES_BY_NAME = {source.name: source for source in AUTOCOMPLETE_SOURCES}
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def index_terms(label: str) -> list[str]:
+    # Every word starts a term, so "python dec" and "dec" both match "Python decorators"
+    words = normalize(label).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    In-process prefix index of suggestion labels.
+    Terms are kept in a sorted list, so a prefix lookup is a binary search followed by a short scan.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = []  # sorted list of (term, source name, pk)
+        self.entries = {}  # (source name, pk) -> (label, url, terms)
+        self.version = None
+        self.rebuilt_at = float("-inf")  # time.monotonic() of the last rebuild
+
+    def add(self, source: AutocompleteSource, pk: int, label: str) -> None:
+        with self.lock:
+            self._remove(source.name, pk)
+            self._insert(source, pk, label)
+
+    def _insert(self, source: AutocompleteSource, pk: int, label: str) -> None:
+        terms = index_terms(label)
+        self.entries[(source.name, pk)] = (label, source.link(pk, label), terms)
+        for term in terms:
+            bisect.insort(self.keys, (term, source.name, pk))
+
+    def remove(self, source: AutocompleteSource, pk: int) -> None:
+        with self.lock:
+            self._remove(source.name, pk)
+
+    def _remove(self, source_name: str, pk: int) -> None:
+        entry = self.entries.pop((source_name, pk), None)
+        if entry:
+            for term in entry[2]:
+                position = bisect.bisect_left(self.keys, (term, source_name, pk))
+                del self.keys[position]
+
+    def apply(self, version, changes: list[tuple], advance: bool = True) -> None:
+        """
+        Replays logged changes on top of the given index version, changes of another version are skipped
+
+        :param version: Index version the changes follow
+        :param changes: List of (source name, pk, label) tuples, label is None for deleted objects
+        :param advance: Move the index version by the number of changes
+        """
+        with self.lock:
+            if self.version != version:
+                return
+            for source_name, pk, label in changes:
+                self._remove(source_name, pk)
+                if label is not None:
+                    self._insert(SOURCES_BY_NAME[source_name], pk, label)
+            if advance and self.version is not None:
+                self.version += len(changes)
+
+    def rebuild(self, version) -> None:
+        """
+        Loads every label of every source from the database
+        """
+        entries = {}
+        keys = []
+        for source in AUTOCOMPLETE_SOURCES:
+            for pk, label in source.model.objects.values_list("pk", source.label_field).iterator():
+                terms = index_terms(label)
+                entries[(source.name, pk)] = (label, source.link(pk, label), terms)
+                keys.extend((term, source.name, pk) for term in terms)
+        keys.sort()
+
+        with self.lock:
+            self.entries = entries
+            self.keys = keys
+            self.version = version
+            self.rebuilt_at = time.monotonic()
+
+    def suggest(self, prefix: str, limit: int) -> list[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        suggestions = []
+        seen = set()
+        with self.lock:
+            position = bisect.bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(suggestions) < limit:
+                term, source_name, pk = self.keys[position]
+                if not term.startswith(prefix):
+                    break
+                if (source_name, pk) not in seen:
+                    seen.add((source_name, pk))
+                    label, url, terms = self.entries[(source_name, pk)]
+                    suggestions.append({"label": label, "url": url})
+                position += 1
+        return suggestions
+
+
+prefix_index = PrefixIndex()
+
+
+def change_key(version: int) -> str:
+    return f"autocomplete:change:{version}"
+
+
+def current_version() -> int:
+    # The version is shared through the cache, so other processes notice changes and replay them from the change log
+    return cache.get_or_set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def reset_index() -> None:
+    """
+    Starts a new version that no index can replay to, every process rebuilds its index on the next read.
+    Used after bulk loads that send no model signals.
+    """
+    try:
+        cache.delete(VERSION_KEY)
+    except RedisError:
+        logger.exception("Autocomplete indexes were not reset")
+
+
+def record_change(source: AutocompleteSource, pk: int, label: str | None) -> None:
+    """
+    Bumps the shared version and logs the change under the new version, other processes replay it on their next read.
+    If the cache is unavailable only the index of this process is updated.
+
+    :param label: New label of the object, None if it was deleted
+    """
+    try:
+        version = cache.incr(VERSION_KEY)
+        cache.set(change_key(version), (source.name, pk, label), AUTOCOMPLETE_CHANGE_LOG_TTL)
+    except ValueError:
+        # The version left the cache, every process rebuilds its index on the next read
+        return
+    except RedisError:
+        logger.warning("Autocomplete change of %s %s was not shared", source.name, pk, exc_info=True)
+        prefix_index.apply(prefix_index.version, [(source.name, pk, label)], advance=False)
+
+
+def sync_index(version: int) -> int | None:
+    """
+    Brings the index of this process to the shared version by replaying the logged changes.
+    If changes are missing from the log the index is rebuilt from the database at most once per
+    AUTOCOMPLETE_REBUILD_INTERVAL seconds, a stale index is served in between.
+    An index that was never built, is too far behind or follows a reset version is rebuilt at once.
+
+    :return: Version the index reflects
+    """
+    index_version = prefix_index.version
+    if index_version == version:
+        return version
+
+    if index_version is not None and 0 < version - index_version <= AUTOCOMPLETE_REPLAY_LIMIT:
+        keys = [change_key(logged) for logged in range(index_version + 1, version + 1)]
+        logged = cache.get_many(keys)
+        changes = list(takewhile(lambda change: change is not None, (logged.get(key) for key in keys)))
+        prefix_index.apply(index_version, changes)
+        if prefix_index.version == version:
+            return version
+        # A change is missing from the log (expired or not written yet), the index is rebuilt only once per interval
+        if time.monotonic() - prefix_index.rebuilt_at < AUTOCOMPLETE_REBUILD_INTERVAL:
+            return prefix_index.version
+
+    prefix_index.rebuild(version)
+    return version
+
+
+def query_suggestions(prefix: str, limit: int) -> list[dict]:
+    """
+    Suggestions read from the database while the cache is unavailable, only labels starting with the prefix match
+    """
+    prefix = normalize(prefix)
+    suggestions = []
+    if not prefix:
+        return suggestions
+
+    for source in AUTOCOMPLETE_SOURCES:
+        rows = (
+            source.model.objects.filter(**{f"{source.label_field}__istartswith": prefix})
+            .order_by(source.label_field)
+            .values_list("pk", source.label_field)
+        )
+        suggestions.extend(
+            {"label": label, "url": source.link(pk, label)} for pk, label in rows[: limit - len(suggestions)]
+        )
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+
+def suggest(prefix: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[dict]:
+    """
+    Returns top suggestions for the typed prefix. Responses are cached per prefix for AUTOCOMPLETE_CACHE_TTL seconds,
+    cache keys include the index version, so every change of indexed data invalidates them.
+    If the cache is unavailable suggestions are read from the database.
+
+    :param prefix: Typed text
+    :param limit: Maximum number of suggestions
+    :return: List of suggestions:
+        - label (str): Username | Thread title | Community name
+        - url (str): URL path to object
+    """
+    try:
+        version = current_version()
+        prefix_hash = hashlib.md5(normalize(prefix).encode()).hexdigest()
+        cache_key = f"autocomplete:{version}:{limit}:{prefix_hash}"
+        suggestions = cache.get(cache_key)
+        if suggestions is None:
+            index_version = sync_index(version)
+            suggestions = prefix_index.suggest(prefix, limit)
+            # Suggestions of an index that is behind are not cached under the current version
+            if index_version == version:
+                cache.set(cache_key, suggestions, AUTOCOMPLETE_CACHE_TTL)
+    except RedisError:
+        logger.warning("Autocomplete cache is unavailable, reading suggestions from the database", exc_info=True)
+        return query_suggestions(prefix, limit)
+    return suggestions
+
+
+def update_object(source: AutocompleteSource, instance) -> None:
+    record_change(source, instance.pk, getattr(instance, source.label_field))
+
+
+def remove_object(source: AutocompleteSource, instance) -> None:
+    record_change(source, instance.pk, None)
@@ -1,8 +1,28 @@
-PROGRAMMING_LANGUAGES = {
-    "python": "/tutorials/mainpy/1/",
-    "java": "/tutorials/mainjava/1/",
-    "javascript": "/tutorials/mainjs/1/",
-    "c": "/tutorials/mainc/1/",
-    "cpp": "/tutorials/maincpp/1/",
-}
 FILE_MAX_SIZE = 1024 * 1024 * 2
+CHAT_UPLOAD_MAX_SIZE = 1024 * 1024 * 20
+# Uploads no message claimed within this time are deleted with their files
+CHAT_UPLOAD_TTL = 60 * 60 * 24
+CHAT_PAGE_SIZE = 50
+CHAT_LIST_PAGE_SIZE = 50
+CHAT_PREVIEW_LENGTH = 100
+COMMUNITY_FOLLOWERS_PAGE_SIZE = 50
+COMMUNITY_BANNED_PAGE_SIZE = 50
+FEED_PAGE_SIZE = 20
+# Comment streams one socket may subscribe to, a feed subscribes FEED_PAGE_SIZE more on every loaded page
+COMMENT_STREAMS_LIMIT = 500
+USER_FOLLOWERS_PAGE_SIZE = 50
+# Authors and communities with more followers than this are read on request instead of fanned out on write
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_PAGE_SIZE = 50
+SEARCH_LIMIT = 20
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_CACHE_TTL = 30
+# Changes of suggested labels are logged for other processes, an index further behind is rebuilt,
+# at most once per interval per process
+AUTOCOMPLETE_CHANGE_LOG_TTL = 60 * 10
+AUTOCOMPLETE_REPLAY_LIMIT = 1000
+AUTOCOMPLETE_REBUILD_INTERVAL = 60
+# Cached tutorial pages are invalidated by the content version, the TTL only expires pages of old versions
+TUTORIAL_CACHE_TTL = 60 * 60 * 24
+# Follower id sets are dropped on every follow change, the TTL only limits memory of inactive users
+FOLLOW_GRAPH_CACHE_TTL = 60 * 60
@@ -1,23 +1,40 @@
+import asyncio
 import json
 import logging
 
-from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
 from django.utils.safestring import mark_safe
 
+from app.constants import COMMENT_STREAMS_LIMIT
+
 logger = logging.getLogger(__name__)
 
 
+def notification_group(user_id: int) -> str:
+    return f"notify_{user_id}"
+
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.group_name = "notification_room"
+        user = self.scope.get("user")
+        if not (user and user.is_authenticated):
+            await self.close()
+            return
+
+        # Every user listens only to their own notifications
+        self.group_name = notification_group(user.id)
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
-        logger.info("WebSocket connected to notification group")
+        logger.info(f"WebSocket connected to notification group: {self.group_name}")
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
         logger.info("WebSocket disconnected from notification group")
 
     async def send_notification(self, event):
@@ -26,58 +43,121 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         await self.send(text_data=json.dumps({"message": safe_message, "id": event["id"]}))
 
 
+def comments_group(content_type_id: int, object_id: int) -> str:
+    return f"comments_{content_type_id}_{object_id}"
+
+
 class CommentsConsumer(AsyncWebsocketConsumer):
+    """
+    Comment streams of commented objects, a comment reaches only viewers of its object.
+    A page opens one socket and subscribes it to the stream of every object it shows:
+    {"action": "subscribe" | "unsubscribe" | "comment", "content_type_id": ..., "object_id": ...}.
+    A socket opened on the path of one object is subscribed to it and comments on it by default.
+    """
 
-    async def connect(self):
+    channel_layer_alias = "broadcast"
 
-        self.group_name = "comments_room"
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
+    async def connect(self):
+        self.streams = set()
+        self.pending = set()
+        kwargs = self.scope["url_route"]["kwargs"]
+        self.default_stream = (int(kwargs["content_type_id"]), int(kwargs["object_id"])) if kwargs else None
         await self.accept()
-        logger.info("WebSocket connected")
+        if self.default_stream:
+            await self.subscribe(self.default_stream)
 
     async def disconnect(self, close_code):
-
-        await self.channel_layer.group_discard(self.group_name, self.channel_name)
-        logger.info(f"WebSocket disconnected from group: {self.group_name}")
+        # Let already received comments be saved and sent
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        for stream in self.streams:
+            await self.channel_layer.group_discard(comments_group(*stream), self.channel_name)
+        logger.info(f"WebSocket disconnected from {len(self.streams)} comment streams")
+
+    async def subscribe(self, stream):
+        if stream in self.streams:
+            return
+        if len(self.streams) >= COMMENT_STREAMS_LIMIT:
+            logger.warning(f"Comment streams limit reached, {stream} is not subscribed")
+            return
+        self.streams.add(stream)
+        await self.channel_layer.group_add(comments_group(*stream), self.channel_name)
+
+    async def unsubscribe(self, stream):
+        if stream in self.streams:
+            self.streams.discard(stream)
+            await self.channel_layer.group_discard(comments_group(*stream), self.channel_name)
+
+    def stream_of(self, data):
+        """
+        :return: Content type id and object id of the frame, the stream of the path if the frame names none
+        :raise ValueError: If the ids are not integers
+        """
+        if "content_type_id" not in data and "object_id" not in data:
+            return self.default_stream
+        try:
+            return int(data["content_type_id"]), int(data["object_id"])
+        except (KeyError, TypeError) as error:
+            raise ValueError("Invalid comment stream") from error
 
     async def receive(self, text_data=None, bytes_data=None):
-        from app.models import Comments
-
         data = json.loads(text_data)
         logger.debug(f"Received data: {data}")
-        username = data["username"]
-        user_id = data.get("user_id")
-        content = data.get("content")
-        content_type_id = data.get("content_type_id")
-        object_ct_id = data.get("object_ct_id")
-        object_id = data.get("object_id")
-        file = data.get("file")
-        image = data.get("image")
-
-        # Ensure all necessary data is present
-        if not (content and user_id and content_type_id and object_id):
-            logger.error("Missing required fields")
+        try:
+            stream = self.stream_of(data)
+        except ValueError:
+            logger.error(f"Invalid comment stream: {data}")
+            return
+        if stream is None:
+            logger.error("Frame without a comment stream")
             return
 
-        # Create comment asynchronously using sync_to_async
-        comment = await sync_to_async(Comments.objects.create)(
-            context=content,
-            object_id=object_id,
-            image=image,
-            file=file,
-            user_id=user_id,
-            content_type_id=content_type_id,
-        )
+        action = data.get("action", "comment")
+        if action == "subscribe":
+            await self.subscribe(stream)
+        elif action == "unsubscribe":
+            await self.unsubscribe(stream)
+        elif action == "comment":
+            user = self.scope.get("user")
+            # Ensure all necessary data is present
+            if not (user and user.is_authenticated and data.get("content")):
+                logger.error("Missing required fields")
+                return
+
+            # The insert runs in its own task, so it does not block next messages of this connection
+            task = asyncio.create_task(self.create_comment(user, stream, data))
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+        else:
+            logger.error(f"Unknown comment stream action: {action}")
+
+    async def create_comment(self, user, stream, data):
+        from app.models import Comments
+
+        content_type_id, object_id = stream
+        try:
+            comment = await database_sync_to_async(Comments.objects.create)(
+                context=data["content"],
+                object_id=object_id,
+                image=data.get("image"),
+                file=data.get("file"),
+                user=user,
+                content_type_id=content_type_id,
+            )
+        except Exception:
+            logger.exception(f"Comment was not created in group: {comments_group(*stream)}")
+            return
         logger.info(f"Comment created: {comment.id}")
 
         response = {
             "type": "send_comment",
             "comment": {
-                "username": username,
+                "id": comment.id,
+                "username": user.username,
                 "content": comment.context,
                 "user_id": comment.user_id,
                 "object_id": comment.object_id,
-                "object_ct_id": object_ct_id,
+                "content_type_id": comment.content_type_id,
             },
         }
 
@@ -87,7 +167,7 @@ class CommentsConsumer(AsyncWebsocketConsumer):
         if comment.image:
             response["image_url"] = comment.image.url
 
-        await self.channel_layer.group_send(self.group_name, response)
+        await self.channel_layer.group_send(comments_group(*stream), response)
 
     async def send_comment(self, event):
         await self.send(
@@ -99,93 +179,147 @@ class CommentsConsumer(AsyncWebsocketConsumer):
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        self.group_name = "chat_room"
+        self.chat_id = int(self.scope["url_route"]["kwargs"]["chat_id"])
+        self.group_name = f"chat_{self.chat_id}"
+        self.user = self.scope.get("user")
+
+        # Only the two participants of the chat can join its group
+        if not (self.user and self.user.is_authenticated and await self.is_participant()):
+            logger.warning(f"WebSocket rejected for chat {self.chat_id}")
+            await self.close()
+            return
+
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
-        logger.info("WebSocket connected")
+        logger.info(f"WebSocket connected to group: {self.group_name}")
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
         logger.info(f"WebSocket disconnected from group: {self.group_name}")
 
-    async def receive(self, text_data=None, bytes_data=None):
-        from users.models import Chat, CustomUser
-        from app.models import Notification
-
-        data = json.loads(text_data)
-        logger.info(f"Received data: {data}")
-        chat_id = data.get("chatId")
-        recipient = data.get("recipient")
-        user_id = data.get("user_id")
-        context = data.get("context")
-        attachment = data.get("attachment")
-        voice = data.get("voice")
-
-        # Ensure context is provided
-        if not context:
-            logger.error("Missing required fields: context")
-            return
+    @database_sync_to_async
+    def is_participant(self):
+        from users.models import Chat
 
+        participants = (
+            Chat.objects.filter(Q(sender=self.user) | Q(recipient=self.user), id=self.chat_id)
+            .values_list("sender_id", "recipient_id")
+            .first()
+        )
+        if not participants:
+            return False
+
+        # Notifications about new messages go to the other participant
+        sender_id, recipient_id = participants
+        self.recipient_id = recipient_id if sender_id == self.user.id else sender_id
+        return True
+
+    def claim_upload(self, upload_id, kind):
+        """
+        Takes a file uploaded through the chat upload endpoint, every upload can be attached to one message only
+
+        :param upload_id: Upload id returned by the upload endpoint
+        :param kind: ChatUpload.ATTACHMENT | ChatUpload.VOICE
+        :return: Name of the stored file or None
+        """
+        from users.models import ChatUpload
+
+        if not upload_id:
+            return None
         try:
-            user = await sync_to_async(CustomUser.objects.get)(id=user_id)
-        except CustomUser.DoesNotExist:
-            logger.error(f"User {user_id} not found")
-            return
+            # Locked so that the cleanup of unclaimed uploads skips it
+            upload = ChatUpload.objects.select_for_update().get(
+                id=upload_id, chat_id=self.chat_id, user=self.user, kind=kind
+            )
+        except (ChatUpload.DoesNotExist, ValidationError):
+            logger.error(f"Upload {upload_id} not found in chat {self.chat_id}")
+            return None
+        upload.delete()
+        return upload.file.name
+
+    @database_sync_to_async
+    def save_message(self, data):
+        """
+        Persists the message and updates the recipient's notification in one transaction
+
+        :param data: Received frame with 'context' and optional 'attachment' and 'voice' upload ids
+        :return: Tuple of the chat message event and the notification event,
+            the notification event is None when a new notification is delivered by the post_save signal
+        """
+        from users.models import Chat, ChatUpload, Message
+        from users.read_state import message_sent
+        from app.models import Notification
 
-        try:
-            chat = await sync_to_async(Chat.objects.get)(id=chat_id)
-        except Chat.DoesNotExist:
-            logger.error(f"Chat {chat_id} not found")
-            return
+        with transaction.atomic():
+            # Files are uploaded over HTTP beforehand, the frame carries only their upload ids
+            message = Message.objects.create(
+                context=data["context"],
+                attachment=self.claim_upload(data.get("attachment"), ChatUpload.ATTACHMENT),
+                voice=self.claim_upload(data.get("voice"), ChatUpload.VOICE),
+                user=self.user,
+                chat_id=self.chat_id,
+            )
 
-        # Create message related to chat
-        message = await sync_to_async(chat.message.create)(
-            context=context,
-            attachment=attachment,
-            voice=voice,
-            user=user,
-        )
+            unread_count = message_sent(message, self.recipient_id)
+            notification_message = f"You got a new message {unread_count}"
+            notification, created = Notification.objects.get_or_create(
+                user_id=self.recipient_id,
+                content_type=ContentType.objects.get_for_model(Chat),
+                object_id=self.chat_id,
+                defaults={"message": notification_message},
+            )
+            if not created:
+                notification.message = notification_message
+                notification.save(update_fields=["message"])
 
-        username = user.username
-        response = {
+        message_event = {
             "type": "send_message",
             "message": {
+                "id": message.id,
+                "userId": self.user.id,
                 "context": message.context,
-                "username": username,
+                "username": self.user.username,
                 "date": message.date_added.isoformat(),
-                "chatId": chat_id,
+                "chatId": self.chat_id,
             },
         }
-        chat_content = await sync_to_async(ContentType.objects.get_for_model)(
-            Chat,
-        )
-        notif, created = await sync_to_async(Notification.objects.get_or_create)(
-            user_id=recipient,
-            content_type=chat_content,
-            object_id=chat.id,
-        )
-        message_counter = await sync_to_async(chat.message.filter(user_id=recipient).count)()
+        if message.voice:
+            message_event["voice_url"] = message.voice.url
+        if message.attachment:
+            message_event["attachment_url"] = message.attachment.url
 
-        if created:
-            notif.message = f"You got a new message {message_counter}"
-        else:
-            notif.message = f"You got a new message {message_counter}"
+        notification_event = None
+        if not created:
+            notification_event = {"type": "send_notification", "message": notification.message, "id": notification.id}
+        return message_event, notification_event
 
-        await sync_to_async(notif.save)()
+    @database_sync_to_async
+    def mark_read(self, message_id):
+        from users.read_state import mark_read
 
-        if message.voice:
-            response["voice_url"] = message.voice.url
-        if message.attachment:
-            response["attachment_url"] = message.attachment.url
+        mark_read(self.chat_id, self.user.id, message_id)
 
-        await self.channel_layer.group_send(self.group_name, response)
-        notification_event = {
-            "type": "send_notification",
-            "message": notif.message,
-            "id": notif.id,
-        }
-        await self.channel_layer.group_send("notification_room", notification_event)
+    async def receive(self, text_data=None, bytes_data=None):
+        data = json.loads(text_data)
+        logger.debug(f"Received data: {data}")
+
+        # The client reports messages that were shown to the user
+        if "read" in data:
+            if isinstance(data["read"], int):
+                await self.mark_read(data["read"])
+            return
+
+        # Ensure context is provided
+        if not data.get("context"):
+            logger.error("Missing required fields: context")
+            return
+
+        message_event, notification_event = await self.save_message(data)
+
+        await self.channel_layer.group_send(self.group_name, message_event)
+        if notification_event:
+            await self.channel_layer.group_send(notification_group(self.recipient_id), notification_event)
 
     async def send_message(self, event):
         await self.send(text_data=json.dumps(event))
-        logger.info(f"Sent message: {event}")
+        logger.debug(f"Sent message: {event}")
@@ -0,0 +1,107 @@
+import heapq
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from core.helpers import decode_cursor, encode_cursor
+from users.models import Publication
+from .constants import FEED_PAGE_SIZE
+from .models import Comments, Thread
+
+
+def attach_comments(contents: list[dict]) -> list[dict]:
+    """
+    Loads comments for every feed item with one grouped query and attaches them in memory
+
+    :param contents: List of feed items, every item must contain 'id' (int) and 'content_type' (ContentType)
+    :return: The same list where every item got 'comments' (list[Comments]) ordered by comment id
+    """
+    ids_by_content_type = defaultdict(set)
+    for content in contents:
+        ids_by_content_type[content["content_type"].id].add(content["id"])
+
+    comments_by_object = defaultdict(list)
+    if ids_by_content_type:
+        lookup = Q()
+        for content_type_id, object_ids in ids_by_content_type.items():
+            lookup |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+
+        for comment in Comments.objects.filter(lookup).select_related("user").order_by("id"):
+            comments_by_object[(comment.content_type_id, comment.object_id)].append(comment)
+
+    for content in contents:
+        content["comments"] = comments_by_object.get((content["content_type"].id, content["id"]), [])
+
+    return contents
+
+
+# ------------------------ UNIFIED FEED ------------------------
+def publication_item(publication: Publication, content_type: ContentType) -> dict:
+    return {
+        "title": publication.title,
+        "photo": publication.attached_file if publication.attached_file is not None else "",
+        "link": f"/publication/{publication.id}/",
+        "id": publication.id,
+        "content_type": content_type,
+        "published_at": publication.published_at,
+    }
+
+
+def thread_item(thread: Thread, content_type: ContentType) -> dict:
+    return {
+        "title": thread.title,
+        "photo": thread.image if thread.image is not None else "",
+        "link": f"thread-detail/{thread.pk}",
+        "id": thread.id,
+        "content_type": content_type,
+        "published_at": thread.published_at,
+    }
+
+
+FEED_SOURCES = (
+    (Publication, publication_item),
+    (Thread, thread_item),
+)
+
+
+def sort_key(item: dict) -> tuple:
+    # Feed order: newest first, ties broken by content type and object id
+    return item["published_at"], item["content_type"].id, item["id"]
+
+
+def get_feed_page(cursor: str | None = None, page_size: int = FEED_PAGE_SIZE) -> tuple[list[dict], str | None]:
+    """
+    Merges publications and threads by 'published_at' using keyset pagination.
+    Every source is read with an indexed range query limited to one page, so the cost of a page
+    does not depend on the size of the tables.
+
+    :param cursor: Opaque cursor returned with the previous page, None for the first page
+    :param page_size: Number of items on the page
+    :return: Tuple of feed items with attached comments and the cursor of the next page (None on the last page)
+    :raise ValueError: If the cursor is malformed
+    """
+    position = decode_cursor(cursor, 2) if cursor else None
+
+    streams = []
+    for model, build_item in FEED_SOURCES:
+        content_type = ContentType.objects.get_for_model(model)
+        queryset = model.objects.order_by("-published_at", "-id")
+        if position:
+            published_at, content_type_id, object_id = position
+            after_position = Q(published_at__lt=published_at)
+            if content_type.id < content_type_id:
+                after_position |= Q(published_at=published_at)
+            elif content_type.id == content_type_id:
+                after_position |= Q(published_at=published_at, id__lt=object_id)
+            queryset = queryset.filter(after_position)
+        streams.append([build_item(obj, content_type) for obj in queryset[: page_size + 1]])
+
+    merged = list(heapq.merge(*streams, key=sort_key, reverse=True))
+    contents = merged[:page_size]
+    next_cursor = None
+    if len(merged) > page_size:
+        last = contents[-1]
+        next_cursor = encode_cursor(last["published_at"], last["content_type"].id, last["id"])
+
+    return attach_comments(contents), next_cursor
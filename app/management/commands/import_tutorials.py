@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.tutorials import import_tutorials
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports tutorials from a directory of Markdown files laid out as '<language slug>/<order>-<name>.md' "
+        "and renders them to HTML. Cached tutorial pages are invalidated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", type=Path, help="Root directory of the tutorials")
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        if not directory.is_dir():
+            raise CommandError(f"{directory} is not a directory")
+
+        stats = import_tutorials(directory)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats['languages']} languages, {stats['pages']} pages and {stats['subsections']} "
+                f"subsections, deleted {stats['deleted_pages']} pages"
+            )
+        )
@@ -1,7 +1,511 @@
-from django.core.management.base import BaseCommand
+import csv
+import io
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Max, OuterRef, Q, Subquery
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from app import autocomplete
+from app.constants import CHAT_PREVIEW_LENGTH, TIMELINE_FANOUT_LIMIT
+from app.models import Comments, ProgrammingLanguage, SubSection, Thread, TimelineEntry, TutorialPage
+from app.search import SEARCH_SOURCES
+from community import followers as community_followers
+from community.models import Community, CommunityFollowers, CommunityFollowRequests
+from core.cache import invalidate_all
+from core.counters import count_expressions
+from users import followers as user_followers
+from users.models import Chat, ChatReadState, CustomUser, Followers, Message, Moderators, Publication
+
+# Row counts at scale 1, multiplied by --scale
+SCALED_COUNTS = {"users": 10000, "communities": 200, "threads": 20000, "chats": 5000}
+# Average number of related rows per object, not scaled
+FOLLOWS_PER_USER = 20
+PUBLICATIONS_PER_USER = 3
+FOLLOWERS_PER_COMMUNITY = 100
+REQUESTS_PER_PRIVATE_COMMUNITY = 5
+POSTS_PER_COMMUNITY = 20
+COMMENTS_PER_OBJECT = 5
+MESSAGES_PER_CHAT = 30
+PAGES_PER_LANGUAGE = 20
+SUBSECTIONS_PER_PAGE = 5
+TEXT_POOL_SIZE = 1000
+
+LANGUAGES = (("python", "mainpy"), ("c", "mainc"), ("java", "mainjava"), ("javascript", "mainjs"), ("cpp", "maincpp"))
+WORDS = (
+    "python django query index cache thread socket channel redis database async model view template "
+    "request response server client function class object module package test benchmark latency "
+    "memory pointer compiler array list dictionary string integer loop recursion algorithm graph "
+    "tree hash sort search network protocol stream buffer queue worker task event signal"
+).split()
+
+
+# Values of these fields are written to COPY as they are, other fields are converted by get_db_prep_save()
+RAW_TYPES = {
+    "BooleanField",
+    "CharField",
+    "ForeignKey",
+    "IntegerField",
+    "PositiveIntegerField",
+    "SlugField",
+    "TextField",
+}
+
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Loader:
+    """
+    Writes unsaved model instances to the database in batches.
+    'copy' streams every batch as CSV through PostgreSQL COPY and keeps the given auto_now(_add) dates,
+    'bulk' uses bulk_create, where auto_now(_add) fields get the time of the load.
+
+    :param method: 'copy' or 'bulk'
+    :param batch_size: Number of rows written at once
+    :param stdout: Output of the command for progress reports
+    """
+
+    def __init__(self, method: str, batch_size: int, stdout):
+        self.method = method
+        self.batch_size = batch_size
+        self.stdout = stdout
+
+    def load(self, model, objects, ids: bool = False) -> list[int]:
+        """
+        :param model: Model of the objects
+        :param objects: Iterable of unsaved instances, consumed lazily
+        :param ids: Return primary keys of the new rows
+        :return: Primary keys of the new rows in insertion order if ids is True, otherwise an empty list
+        """
+        last_pk = model.objects.aggregate(last=Max("pk"))["last"] or 0
+        started = time.perf_counter()
+        rows = 0
+        for batch in batched(objects, self.batch_size):
+            if self.method == "copy":
+                self.copy(model, batch)
+            else:
+                model.objects.bulk_create(batch)
+            rows += len(batch)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{model._meta.db_table}: {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-6):.0f}/s)")
+        if not ids:
+            return []
+        return list(model.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", flat=True))
+
+    def copy(self, model, batch: list) -> None:
+        fields = [field for field in model._meta.concrete_fields if field is not model._meta.auto_field]
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        # The connection proxy is resolved once, prepare() runs for every value
+        db = connections[DEFAULT_DB_ALIAS]
+        now = timezone.now()
+        prepared = [(field.attname, field if field.get_internal_type() not in RAW_TYPES else None) for field in fields]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in batch:
+            writer.writerow([self.prepare(getattr(obj, attname), field, now, db) for attname, field in prepared])
+        buffer.seek(0)
+        with db.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN "
+                f"WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    @staticmethod
+    def prepare(value, field, now, db):
+        """
+        :param field: Field whose value needs conversion, None if the value is written as it is
+        """
+        if field is not None:
+            if value is None and (getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)):
+                value = now
+            value = field.get_db_prep_save(value, db)
+        if value is None:
+            return "\\N"
+        if value is True or value is False:
+            return "t" if value else "f"
+        return value
 
 
 class Command(BaseCommand):
-    help = "Upload data from to dp"
+    help = (
+        "Generates a deterministic synthetic dataset: users, follow graph, communities, publications, threads, "
+        "comments, chats and tutorial pages. Row counts grow with --scale, the same --seed gives the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the number of rows")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Rows written at once")
+        parser.add_argument(
+            "--method",
+            choices=("copy", "bulk"),
+            default="copy" if connection.vendor == "postgresql" else "bulk",
+            help="COPY (PostgreSQL only) or bulk_create, bulk_create sets publication, thread and message dates to now",
+        )
+        parser.add_argument("--prefix", default="synthetic", help="Prefix of generated usernames and community names")
+        parser.add_argument("--password", default=None, help="Password of all generated users, unusable by default")
+        parser.add_argument("--days", type=int, default=365, help="Generated content is spread over this many days")
+        parser.add_argument(
+            "--no-fan-out",
+            dest="fan_out",
+            action="store_false",
+            help="Do not deliver publications to timelines, every publication is read into timelines on request",
+        )
+
+    def handle(self, *args, **options):
+        if options["method"] == "copy" and connection.vendor != "postgresql":
+            raise CommandError("COPY is supported on PostgreSQL only, use --method bulk")
+        self.prefix = options["prefix"]
+        if CustomUser.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise CommandError(f"Users with prefix '{self.prefix}' already exist, choose another --prefix")
+
+        self.rng = random.Random(options["seed"])
+        self.texts = {}
+        self.now = timezone.now()
+        self.span = timedelta(days=options["days"])
+        self.loader = Loader(options["method"], options["batch_size"], self.stdout)
+        counts = {name: max(int(count * options["scale"]), 2) for name, count in SCALED_COUNTS.items()}
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            user_ids = self.load_users(counts["users"], options["password"])
+            self.load_follows(user_ids)
+            community_posts = self.load_communities(counts["communities"], user_ids)
+            publication_ids = self.load_publications(user_ids, community_posts)
+            if options["fan_out"] and publication_ids:
+                self.fan_out(min(publication_ids))
+            thread_ids = self.load_threads(counts["threads"], user_ids)
+            self.load_comments(user_ids, publication_ids, thread_ids)
+            self.load_chats(counts["chats"], user_ids)
+            self.load_tutorials()
+            self.update_search_vectors(
+                {
+                    CustomUser: user_ids[0],
+                    Community: community_posts[0][0],
+                    Publication: min(publication_ids, default=None),
+                    Thread: thread_ids[0],
+                }
+            )
+        autocomplete.reset_index()
+        invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Loaded in {time.perf_counter() - started:.1f}s"))
+
+    def moment(self):
+        return self.now - self.span * self.rng.random()
+
+    def text(self, words: int) -> str:
+        # Texts are drawn from a pool, building a new one for every row would take most of the load time
+        if words not in self.texts:
+            self.texts[words] = [" ".join(self.rng.choices(WORDS, k=words)).capitalize() for _ in range(TEXT_POOL_SIZE)]
+        return self.rng.choice(self.texts[words])
+
+    def load_users(self, count: int, password: str | None) -> list[int]:
+        # Hashing is slow, all users share one hash
+        password_hash = make_password(password)
+        users = (
+            CustomUser(
+                username=f"{self.prefix}_{i}",
+                email=f"{self.prefix}_{i}@example.com",
+                password=password_hash,
+                date_joined=self.moment(),
+            )
+            for i in range(count)
+        )
+        return self.loader.load(CustomUser, users, ids=True)
+
+    def load_follows(self, user_ids: list[int]) -> None:
+        def follows():
+            for follower_id in user_ids:
+                for user_id in self.rng.sample(user_ids, min(self.rng.randint(0, FOLLOWS_PER_USER * 2), len(user_ids))):
+                    if user_id != follower_id:
+                        # 'following' is the follower of 'user'
+                        yield Followers(user_id=user_id, following_id=follower_id, is_follow=True)
+
+        self.loader.load(Followers, follows())
+
+        CustomUser.objects.filter(pk__gte=user_ids[0]).update(**count_expressions(user_followers.counted_rows()))
+
+    def load_communities(self, count: int, user_ids: list[int]) -> list[tuple[int, int]]:
+        """
+        :return: List of community id and owner id pairs
+        """
+        communities = [
+            Community(
+                name=f"{self.prefix}_community_{i}", description=self.text(12), is_private=self.rng.random() < 0.3
+            )
+            for i in range(count)
+        ]
+        community_ids = self.loader.load(Community, communities, ids=True)
+        owner_ids = [self.rng.choice(user_ids) for _ in community_ids]
+        moderator_ids = self.loader.load(
+            Moderators, (Moderators(user_id=owner_id, is_owner=True) for owner_id in owner_ids), ids=True
+        )
+        self.loader.load(
+            Community.admins.through,
+            (
+                Community.admins.through(community_id=community_id, moderators_id=moderator_id)
+                for community_id, moderator_id in zip(community_ids, moderator_ids)
+            ),
+        )
+
+        followers = {}
+        for community_id in community_ids:
+            size = min(self.rng.randint(0, FOLLOWERS_PER_COMMUNITY * 2), len(user_ids))
+            followers[community_id] = self.rng.sample(user_ids, size)
+        self.loader.load(
+            CommunityFollowers,
+            (
+                CommunityFollowers(community_id=community_id, user_id=user_id, is_follow=True)
+                for community_id, members in followers.items()
+                for user_id in members
+            ),
+        )
+
+        def requests():
+            for community, community_id in zip(communities, community_ids):
+                if not community.is_private:
+                    continue
+                candidates = set(self.rng.sample(user_ids, min(REQUESTS_PER_PRIVATE_COMMUNITY, len(user_ids))))
+                for user_id in sorted(candidates - set(followers[community_id])):
+                    yield CommunityFollowRequests(community_id=community_id, user_id=user_id, send_status=True)
+
+        self.loader.load(CommunityFollowRequests, requests())
+        Community.objects.filter(pk__gte=community_ids[0]).update(
+            **count_expressions(community_followers.counted_rows())
+        )
+        return list(zip(community_ids, owner_ids))
+
+    def publication(self, content_type: ContentType, author_id: int) -> Publication:
+        published_at = self.moment()
+        return Publication(
+            content_type=content_type,
+            author_id=author_id,
+            title=self.text(5),
+            context=self.text(60),
+            published_at=published_at,
+            updated=published_at,
+            status="published",
+            # Set by fan_out for publications delivered to timelines
+            fanned_out=False,
+        )
+
+    def load_publications(self, user_ids: list[int], community_posts: list[tuple[int, int]]) -> list[int]:
+        user_type = ContentType.objects.get_for_model(CustomUser)
+        user_publications = (
+            self.publication(user_type, user_id)
+            for user_id in user_ids
+            for _ in range(self.rng.randint(0, PUBLICATIONS_PER_USER * 2))
+        )
+        publication_ids = self.loader.load(Publication, user_publications, ids=True)
+
+        community_type = ContentType.objects.get_for_model(Community)
+        post_communities = [
+            community_id
+            for community_id, owner_id in community_posts
+            for _ in range(self.rng.randint(0, POSTS_PER_COMMUNITY * 2))
+        ]
+        owners = dict(community_posts)
+        post_ids = self.loader.load(
+            Publication,
+            (self.publication(community_type, owners[community_id]) for community_id in post_communities),
+            ids=True,
+        )
+        self.loader.load(
+            Community.posts.through,
+            (
+                Community.posts.through(community_id=community_id, publication_id=post_id)
+                for community_id, post_id in zip(post_communities, post_ids)
+            ),
+        )
+        return publication_ids + post_ids
+
+    def fan_out(self, first_publication_id: int) -> None:
+        """
+        Delivers the generated publications to the timelines of the followers of their authors and communities,
+        as app.timeline does on publish. Authors and communities above TIMELINE_FANOUT_LIMIT followers
+        are left to be read on request.
+        """
+        started = time.perf_counter()
+        tables = {
+            "timeline": TimelineEntry._meta.db_table,
+            "publication": Publication._meta.db_table,
+            "followers": Followers._meta.db_table,
+            "user": CustomUser._meta.db_table,
+            "posts": Community.posts.through._meta.db_table,
+            "community": Community._meta.db_table,
+            "community_followers": CommunityFollowers._meta.db_table,
+        }
+        user_type = ContentType.objects.get_for_model(CustomUser)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO {timeline} (user_id, publication_id, published_at)
+                SELECT f.following_id, p.id, p.published_at FROM {publication} p
+                JOIN {user} u ON u.id = p.author_id AND u.followers_count <= %s
+                JOIN {followers} f ON f.user_id = u.id AND f.is_follow
+                WHERE p.id >= %s AND p.content_type_id = %s
+                """.format(
+                    **tables
+                ),
+                [TIMELINE_FANOUT_LIMIT, first_publication_id, user_type.id],
+            )
+            entries = cursor.rowcount
+            cursor.execute(
+                """
+                INSERT INTO {timeline} (user_id, publication_id, published_at)
+                SELECT f.user_id, p.id, p.published_at FROM {publication} p
+                JOIN {posts} cp ON cp.publication_id = p.id
+                JOIN {community} c ON c.id = cp.community_id AND c.followers_count <= %s
+                JOIN {community_followers} f ON f.community_id = c.id AND f.is_follow
+                WHERE p.id >= %s
+                """.format(
+                    **tables
+                ),
+                [TIMELINE_FANOUT_LIMIT, first_publication_id],
+            )
+            entries += cursor.rowcount
+
+        Publication.objects.filter(pk__gte=first_publication_id).filter(
+            Q(
+                content_type=user_type,
+                author_id__in=CustomUser.objects.filter(followers_count__lte=TIMELINE_FANOUT_LIMIT).values("id"),
+            )
+            | Q(posts__followers_count__lte=TIMELINE_FANOUT_LIMIT)
+        ).update(fanned_out=True)
+        self.stdout.write(f"{tables['timeline']}: {entries} rows in {time.perf_counter() - started:.1f}s")
+
+    def load_threads(self, count: int, user_ids: list[int]) -> list[int]:
+        def threads():
+            for _ in range(count):
+                published_at = self.moment()
+                yield Thread(
+                    author_id=self.rng.choice(user_ids),
+                    title=self.text(6),
+                    context=self.text(80),
+                    published_at=published_at,
+                    updated=published_at,
+                    status="published",
+                )
+
+        return self.loader.load(Thread, threads(), ids=True)
+
+    def load_comments(self, user_ids: list[int], publication_ids: list[int], thread_ids: list[int]) -> None:
+        publication_type = ContentType.objects.get_for_model(Publication)
+        thread_type = ContentType.objects.get_for_model(Thread)
+        commented = [(publication_type, pk) for pk in publication_ids] + [(thread_type, pk) for pk in thread_ids]
+        comments = (
+            Comments(
+                user_id=self.rng.choice(user_ids),
+                context=self.text(20),
+                content_type=content_type,
+                object_id=object_id,
+            )
+            for content_type, object_id in commented
+            for _ in range(self.rng.randint(0, COMMENTS_PER_OBJECT * 2))
+        )
+        self.loader.load(Comments, comments)
+
+    def load_chats(self, count: int, user_ids: list[int]) -> None:
+        pairs = set()
+        while len(pairs) < min(count, len(user_ids) * (len(user_ids) - 1) // 2):
+            sender_id, recipient_id = self.rng.sample(user_ids, 2)
+            if (recipient_id, sender_id) not in pairs:
+                pairs.add((sender_id, recipient_id))
+        pairs = sorted(pairs)
+        chat_ids = self.loader.load(
+            Chat, (Chat(sender_id=sender_id, recipient_id=recipient_id) for sender_id, recipient_id in pairs), ids=True
+        )
+
+        def messages():
+            for chat_id, participants in zip(chat_ids, pairs):
+                date_added = self.moment()
+                for _ in range(self.rng.randint(1, MESSAGES_PER_CHAT * 2)):
+                    date_added += timedelta(minutes=self.rng.randint(1, 600))
+                    yield Message(
+                        chat_id=chat_id,
+                        user_id=self.rng.choice(participants),
+                        context=self.text(12),
+                        date_added=date_added,
+                    )
+
+        self.loader.load(Message, messages())
+        self.loader.load(
+            ChatReadState,
+            (
+                ChatReadState(chat_id=chat_id, user_id=user_id)
+                for chat_id, participants in zip(chat_ids, pairs)
+                for user_id in participants
+            ),
+        )
+
+        # Previews and inboxes are filled from the last message, every generated message counts as read
+        last_message = Message.objects.filter(chat=OuterRef("chat_id")).order_by("-date_added", "-id")
+        ChatReadState.objects.filter(chat_id__gte=chat_ids[0]).update(
+            last_message_at=Subquery(last_message.values("date_added")[:1]),
+            last_read_message=Subquery(last_message.values("id")[:1]),
+        )
+        Chat.objects.filter(pk__gte=chat_ids[0]).update(
+            last_message_preview=Substr(
+                Subquery(
+                    Message.objects.filter(chat=OuterRef("pk")).order_by("-date_added", "-id").values("context")[:1]
+                ),
+                1,
+                CHAT_PREVIEW_LENGTH,
+            )
+        )
+
+    def load_tutorials(self) -> None:
+        languages = [
+            ProgrammingLanguage.objects.get_or_create(slug=slug, defaults={"name": name})[0] for name, slug in LANGUAGES
+        ]
+        # Generated pages follow the pages that already exist
+        last_orders = dict(
+            TutorialPage.objects.filter(language__in=languages)
+            .values("language")
+            .annotate(last=Max("order"))
+            .values_list("language", "last")
+        )
+        page_languages = [language for language in languages for _ in range(PAGES_PER_LANGUAGE)]
+        page_ids = self.loader.load(
+            TutorialPage,
+            (
+                TutorialPage(
+                    language=language,
+                    title=self.text(4),
+                    order=last_orders.get(language.id, 0) + i % PAGES_PER_LANGUAGE + 1,
+                )
+                for i, language in enumerate(page_languages)
+            ),
+            ids=True,
+        )
+        self.loader.load(
+            SubSection,
+            (
+                SubSection(page_id=page_id, title=self.text(3), content=self.text(150), order=order)
+                for page_id in page_ids
+                for order in range(1, SUBSECTIONS_PER_PAGE + 1)
+            ),
+        )
 
-    def handle(self, *args, **options): ...
+    def update_search_vectors(self, first_ids: dict) -> None:
+        """
+        :param first_ids: Dictionary of model and the primary key of its first generated row
+        """
+        # Bulk inserts skip the post_save signals that keep search vectors up to date
+        for source in SEARCH_SOURCES:
+            first_id = first_ids.get(source.model)
+            if first_id is not None:
+                source.model.objects.filter(pk__gte=first_id).update(search_vector=source.vector)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0004_notification_content_type_notification_object_id"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="thread",
+            index=models.Index(fields=["-published_at", "-id"], name="thread_feed_idx"),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    Thread = apps.get_model("app", "Thread")
+    Thread.objects.update(
+        search_vector=SearchVector("title", weight="A", config="english")
+        + SearchVector("context", weight="B", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0006_timeline"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="thread",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="thread",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="thread_search_idx"),
+        ),
+        TrigramExtension(),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS thread_title_trgm_idx ON app_thread USING gin (UPPER(title) gin_trgm_ops);",
+            "DROP INDEX IF EXISTS thread_title_trgm_idx;",
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subsection",
+            name="content_html",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
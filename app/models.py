@@ -1,8 +1,10 @@
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-from users.models import CustomUser
+from users.models import CustomUser, Publication
 
 
 class Thread(models.Model):
@@ -21,6 +23,13 @@ class Thread(models.Model):
         ),
         default="draft",
     )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-published_at", "-id"], name="thread_feed_idx"),
+            GinIndex(fields=["search_vector"], name="thread_search_idx"),
+        ]
 
 
 class Comments(models.Model):
@@ -35,6 +44,20 @@ class Comments(models.Model):
     content_object = GenericForeignKey("content_type", "object_id")
 
 
+class TimelineEntry(models.Model):
+    """
+    Materialized home timeline: one row per publication delivered to a user's recommendation feed
+    """
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="timeline")
+    publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name="timeline_entries")
+    published_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = (("user", "publication"),)
+        indexes = [models.Index(fields=["user", "-published_at"], name="timeline_user_idx")]
+
+
 class ProgrammingLanguage(models.Model):
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
@@ -59,6 +82,8 @@ class SubSection(models.Model):
     page = models.ForeignKey(TutorialPage, on_delete=models.CASCADE, related_name="subsections")
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # Markdown 'content' rendered to HTML by the tutorial importer
+    content_html = models.TextField(blank=True, default="")
     order = models.IntegerField()
 
     class Meta:
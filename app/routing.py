@@ -0,0 +1,10 @@
+from django.urls import re_path
+
+from app.consumers import NotificationConsumer, CommentsConsumer, ChatConsumer
+
+websocket_urlpatterns = [
+    re_path(r"ws/notify/$", NotificationConsumer.as_asgi()),
+    re_path(r"ws/comments/$", CommentsConsumer.as_asgi()),
+    re_path(r"ws/comments/(?P<content_type_id>\d+)/(?P<object_id>\d+)/$", CommentsConsumer.as_asgi()),
+    re_path(r"ws/message/(?P<chat_id>\d+)/$", ChatConsumer.as_asgi()),
+]
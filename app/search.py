@@ -0,0 +1,103 @@
+import heapq
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Coalesce
+
+from community.models import Community
+from users.models import CustomUser, Publication
+from .constants import SEARCH_LIMIT
+from .models import Thread
+
+
+class SearchSource:
+    """
+    Describes how one model is indexed and presented in search results
+
+    :param model: Indexed model, must have a 'search_vector' field
+    :param config: PostgreSQL text search configuration
+    :param weights: Dictionary of indexed fields and their weights ('A' is the most important)
+    :param title_field: Field shown as result title and used for fuzzy prefix matching
+    :param link: Function that builds URL path to the object
+    """
+
+    def __init__(self, model, config: str, weights: dict[str, str], title_field: str, link):
+        self.model = model
+        self.config = config
+        self.weights = weights
+        self.title_field = title_field
+        self.link = link
+
+    @property
+    def vector(self):
+        vectors = [SearchVector(field, weight=weight, config=self.config) for field, weight in self.weights.items()]
+        vector = vectors[0]
+        for other in vectors[1:]:
+            vector += other
+        return vector
+
+    def update_vector(self, pk=None) -> None:
+        """
+        Recomputes 'search_vector' of one object, or of every object when pk is None
+        """
+        queryset = self.model.objects.all() if pk is None else self.model.objects.filter(pk=pk)
+        queryset.update(search_vector=self.vector)
+
+    def search(self, text: str, limit: int) -> list[dict]:
+        query = prefix_query(text, self.config)
+        queryset = (
+            self.model.objects.filter(Q(search_vector=query) | Q(**{f"{self.title_field}__istartswith": text}))
+            # Rows without a vector (bulk inserts) match by title prefix only and rank last
+            .annotate(
+                rank=Coalesce(SearchRank(F("search_vector"), query), Value(0.0), output_field=FloatField())
+            ).order_by("-rank", "pk")[:limit]
+        )
+        return [{"title": getattr(obj, self.title_field), "link": self.link(obj), "rank": obj.rank} for obj in queryset]
+
+
+SEARCH_SOURCES = (
+    SearchSource(CustomUser, "simple", {"username": "A"}, "username", lambda user: f"/user-page/{user.username}/"),
+    SearchSource(
+        Thread, "english", {"title": "A", "context": "B"}, "title", lambda thread: f"/thread-detail/{thread.id}"
+    ),
+    SearchSource(
+        Community,
+        "simple",
+        {"name": "A", "description": "B"},
+        "name",
+        lambda community: f"/community/name-{community.name}/",
+    ),
+    SearchSource(
+        Publication,
+        "english",
+        {"title": "A", "context": "B"},
+        "title",
+        lambda publication: f"/publication/{publication.id}/",
+    ),
+)
+
+
+def prefix_query(text: str, config: str) -> SearchQuery:
+    # Every word of the query must match, the last one may be incomplete
+    words = re.findall(r"\w+", text)
+    raw = " & ".join(f"{word}:*" for word in words)
+    return SearchQuery(raw, search_type="raw", config=config)
+
+
+def search(text: str, limit: int = SEARCH_LIMIT) -> list[dict]:
+    """
+    Ranked full-text search over users, threads, communities and publications
+
+    :param text: Search query, words are matched by prefix
+    :param limit: Maximum number of results
+    :return: List of results ordered by rank:
+        - title (str): Username | Thread title | Community name | Publication title
+        - link (str): URL path to object
+        - rank (float): Search rank
+    """
+    if not re.search(r"\w", text):
+        return []
+
+    results = [source.search(text, limit) for source in SEARCH_SOURCES]
+    return list(heapq.merge(*results, key=lambda result: result["rank"], reverse=True))[:limit]
@@ -1,8 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from .models import Notification
+from . import autocomplete, tutorials
+from .consumers import notification_group
+from .models import Notification, ProgrammingLanguage, SubSection, TutorialPage
+from .search import SEARCH_SOURCES
+from users.models import Chat
+from users.read_state import create_read_states
 
 
 @receiver(post_save, sender=Notification)
@@ -10,5 +15,67 @@ def notification_created(sender, instance, created, **kwargs):
     if created:
         channel_layer = get_channel_layer()
         async_to_sync(channel_layer.group_send)(
-            "notification_room", {"type": "send_notification", "message": instance.message, "id": instance.id}
+            notification_group(instance.user_id),
+            {"type": "send_notification", "message": instance.message, "id": instance.id},
         )
+
+
+@receiver(post_save, sender=Chat)
+def chat_created(sender, instance, created, **kwargs):
+    if created:
+        create_read_states(instance)
+
+
+def search_vector_updater(source):
+    def update_search_vector(sender, instance, update_fields=None, **kwargs):
+        # Saves that do not touch indexed fields (e.g. last_login) keep the current vector
+        if update_fields is not None and not set(update_fields) & set(source.weights):
+            return
+        source.update_vector(instance.pk)
+
+    return update_search_vector
+
+
+for search_source in SEARCH_SOURCES:
+    post_save.connect(
+        search_vector_updater(search_source),
+        sender=search_source.model,
+        weak=False,
+        dispatch_uid=f"search_vector_{search_source.model.__name__}",
+    )
+
+
+def autocomplete_updater(source):
+    def update_autocomplete(sender, instance, update_fields=None, **kwargs):
+        if update_fields is not None and source.label_field not in update_fields:
+            return
+        autocomplete.update_object(source, instance)
+
+    return update_autocomplete
+
+
+def autocomplete_remover(source):
+    def remove_from_autocomplete(sender, instance, **kwargs):
+        autocomplete.remove_object(source, instance)
+
+    return remove_from_autocomplete
+
+
+for autocomplete_source in autocomplete.AUTOCOMPLETE_SOURCES:
+    post_save.connect(
+        autocomplete_updater(autocomplete_source),
+        sender=autocomplete_source.model,
+        weak=False,
+        dispatch_uid=f"autocomplete_save_{autocomplete_source.name}",
+    )
+    post_delete.connect(
+        autocomplete_remover(autocomplete_source),
+        sender=autocomplete_source.model,
+        weak=False,
+        dispatch_uid=f"autocomplete_delete_{autocomplete_source.name}",
+    )
+
+
+# Every cached tutorial page shows the navigation of its language, any change invalidates all of them
+for tutorial_model in (ProgrammingLanguage, TutorialPage, SubSection):
+    tutorials.tutorial_cache.invalidate_on(tutorial_model)
@@ -0,0 +1,116 @@
+import heapq
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from community.models import Community, CommunityFollowers
+from users.followers import get_follower_ids, get_following_ids
+from users.models import CustomUser, Publication
+from .constants import TIMELINE_FANOUT_LIMIT, TIMELINE_PAGE_SIZE
+from .models import TimelineEntry
+
+# ------------------------ FAN-OUT ON WRITE ------------------------
+
+
+def fan_out(publication: Publication, follower_ids) -> bool:
+    """
+    Delivers the publication to the timelines of the given followers.
+    Publications with more followers than TIMELINE_FANOUT_LIMIT are skipped and read on request instead.
+
+    :param publication: Saved publication instance
+    :param follower_ids: Queryset or list of follower ids
+    :return: True if the publication was fanned out, otherwise False
+    """
+    follower_ids = list(follower_ids[: TIMELINE_FANOUT_LIMIT + 1])
+    if len(follower_ids) > TIMELINE_FANOUT_LIMIT:
+        return False
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=follower_id, publication=publication, published_at=publication.published_at)
+            for follower_id in follower_ids
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    Publication.objects.filter(id=publication.id).update(fanned_out=True)
+    publication.fanned_out = True
+    return True
+
+
+def fan_out_user_publication(publication: Publication) -> bool:
+    return fan_out(publication, sorted(get_follower_ids(publication.author_id)))
+
+
+def fan_out_community_publication(publication: Publication, community: Community) -> bool:
+    follower_ids = CommunityFollowers.objects.filter(community=community, is_follow=True).values_list(
+        "user_id", flat=True
+    )
+    return fan_out(publication, follower_ids)
+
+
+def backfill(user_id: int, publications) -> None:
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, publication=publication, published_at=publication.published_at)
+            for publication in publications.filter(fanned_out=True).order_by("-published_at")[:TIMELINE_PAGE_SIZE]
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def user_publications(author_id: int):
+    return Publication.objects.filter(author_id=author_id, content_type=ContentType.objects.get_for_model(CustomUser))
+
+
+def follow_author(user_id: int, author_id: int) -> None:
+    """
+    Adds the latest publications of the followed author to the user's timeline
+    """
+    backfill(user_id, user_publications(author_id))
+
+
+def unfollow_author(user_id: int, author_id: int) -> None:
+    TimelineEntry.objects.filter(user_id=user_id, publication__in=user_publications(author_id)).delete()
+
+
+def follow_community(user_id: int, community: Community) -> None:
+    """
+    Adds the latest posts of the followed community to the user's timeline
+    """
+    backfill(user_id, community.posts.all())
+
+
+def unfollow_community(user_id: int, community: Community) -> None:
+    TimelineEntry.objects.filter(user_id=user_id, publication__in=community.posts.all()).delete()
+
+
+# ------------------------ TIMELINE READ ------------------------
+
+
+def get_timeline(user: CustomUser, limit: int = TIMELINE_PAGE_SIZE) -> list[Publication]:
+    """
+    Reads the user's home timeline with a single range read over the materialized entries,
+    merged with publications of followed authors and communities that were not fanned out on write.
+
+    :param user: Timeline owner
+    :param limit: Maximum number of publications
+    :return: List of publications, newest first
+    """
+    entries = TimelineEntry.objects.filter(user=user).select_related("publication").order_by("-published_at")
+    delivered = [entry.publication for entry in entries[:limit]]
+
+    following_ids = get_following_ids(user.id)
+    community_ids = CommunityFollowers.objects.filter(user=user, is_follow=True).values("community_id")
+    pulled = (
+        Publication.objects.filter(fanned_out=False)
+        .filter(
+            Q(author_id__in=following_ids, content_type=ContentType.objects.get_for_model(CustomUser))
+            | Q(posts__in=community_ids)
+        )
+        .distinct()
+        .order_by("-published_at")[:limit]
+    )
+
+    merged = heapq.merge(delivered, pulled, key=lambda publication: publication.published_at, reverse=True)
+    return list(merged)[:limit]
@@ -0,0 +1,248 @@
+import re
+from pathlib import Path
+
+import markdown
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.urls import reverse
+from django.utils.text import slugify
+
+from core.cache import CacheNamespace, cached_query
+from .constants import TUTORIAL_CACHE_TTL
+from .models import ProgrammingLanguage, SubSection, TutorialPage
+
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+PAGE_FILE = re.compile(r"^(\d+)[-_ ].*\.md$")
+
+
+# ------------------------ CACHE ------------------------
+
+# Rendered pages and navigation indexes, invalidated by every change of tutorial rows in app.signals
+tutorial_cache = CacheNamespace("app:tutorials", timeout=TUTORIAL_CACHE_TTL)
+
+
+# ------------------------ NAVIGATION INDEX ------------------------
+
+
+def subsection_anchors(titles: list[str]) -> list[dict]:
+    """
+    :param titles: Subsection titles of one page in display order
+    :return: List of dictionaries with the anchor id and title of every subsection with a title,
+        repeated titles get a numeric suffix so anchors stay unique within the page
+    """
+    anchors = []
+    used = set()
+    for title in titles:
+        if not title:
+            continue
+        base = slugify(title) or "section"
+        anchor, number = base, 1
+        while anchor in used:
+            number += 1
+            anchor = f"{base}-{number}"
+        used.add(anchor)
+        anchors.append({"id": anchor, "title": title})
+    return anchors
+
+
+def build_navigation(language: ProgrammingLanguage) -> dict:
+    """
+    Builds the navigation index of one language with two queries: its pages and their subsection titles.
+
+    :return: Dictionary:
+        - name (str): Language name
+        - slug (str): Language slug
+        - url (str): URL of the first page, None if the language has no pages
+        - pages (list[dict]): Pages in display order
+            - id (int): Page ID
+            - title (str): Page title
+            - url (str): URL of the page
+            - anchors (list[dict]): Anchor id and title of every subsection
+            - previous (dict): Title and URL of the previous page, None for the first page
+            - next (dict): Title and URL of the next page, None for the last page
+    """
+    pages = list(TutorialPage.objects.filter(language=language).order_by("order", "id").values("id", "title"))
+    titles = {}
+    for page_id, title in (
+        SubSection.objects.filter(page__language=language).order_by("order", "id").values_list("page_id", "title")
+    ):
+        titles.setdefault(page_id, []).append(title)
+
+    for page in pages:
+        page["url"] = reverse("tutorials", args=(language.slug, page["id"]))
+        page["anchors"] = subsection_anchors(titles.get(page["id"], []))
+    for index, page in enumerate(pages):
+        previous_page = pages[index - 1] if index > 0 else None
+        next_page = pages[index + 1] if index + 1 < len(pages) else None
+        page["previous"] = previous_page and {"title": previous_page["title"], "url": previous_page["url"]}
+        page["next"] = next_page and {"title": next_page["title"], "url": next_page["url"]}
+
+    return {
+        "name": language.name,
+        "slug": language.slug,
+        "url": pages[0]["url"] if pages else None,
+        "pages": pages,
+    }
+
+
+def get_navigation(slug: str) -> dict | None:
+    """
+    Returns the cached navigation index of a language, it is built once per tutorial content version.
+
+    :param slug: Language slug
+    :return: Navigation index described in build_navigation, None if the language does not exist
+    """
+
+    def load():
+        language = ProgrammingLanguage.objects.filter(slug=slug).first()
+        return language and build_navigation(language)
+
+    return cached_query(tutorial_cache, f"navigation:{slug}", load)
+
+
+def get_languages() -> list[dict]:
+    """
+    Returns the cached list of languages that have tutorial pages, used for links to tutorials.
+    It is built with one query, the first page of every language is taken by a subquery.
+
+    :return: List of dictionaries with the name, slug and first page URL of every language, sorted by name
+    """
+
+    def load():
+        first_page = TutorialPage.objects.filter(language=OuterRef("pk")).order_by("order", "id").values("id")[:1]
+        rows = (
+            ProgrammingLanguage.objects.annotate(first_page_id=Subquery(first_page))
+            .filter(first_page_id__isnull=False)
+            .order_by("name", "slug")
+            .values("name", "slug", "first_page_id")
+        )
+        return [
+            {
+                "name": row["name"],
+                "slug": row["slug"],
+                "url": reverse("tutorials", args=(row["slug"], row["first_page_id"])),
+            }
+            for row in rows
+        ]
+
+    return cached_query(tutorial_cache, "languages", load)
+
+
+def get_page_navigation(navigation: dict, page_id: int) -> dict | None:
+    """
+    :return: Page entry of the navigation index, None if the page does not belong to the language
+    """
+    return next((page for page in navigation["pages"] if page["id"] == page_id), None)
+
+
+# ------------------------ MARKDOWN IMPORT ------------------------
+
+
+def render_markdown(text: str) -> str:
+    return markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+
+
+def parse_page(text: str, default_title: str) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Splits a Markdown page into subsections: a leading '# ' heading is the page title,
+    every '## ' heading starts a subsection, text before the first one is a subsection without title
+
+    :return: Tuple of page title and list of subsection titles and Markdown contents
+    """
+    title = default_title
+    sections = []
+    section_title, lines = None, []
+    for line in text.splitlines():
+        if line.startswith("# ") and section_title is None and not "".join(lines).strip():
+            title = line[2:].strip()
+        elif line.startswith("## "):
+            if section_title is not None or "".join(lines).strip():
+                sections.append((section_title or "", "\n".join(lines).strip()))
+            section_title, lines = line[3:].strip(), []
+        else:
+            lines.append(line)
+    if section_title is not None or "".join(lines).strip():
+        sections.append((section_title or "", "\n".join(lines).strip()))
+    return title, sections
+
+
+def read_language(directory: Path) -> tuple[str | None, list[tuple[int, str, list[tuple[str, str]]]]]:
+    """
+    :param directory: Directory of one language, its name is the language slug
+    :return: Tuple of the language name (first heading of README.md, None without it)
+        and list of page order, title and subsections sorted by order
+    """
+    name = None
+    readme = directory / "README.md"
+    if readme.exists():
+        name, sections = parse_page(readme.read_text(encoding="utf-8"), "")
+
+    pages = []
+    for path in directory.iterdir():
+        match = PAGE_FILE.match(path.name)
+        if match and path.is_file():
+            # '03-control-flow.md' is titled 'control flow' unless the page starts with a heading
+            default_title = re.sub(r"[-_]", " ", path.stem[match.end(1) + 1 :])
+            title, sections = parse_page(path.read_text(encoding="utf-8"), default_title)
+            pages.append((int(match.group(1)), title, sections))
+    pages.sort()
+    return name or None, pages
+
+
+@transaction.atomic
+def import_tutorials(directory: str | Path) -> dict[str, int]:
+    """
+    Imports tutorials from a directory of Markdown files and renders them to HTML.
+
+    Layout: '<directory>/<language slug>/<order>-<name>.md', the optional README.md of a language directory
+    holds the language name in its first heading. Pages keep their ids when their order does not change,
+    so tutorial URLs stay valid, pages whose file was removed are deleted. Subsections of imported pages
+    are replaced. The import invalidates every cached tutorial page.
+
+    :param directory: Root directory of the tutorials
+    :return: Dictionary with the number of imported languages, pages and subsections and deleted pages
+    """
+    stats = {"languages": 0, "pages": 0, "subsections": 0, "deleted_pages": 0}
+    # Deleted and saved rows would bump the namespace one by one, it is bumped once on commit instead
+    with tutorial_cache.deferred():
+        for language_directory in sorted(Path(directory).iterdir()):
+            if not language_directory.is_dir():
+                continue
+            name, pages = read_language(language_directory)
+            slug = language_directory.name
+            language, created = ProgrammingLanguage.objects.get_or_create(slug=slug, defaults={"name": name or slug})
+            if name and language.name != name:
+                language.name = name
+                language.save(update_fields=["name"])
+
+            existing = {page.order: page for page in TutorialPage.objects.filter(language=language)}
+            imported = []
+            new_pages = []
+            for order, title, sections in pages:
+                page = existing.pop(order, None)
+                if page is None:
+                    page = TutorialPage(language=language, title=title, order=order)
+                    new_pages.append(page)
+                page.title = title
+                imported.append((page, sections))
+            TutorialPage.objects.bulk_create(new_pages)
+            TutorialPage.objects.bulk_update([page for page, sections in imported], ["title"])
+            TutorialPage.objects.filter(id__in=[page.id for page in existing.values()]).delete()
+
+            SubSection.objects.filter(page__in=[page for page, sections in imported]).delete()
+            subsections = SubSection.objects.bulk_create(
+                [
+                    SubSection(
+                        page=page, title=title, content=content, content_html=render_markdown(content), order=order
+                    )
+                    for page, sections in imported
+                    for order, (title, content) in enumerate(sections, start=1)
+                ]
+            )
+
+            stats["languages"] += 1
+            stats["pages"] += len(imported)
+            stats["subsections"] += len(subsections)
+            stats["deleted_pages"] += len(existing)
+
+    return stats
@@ -4,6 +4,7 @@ from app import views
 
 urlpatterns = [
     path("", views.MainPageView.as_view(), name="index"),
+    path("feed/", views.FeedView.as_view(), name="feed"),
     # URLS FOR THREADS
     path("threads/", views.ThreadsPageView.as_view(), name="threads"),
     path("new-thread/", views.CreateThreadView.as_view(), name="new_thread"),
@@ -1,20 +1,24 @@
 import json
 
-from django.contrib.contenttypes.models import ContentType
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import get_object_or_404, render
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import render
 from django.shortcuts import redirect
+from django.template.loader import render_to_string
 from django.views import View
 from django.views.generic import DetailView
 
-from community.models import Community
-from users.models import CustomUser, Publication, Followers
-from .constants import PROGRAMMING_LANGUAGES
+from .autocomplete import suggest
+from .feed import get_feed_page
 from .forms import ThreadForm
+from core.cache import cached_query
 from core.helpers import post_request_details
 from core.mixins import RemoveCommentsMixin, DetailMixin
-from .models import ProgrammingLanguage, TutorialPage, SubSection, Notification, Comments
+from .models import SubSection, Notification
 from .models import Thread
+from .search import search
+from .timeline import get_timeline
+from .tutorials import get_languages, get_navigation, get_page_navigation, subsection_anchors, tutorial_cache
 
 
 # ------------------------ BASED VIEWS ------------------------
@@ -26,51 +30,31 @@ class MainPageView(View):
         """
         :return: Dictionary context:
             - notifications (list): List of all user notifications if user is authenticated
-            - contents (list[dict]): Content from Publications and Threads if user is authenticated
+            - contents (list[dict]): First feed page of Publications and Threads, newest first,
+            if user is authenticated
                 - title (str): Title of the publication
                 - photo (str): Return path ot photo if file exists, else return empty string
                 - link (str): Return URL path to publication
                 - id (int): Publication ID
                 - content_type (str): Determines which model this publication belongs
                 to in order to filter out commenters
-                - comments (list[Comments]):  Returns all comments that belong to the object
-            - prog_lang (str): Path to page with tutorials
+                - comments (list[Comments]):  Returns all comments that belong to the object,
+                loaded for the whole feed with one query
+            - next_cursor (str): Cursor of the next feed page, None if there are no more items
+            - prog_lang (list[dict]): Name, slug and first page URL of every language with tutorials
         """
         if request.user.is_authenticated:
             notifications = Notification.objects.filter(user=request.user).order_by("id")
-            publication_content_type = ContentType.objects.get_for_model(Publication)
-            publications_obj = [
-                {
-                    "title": publication.title,
-                    "photo": publication.attached_file if publication.attached_file is not None else "",
-                    "link": f"/publication/{publication.id}/",
-                    "id": publication.id,
-                    "content_type": publication_content_type,
-                    "comments": Comments.objects.filter(
-                        object_id=publication.id, content_type=publication_content_type
-                    ),
-                }
-                for publication in Publication.objects.filter().all()
-            ]
-            thread_content_type = ContentType.objects.get_for_model(Thread)
-            threads_obj = [
-                {
-                    "title": thread.title,
-                    "photo": thread.image if thread.image is not None else "",
-                    "link": f"thread-detail/{thread.pk}",
-                    "id": thread.id,
-                    "content_type": thread_content_type,
-                    "comments": Comments.objects.filter(object_id=thread.id, content_type=thread_content_type),
-                }
-                for thread in Thread.objects.filter().all()
-            ]
-            print(threads_obj)
-
-            contents = publications_obj + threads_obj
-            context = {"prog_lang": PROGRAMMING_LANGUAGES, "notifications": notifications, "contents": contents}
+            contents, next_cursor = get_feed_page()
+            context = {
+                "prog_lang": get_languages(),
+                "notifications": notifications,
+                "contents": contents,
+                "next_cursor": next_cursor,
+            }
             return context
         else:
-            context = {"prog_lang": PROGRAMMING_LANGUAGES}
+            context = {"prog_lang": get_languages()}
             return context
 
     def get(self, request, *args, **kwargs):
@@ -104,34 +88,47 @@ class MainPageView(View):
         return HttpResponse(json.dumps({"status": "error"}), status=400, content_type="application/json")
 
 
+class FeedView(LoginRequiredMixin, View):
+    template_name = "main_page/feed_items.html"
+
+    def get(self, request, *args, **kwargs):
+        """
+        Returns the next page of the main page feed for the 'Load more' button
+
+        :param request: GET request with 'cursor' parameter taken from the previous page
+        :param args: Additional arguments.
+        :param kwargs: Additional position arguments.
+        :return: JSON response
+            - html (str): Rendered feed items
+            - next_cursor (str): Cursor of the next page, None if there are no more items
+            - If cursor is invalid: {"error": "Invalid cursor"} and status code 400
+        """
+        try:
+            contents, next_cursor = get_feed_page(request.GET.get("cursor"))
+        except ValueError:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+        html = render_to_string(self.template_name, {"contents": contents}, request=request)
+        return JsonResponse({"html": html, "next_cursor": next_cursor})
+
+
 class SearchView(View):
     def get(self, request, *args, **kwargs):
         """
-        Searches all available objects from the database: CustomUser, Thread, Community
+        Searches all available objects from the database: CustomUser, Thread, Community, Publication
 
         :param request: HTTP request get name of object and passes it to the search query
         :param args: Additional arguments.
         :param kwargs: Additional position arguments.
         :return: Render template with context:
-            - If search query in request: results (list[dict[list[str]]]):
-            - res_user (list[str]): Return titles whose containing user's username
-            - res_threads (list[str]): Return titles whose containing thread's title
-            - res_communities (list[str]): Return titles whose containing community's name
+            - If search query in request: results (list[dict]): Best ranked matches, limited to SEARCH_LIMIT
+                - title (str): Username | Thread title | Community name | Publication title
+                - link (str): URL path to object
             - For else cases: Only render template
         """
         search_query = request.GET.get("search", "")
         if search_query:
-            users = CustomUser.objects.filter(username__icontains=search_query).all()
-            threads = Thread.objects.filter(title__icontains=search_query).all()
-            communities = Community.objects.filter(name__icontains=search_query).all()
-
-            res_user = [{"title": user.username, "link": f"/user-page/{user.username}/"} for user in users]
-            res_threads = [{"title": thread.title, "link": f"/thread-detail/{thread.id}"} for thread in threads]
-            res_communities = [
-                {"title": community.name, "link": f"/community/name-{community.name}/"} for community in communities
-            ]
-
-            results = res_user + res_threads + res_communities
+            results = search(search_query)
             return render(request, "main_page/search_list.html", {"results": results})
         return render(request, "main_page/search_bar.html")
 
@@ -139,8 +136,8 @@ class SearchView(View):
 class AutocompleteSearchView(DetailView):
     def get(self, request, *args, **kwargs):
         """
-        The method receives a search request from GET-request parameters, searches user databases,
-        threads and communities databases, collects the results and returns them in JSON format.
+        The method receives a search request from GET-request parameters and returns top suggestions
+        for the typed prefix from the in-process autocomplete index in JSON format.
 
         :param request: GET request
         :param args: Additional arguments.
@@ -151,21 +148,7 @@ class AutocompleteSearchView(DetailView):
             - url (str): URL path to object
         """
         query = request.GET.get("term", "")
-        users = CustomUser.objects.filter(username__icontains=query)
-        threads = Thread.objects.filter(title__icontains=query)
-        communities = Community.objects.filter(name__icontains=query)
-
-        # Collecting data for autocomplete suggestions
-        suggestions = []
-
-        for user in users:
-            suggestions.append({"label": user.username, "url": f"/user-page/{user.username}/"})
-
-        for thread in threads:
-            suggestions.append({"label": thread.title, "url": f"/thread-detail/{thread.id}"})
-
-        for community in communities:
-            suggestions.append({"label": community.name, "url": f"/community/name-{community.name}/"})
+        suggestions = suggest(query)
 
         return JsonResponse(suggestions, safe=False)
 
@@ -175,7 +158,9 @@ class TutorialPageView(View):
 
     def get(self, request, slug: str, page_id: int, *args, **kwargs):
         """
-        Displays the content of the tutorial page depending on the specified slug and page id
+        Displays the content of the tutorial page depending on the specified slug and page id.
+        Rendered pages are cached under the current tutorial content version, so a cached page is served
+        without database queries until the next tutorial import or change.
 
         :param request: GET request
         :param slug: Taken from URL
@@ -183,20 +168,30 @@ class TutorialPageView(View):
         :param args: Additional arguments.
         :param kwargs: Additional position arguments.
 
-        :return: Render template with dictionary context:
-            - language (instance)
-            - page (dict): Return page content
-            - subsections (dict): Return subsection content
+        :return: Rendered template with dictionary context:
+            - language (dict): Cached navigation index of the language, see tutorials.build_navigation
+            - page (dict): Navigation entry of the page with its title, anchors and previous and next pages
+            - subsections (list[SubSection]): Page subsections, each with an 'anchor' id if it has a title
         """
-        language = get_object_or_404(ProgrammingLanguage, slug=slug)
-        page = get_object_or_404(TutorialPage, language=language, id=page_id)
-        subsections = SubSection.objects.filter(page=page)
-        context = {
-            "language": language,
-            "page": page,
-            "subsections": subsections,
-        }
-        return render(request, self.template_name, context)
+
+        def render_page():
+            language = get_navigation(slug)
+            page = language and get_page_navigation(language, page_id)
+            if page is None:
+                raise Http404("Tutorial page not found")
+            subsections = list(SubSection.objects.filter(page_id=page_id).order_by("order", "id"))
+            anchors = iter(subsection_anchors([subsection.title for subsection in subsections]))
+            for subsection in subsections:
+                subsection.anchor = next(anchors)["id"] if subsection.title else None
+            context = {
+                "language": language,
+                "page": page,
+                "subsections": subsections,
+            }
+            # Rendered without the request, the cached page is shared by all users
+            return render_to_string(self.template_name, context)
+
+        return HttpResponse(cached_query(tutorial_cache, f"page:{slug}:{page_id}", render_page))
 
 
 # ------------------------ THREADS VIEWS ------------------------
@@ -212,9 +207,9 @@ class ThreadsPageView(View):
         """
         search_query = request.GET.get("search", "")
         if search_query:
-            threads = Thread.objects.filter(title__contains=search_query).order_by("id")
+            threads = Thread.objects.filter(title__contains=search_query).select_related("author").order_by("id")
         else:
-            threads = Thread.objects.order_by("-id")
+            threads = Thread.objects.select_related("author").order_by("-id")
         context = {"threads": threads, "search_query": search_query}
         return context
 
@@ -279,20 +274,18 @@ class RemoveCommentThread(RemoveCommentsMixin, View):
 
 
 # ------------------------ RECOMMENDATION FEED ------------------------
-class RecommendationFeedView(View):
+class RecommendationFeedView(LoginRequiredMixin, View):
     template_name = "recommendations/index.html"
 
     def get_context_data(self, request, **kwargs):
+        """
+        :return: Dictionary context:
+            - content_from_follow (list[Publication]): Publications of followed users and communities,
+            read from the precomputed user timeline
+        """
         context = {}
-        # DATA FROM USER FRIENDS
-        user = CustomUser.objects.get(username=request.user.username)
-        following_user_list_id = Followers.objects.filter(following=user, is_follow=True).values_list(
-            "user_id", flat=True
-        )
-        content_from_follow = Publication.objects.filter(author_id__in=following_user_list_id).order_by("-published_at")
-
-        # DATA FROM SUBSCRIBED COMMUNITIES
-        # ...
+        # DATA FROM USER FRIENDS AND SUBSCRIBED COMMUNITIES
+        content_from_follow = get_timeline(request.user)
 
         # DATA FROM BASE COMMUNITIES
         # ...
@@ -0,0 +1,110 @@
+"""
+Load test of the configured channel layer against a running Redis.
+
+Creates groups of channels, sends group messages from several concurrent senders and measures
+how many group sends and deliveries per second the layer sustains, the delivery latency and how many
+deliveries were lost (e.g. dropped because a channel reached its capacity or a message expired).
+
+Usage:
+    python -m benchmarks.channel_layer_load --groups 100 --members 10 --messages 5000
+    python -m benchmarks.channel_layer_load --hosts redis://localhost:6379 redis://localhost:6380
+    CHANNEL_BROADCAST_PUBSUB=true python -m benchmarks.channel_layer_load --layer broadcast
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from channels.layers import get_channel_layer  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+
+async def receive_all(layer, channel: str, expected: int, latencies: list) -> None:
+    for _ in range(expected):
+        message = await layer.receive(channel)
+        latencies.append(time.perf_counter() - message["sent_at"])
+
+
+async def send_all(layer, groups: list[str], messages: range) -> None:
+    for i in messages:
+        await layer.group_send(groups[i % len(groups)], {"type": "benchmark", "sent_at": time.perf_counter()})
+
+
+async def run(alias: str, groups: int, members: int, messages: int, senders: int, timeout: float) -> dict:
+    layer = get_channel_layer(alias)
+    group_names = [f"benchmark_{i}" for i in range(groups)]
+    latencies = []
+    receivers = []
+    subscriptions = []
+    for group_index, group_name in enumerate(group_names):
+        # Messages are spread over groups round-robin
+        expected = len(range(group_index, messages, groups))
+        for _ in range(members):
+            channel = await layer.new_channel()
+            await layer.group_add(group_name, channel)
+            subscriptions.append((group_name, channel))
+            receivers.append(asyncio.create_task(receive_all(layer, channel, expected, latencies)))
+    # Subscriptions of the pub/sub layer are made by the first receive
+    await asyncio.sleep(0.5)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send_all(layer, group_names, range(i, messages, senders)) for i in range(senders)))
+    sent = time.perf_counter() - started
+    # Receivers that miss messages (dropped when a channel is full or expired) wait until the timeout
+    done, pending = await asyncio.wait(receivers, timeout=timeout)
+    delivered = time.perf_counter() - started
+    for receiver in pending:
+        receiver.cancel()
+
+    for group_name, channel in subscriptions:
+        await layer.group_discard(group_name, channel)
+    if hasattr(layer, "flush"):
+        await layer.flush()
+
+    latencies.sort()
+    expected = messages * members
+    return {
+        "group_sends_per_second": messages / sent,
+        "deliveries_per_second": len(latencies) / delivered,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0,
+        "lost": expected - len(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layer", default="default", help="Channel layer alias from CHANNEL_LAYERS")
+    parser.add_argument("--hosts", nargs="+", help="Redis URLs overriding CHANNEL_REDIS_HOSTS")
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--members", type=int, default=10, help="Channels in every group")
+    parser.add_argument("--messages", type=int, default=5000, help="Group messages to send")
+    parser.add_argument("--senders", type=int, default=10, help="Concurrent senders")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for all deliveries")
+    args = parser.parse_args()
+
+    if args.hosts:
+        socket_timeout = settings.CHANNEL_REDIS_HOSTS[0]["socket_timeout"]
+        settings.CHANNEL_LAYERS[args.layer]["CONFIG"]["hosts"] = [
+            {"address": address, "socket_timeout": socket_timeout} for address in args.hosts
+        ]
+
+    config = settings.CHANNEL_LAYERS[args.layer]
+    print(f"{config['BACKEND']} {config['CONFIG']}")
+    result = asyncio.run(run(args.layer, args.groups, args.members, args.messages, args.senders, args.timeout))
+    print(
+        f"{'group sends/sec':>16} {'deliveries/sec':>15} {'p50 ms':>8} {'p99 ms':>8} {'lost':>6}\n"
+        f"{result['group_sends_per_second']:>16.1f} {result['deliveries_per_second']:>15.1f} "
+        f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['lost']:>6}"
+    )
+
+
+if __name__ == "__main__":
+    main()
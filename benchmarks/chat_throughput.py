@@ -0,0 +1,87 @@
+"""
+Measures how many chat messages per second one ChatConsumer worker can persist and broadcast.
+
+Two temporary users and a chat between them are created in the configured database.
+The sender pushes messages one after another, and every message is counted once its broadcast
+comes back to the sender's socket. All benchmark data is deleted afterwards.
+
+Usage:
+    python -m benchmarks.chat_throughput --messages 1000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from channels.db import database_sync_to_async  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from app.routing import websocket_urlpatterns  # noqa: E402
+from users.models import Chat, CustomUser  # noqa: E402
+
+
+@database_sync_to_async
+def create_chat() -> Chat:
+    suffix = uuid.uuid4().hex[:8]
+    sender = CustomUser.objects.create_user(username=f"bench_sender_{suffix}", email=f"sender_{suffix}@bench.local")
+    recipient = CustomUser.objects.create_user(
+        username=f"bench_recipient_{suffix}", email=f"recipient_{suffix}@bench.local"
+    )
+    return Chat.objects.create(sender=sender, recipient=recipient)
+
+
+@database_sync_to_async
+def delete_chat(chat: Chat) -> None:
+    CustomUser.objects.filter(id__in=(chat.sender_id, chat.recipient_id)).delete()
+
+
+async def run(messages: int) -> dict:
+    chat = await create_chat()
+    communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/message/{chat.id}/")
+    communicator.scope["user"] = chat.sender
+    await communicator.connect()
+
+    try:
+        started = time.perf_counter()
+        for i in range(messages):
+            await communicator.send_json_to({"context": f"Message {i}"})
+            await communicator.receive_json_from(timeout=10)
+        elapsed = time.perf_counter() - started
+    finally:
+        await communicator.disconnect()
+        await delete_chat(chat)
+
+    return {
+        "messages": messages,
+        "messages_per_second": messages / elapsed,
+        "ms_per_message": elapsed / messages * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument(
+        "--redis", action="store_true", help="Use the configured channel layer instead of the in-memory one"
+    )
+    args = parser.parse_args()
+
+    if not args.redis:
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+    result = asyncio.run(run(args.messages))
+    print(f"{'messages':>10} {'messages/sec':>14} {'ms/message':>12}")
+    print(f"{result['messages']:>10} {result['messages_per_second']:>14.1f} {result['ms_per_message']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Requests every route of app, users and community against a seeded dataset and checks SQL query budgets.
+
+The dataset is created inside a transaction that is rolled back at the end, so the configured database
+is left as it was. Every route is requested --repeat times, the report shows the response status,
+the median and the slowest latency and the number of SQL queries (taken from the X-Query-Count header),
+followed by hits, misses and backend latency of every cache namespace.
+The command exits with status 1 if a route makes more queries than its budget in
+benchmarks/query_budgets.py or a route of the URL modules has no budget.
+
+Usage:
+    python -m benchmarks.http_views --scale 1 --repeat 5
+    python -m benchmarks.http_views --scale 10 --only community admin_panel users_management
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from benchmarks.query_budgets import QUERY_BUDGETS, SKIPPED_ROUTES, route_names, seed, view_requests  # noqa: E402
+from core.cache import cache_metrics, reset_cache_metrics  # noqa: E402
+from core.middleware import QueryCountMiddleware  # noqa: E402
+
+
+class Rollback(Exception):
+    pass
+
+
+def measure(path: str, client: Client, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(path)
+        timings.append(time.perf_counter() - started)
+    return {
+        "status": response.status_code,
+        "queries": int(response[QueryCountMiddleware.header_name]),
+        "median_ms": statistics.median(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+
+
+def run(scale: float, repeat: int, only: list[str] | None) -> list[dict]:
+    results = []
+    try:
+        with transaction.atomic():
+            started = time.perf_counter()
+            data = seed(scale)
+            # Autovacuum does not see uncommitted rows, without statistics the planner picks plans for empty tables
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            print(f"Dataset seeded in {time.perf_counter() - started:.1f}s")
+
+            anonymous = Client()
+            authenticated = Client()
+            authenticated.force_login(data["viewer"])
+            for name, path, user in view_requests(data):
+                if only and name not in only:
+                    continue
+                result = measure(path, authenticated if user else anonymous, repeat)
+                results.append({"name": name, "path": path, "budget": QUERY_BUDGETS[name], **result})
+            raise Rollback
+    except Rollback:
+        pass
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the dataset size")
+    parser.add_argument("--repeat", type=int, default=5, help="Requests of every route")
+    parser.add_argument("--only", nargs="+", help="Route names to request, all routes by default")
+    args = parser.parse_args()
+
+    # Allows the test client on hosts that are not in ALLOWED_HOSTS
+    setup_test_environment()
+
+    missing = [name for name in route_names() if name not in QUERY_BUDGETS and name not in SKIPPED_ROUTES]
+    reset_cache_metrics()
+    results = run(args.scale, args.repeat, args.only)
+
+    print(f"{'route':>38} {'status':>6} {'median ms':>10} {'max ms':>8} {'queries':>8} {'budget':>7}")
+    for result in results:
+        marker = " !" if result["queries"] > result["budget"] else ""
+        print(
+            f"{result['name']:>38} {result['status']:>6} {result['median_ms']:>10.1f} {result['max_ms']:>8.1f} "
+            f"{result['queries']:>8} {result['budget']:>7}{marker}"
+        )
+
+    print(
+        f"\n{'cache namespace':>38} {'hits':>6} {'misses':>6} {'hit rate':>8} {'get ms':>7} {'set ms':>7} {'errors':>6}"
+    )
+    for name, metrics in cache_metrics().items():
+        print(
+            f"{name:>38} {metrics['hits']:>6} {metrics['misses']:>6} {metrics['hit_rate']:>8.0%} "
+            f"{metrics['get_ms']:>7.2f} {metrics['set_ms']:>7.2f} {metrics['errors']:>6}"
+        )
+
+    over_budget = [result["name"] for result in results if result["queries"] > result["budget"]]
+    if over_budget:
+        print(f"Over the query budget: {', '.join(over_budget)}")
+    if missing:
+        print(f"Routes without a query budget: {', '.join(missing)}")
+    if over_budget or missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measures how notification fan-out scales with the number of connected sockets.
+
+Every connected socket belongs to its own user. One notification is sent to a single user
+and the benchmark counts how many sockets received it and how long the delivery took.
+With per-user notification groups deliveries stay at 1 and the time stays flat while connections grow.
+Use --redis for timings: the in-memory layer scans every channel for expired messages on each send,
+so its times grow with connections regardless of fan-out.
+
+Usage:
+    python -m benchmarks.notification_fanout --connections 10 100 1000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from channels.layers import get_channel_layer  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from app.consumers import notification_group  # noqa: E402
+from app.routing import websocket_urlpatterns  # noqa: E402
+from users.models import CustomUser  # noqa: E402
+
+
+async def run(connections: int, notifications: int) -> dict:
+    application = URLRouter(websocket_urlpatterns)
+    communicators = []
+    for user_id in range(1, connections + 1):
+        communicator = WebsocketCommunicator(application, "/ws/notify/")
+        # Unsaved users are enough, the consumer only needs an authenticated user with an id
+        communicator.scope["user"] = CustomUser(id=user_id, username=f"user{user_id}")
+        await communicator.connect()
+        communicators.append(communicator)
+
+    channel_layer = get_channel_layer()
+    deliveries = 0
+    started = time.perf_counter()
+    for i in range(notifications):
+        recipient_id = i % connections + 1
+        await channel_layer.group_send(
+            notification_group(recipient_id), {"type": "send_notification", "message": "Benchmark", "id": i}
+        )
+        await communicators[recipient_id - 1].receive_from()
+        deliveries += 1
+    elapsed = time.perf_counter() - started
+
+    # Anything received by other sockets would be a leaked broadcast
+    for communicator in communicators:
+        while not await communicator.receive_nothing(timeout=0):
+            await communicator.receive_from()
+            deliveries += 1
+        await communicator.disconnect()
+
+    return {
+        "connections": connections,
+        "deliveries_per_notification": deliveries / notifications,
+        "ms_per_notification": elapsed / notifications * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--notifications", type=int, default=200)
+    parser.add_argument(
+        "--redis", action="store_true", help="Use the configured channel layer instead of the in-memory one"
+    )
+    args = parser.parse_args()
+
+    if not args.redis:
+        settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+    print(f"{'connections':>12} {'deliveries/notification':>24} {'ms/notification':>16}")
+    for connections in args.connections:
+        result = asyncio.run(run(connections, args.notifications))
+        print(
+            f"{result['connections']:>12} {result['deliveries_per_notification']:>24.2f} "
+            f"{result['ms_per_notification']:>16.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
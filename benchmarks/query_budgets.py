@@ -0,0 +1,312 @@
+"""
+Dataset, requests and SQL query budgets of the HTTP view benchmark.
+
+Every named route of app.urls, users.urls and community.urls either has a budget in QUERY_BUDGETS
+or is listed in SKIPPED_ROUTES with the reason. A budget is the highest number of queries one request
+of the route may make, it does not depend on the size of the dataset, so a view whose query count grows
+with the number of rendered rows (N+1) exceeds it on a larger dataset.
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from app import urls as app_urls
+from app.models import Comments, Notification, ProgrammingLanguage, SubSection, Thread, TimelineEntry, TutorialPage
+from community import urls as community_urls
+from community import followers as community_followers
+from community.models import BlackList, Community, CommunityFollowers, CommunityFollowRequests
+from core.cache import invalidate_all
+from core.counters import count_expressions
+from users import urls as users_urls
+from users import followers as user_followers
+from users.models import Chat, ChatReadState, CustomUser, Followers, Message, Moderators, Publication
+
+URL_MODULES = (app_urls, users_urls, community_urls)
+
+QUERY_BUDGETS = {
+    # app
+    "index": 8,
+    "feed": 8,
+    "threads": 4,
+    "new_thread": 4,
+    "detail": 8,
+    "tutorials": 6,
+    "recommendations": 5,
+    "search": 6,
+    "autocomplete": 4,
+    # users
+    "make-friends": 4,
+    "user_page": 5,
+    "user_followers": 4,
+    "user_followings": 4,
+    "socialaccount_connections": 12,
+    "user-chats": 6,
+    "chat_history": 6,
+    "conversation": 14,
+    "conversation_settings": 6,
+    "new_publication": 4,
+    "user_publication": 10,
+    "account_signup": 4,
+    "account_login": 4,
+    "logout": 4,
+    "account_reset_password": 4,
+    "account_reset_password_from_key_done": 4,
+    "account_reset_password_done": 4,
+    "account_change_password": 6,
+    "account_set_password": 6,
+    "mfa_reauthenticate": 6,
+    "account_reauthenticate": 6,
+    # community
+    "create_community": 4,
+    "community": 9,
+    "community_list": 4,
+    "community_followers": 6,
+    "community_followers_requests": 6,
+    "admin_panel": 8,
+    "users_management": 6,
+}
+
+SKIPPED_ROUTES = {
+    "remove_answer": "POST only",
+    "remove_comment_p": "POST only",
+    "chat_upload": "POST only",
+    "disconnect_account": "POST only",
+    "account_reset_password_from_key": "needs a signed password reset key",
+    "account_confirm_email": "needs a signed confirmation key",
+    "socialaccount_signup": "needs a pending social login in the session",
+}
+
+
+def route_names() -> list[str]:
+    """
+    :return: Names of the routes defined by the project URL modules, routes included from third-party apps
+        are left out
+    """
+    return [
+        pattern.name
+        for module in URL_MODULES
+        for pattern in module.urlpatterns
+        if isinstance(pattern, URLPattern) and pattern.name
+    ]
+
+
+def seed(scale: float = 1.0, seed_value: int = 0) -> dict:
+    """
+    Fills the database with a realistic dataset for the view benchmark.
+    With scale 1 it makes 2000 users, 10000 follows, 1000 threads and publications, 5000 comments,
+    100 communities with followers, follow requests and bans, and 50 chats of the benchmark user.
+
+    :param scale: Multiplier of all row counts
+    :param seed_value: Seed of the random generator, the same seed gives the same dataset
+    :return: Dictionary of objects used to build the benchmarked requests:
+        - viewer (CustomUser): User the authenticated requests are made by, owner of the first community
+        - other (CustomUser): User whose profile and chat are viewed
+        - thread (Thread), publication (Publication), community (Community), chat (Chat)
+        - language (ProgrammingLanguage), page (TutorialPage)
+    """
+    rng = random.Random(seed_value)
+    count = max(int(1000 * scale), 10)
+    now = timezone.now()
+
+    viewer = CustomUser.objects.create_user(username="bench_viewer", email="viewer@bench.local", password="bench")
+    users = [viewer] + CustomUser.objects.bulk_create(
+        [CustomUser(username=f"bench_{i}", email=f"bench_{i}@bench.local") for i in range(count * 2)]
+    )
+    other = users[1]
+
+    Followers.objects.bulk_create(
+        [
+            Followers(user=user, following=following, is_follow=True)
+            for user in users
+            for following in rng.sample(users, 5)
+            if following != user
+        ]
+    )
+    CustomUser.objects.filter(id__in=[user.id for user in users]).update(
+        **count_expressions(user_followers.counted_rows())
+    )
+
+    user_type = ContentType.objects.get_for_model(CustomUser)
+    threads = Thread.objects.bulk_create(
+        [
+            Thread(author=rng.choice(users), title=f"Thread {i}", context=f"Thread text {i}", status="published")
+            for i in range(count)
+        ]
+    )
+    publications = Publication.objects.bulk_create(
+        [
+            Publication(
+                content_type=user_type,
+                author_id=rng.choice(users).id,
+                title=f"Publication {i}",
+                context=f"Publication text {i}",
+                status="published",
+            )
+            for i in range(count)
+        ]
+    )
+    publications.sort(key=lambda publication: publication.author_id != other.id)
+
+    thread_type = ContentType.objects.get_for_model(Thread)
+    publication_type = ContentType.objects.get_for_model(Publication)
+    commented = [(thread_type, thread.id) for thread in threads] + [
+        (publication_type, publication.id) for publication in publications
+    ]
+    Comments.objects.bulk_create(
+        [
+            Comments(user=rng.choice(users), context=f"Comment {i}", content_type=content_type, object_id=object_id)
+            for i in range(count * 5)
+            for content_type, object_id in [rng.choice(commented)]
+        ]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user=viewer, publication=publication, published_at=publication.published_at)
+            for publication in publications[:200]
+        ]
+    )
+
+    communities = Community.objects.bulk_create(
+        [
+            Community(name=f"bench_community_{i}", description=f"Community {i}", is_private=i % 2 == 1)
+            for i in range(max(count // 10, 1))
+        ]
+    )
+    owners = Moderators.objects.bulk_create(
+        [Moderators(user=viewer if i == 0 else rng.choice(users), is_owner=True) for i in range(len(communities))]
+    )
+    Community.admins.through.objects.bulk_create(
+        [
+            Community.admins.through(community_id=community.id, moderators_id=owner.id)
+            for community, owner in zip(communities, owners)
+        ]
+    )
+    Community.posts.through.objects.bulk_create(
+        [
+            Community.posts.through(community_id=community.id, publication_id=publication.id)
+            for community in communities
+            for publication in rng.sample(publications, 5)
+        ]
+    )
+    followers = CommunityFollowers.objects.bulk_create(
+        [
+            CommunityFollowers(community=community, user=user, is_follow=True)
+            for community in communities
+            for user in rng.sample(users[1:], 20)
+        ]
+    )
+    CommunityFollowRequests.objects.bulk_create(
+        [
+            CommunityFollowRequests(community=community, user=user, send_status=True)
+            for community in communities
+            for user in rng.sample(users[1:], 5)
+        ]
+    )
+    Community.objects.filter(id__in=[community.id for community in communities]).update(
+        **count_expressions(community_followers.counted_rows())
+    )
+    BlackList.objects.bulk_create(
+        [BlackList(user=follower, community=follower.community, reason="Spam") for follower in followers[::10]]
+    )
+
+    chats = Chat.objects.bulk_create([Chat(sender=viewer, recipient=user) for user in users[1:51]])
+    ChatReadState.objects.bulk_create(
+        [
+            ChatReadState(chat=chat, user_id=user_id, last_message_at=now - timedelta(minutes=i))
+            for i, chat in enumerate(chats)
+            for user_id in (chat.sender_id, chat.recipient_id)
+        ]
+    )
+    Message.objects.bulk_create(
+        [
+            Message(chat=chat, user_id=rng.choice((chat.sender_id, chat.recipient_id)), context=f"Message {i}")
+            for chat in chats
+            for i in range(100)
+        ]
+    )
+
+    notification_type = ContentType.objects.get_for_model(Notification)
+    Notification.objects.bulk_create(
+        [Notification(user=viewer, message=f"Notification {i}", content_type=notification_type) for i in range(20)]
+    )
+
+    language = ProgrammingLanguage.objects.create(name="Python", slug="mainpy")
+    pages = TutorialPage.objects.bulk_create(
+        [TutorialPage(language=language, title=f"Page {i}", order=i) for i in range(1, 21)]
+    )
+    SubSection.objects.bulk_create(
+        [
+            SubSection(page=page, title=f"Section {i}", content=f"Section text {i}", order=i)
+            for page in pages
+            for i in range(10)
+        ]
+    )
+    # Bulk inserts send no signals, cached rows of an earlier dataset must not be served
+    invalidate_all()
+
+    return {
+        "viewer": viewer,
+        "other": other,
+        "thread": threads[0],
+        "publication": publications[0],
+        "community": communities[0],
+        "chat": chats[0],
+        "language": language,
+        "page": pages[0],
+    }
+
+
+def view_requests(data: dict) -> list[tuple[str, str, CustomUser | None]]:
+    """
+    :param data: Dictionary returned by seed()
+    :return: List of route name, requested path and the user the request is made by (None for anonymous)
+    """
+    viewer = data["viewer"]
+    other = data["other"]
+    community = data["community"].name
+    return [
+        # app
+        ("index", reverse("index"), viewer),
+        ("feed", reverse("feed"), viewer),
+        ("threads", reverse("threads"), viewer),
+        ("new_thread", reverse("new_thread"), viewer),
+        ("detail", reverse("detail", kwargs={"pk": data["thread"].id}), viewer),
+        ("tutorials", reverse("tutorials", args=(data["language"].slug, data["page"].id)), None),
+        ("recommendations", reverse("recommendations"), viewer),
+        ("search", reverse("search") + "?search=bench", viewer),
+        ("autocomplete", reverse("autocomplete") + "?term=bench", viewer),
+        # users
+        ("make-friends", reverse("make-friends"), viewer),
+        ("user_page", reverse("user_page", args=(other.username,)), viewer),
+        ("user_followers", reverse("user_followers", args=(other.username,)), viewer),
+        ("user_followings", reverse("user_followings", args=(other.username,)), viewer),
+        ("socialaccount_connections", reverse("socialaccount_connections"), viewer),
+        ("user-chats", reverse("user-chats"), viewer),
+        ("chat_history", reverse("chat_history", args=(data["chat"].id,)), viewer),
+        ("conversation", reverse("conversation", args=(other.username,)), viewer),
+        ("conversation_settings", reverse("conversation_settings", args=(other.username,)), viewer),
+        ("new_publication", reverse("new_publication", args=(viewer.username,)), viewer),
+        ("user_publication", reverse("user_publication", kwargs={"pk": data["publication"].id}), viewer),
+        ("account_signup", reverse("account_signup"), None),
+        ("account_login", reverse("account_login"), None),
+        ("logout", reverse("logout"), viewer),
+        ("account_reset_password", reverse("account_reset_password"), None),
+        ("account_reset_password_from_key_done", reverse("account_reset_password_from_key_done"), None),
+        ("account_reset_password_done", reverse("account_reset_password_done"), None),
+        ("account_change_password", reverse("account_change_password"), viewer),
+        ("account_set_password", reverse("account_set_password"), viewer),
+        ("mfa_reauthenticate", reverse("mfa_reauthenticate"), viewer),
+        ("account_reauthenticate", reverse("account_reauthenticate"), viewer),
+        # community
+        ("create_community", reverse("create_community"), viewer),
+        ("community", reverse("community", args=(community,)), viewer),
+        ("community_list", reverse("community_list"), viewer),
+        ("community_followers", reverse("community_followers", args=(community,)), viewer),
+        ("community_followers_requests", reverse("community_followers_requests", args=(community,)), viewer),
+        ("admin_panel", reverse("admin_panel", args=(community,)), viewer),
+        ("users_management", reverse("users_management", args=(community,)), viewer),
+    ]
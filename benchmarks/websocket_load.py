@@ -0,0 +1,330 @@
+"""
+Load test of the notification, comment and chat consumers with many concurrent simulated clients.
+
+Every scenario opens --clients sockets through WebsocketCommunicator, sends messages at --rate per second
+for --duration seconds and measures, for every delivered frame, the time from sending to receiving.
+Reported are p50/p95/p99 delivery latency, sent and delivered messages per second and memory per connection.
+
+Scenarios:
+    notify    every client is a separate user, notifications are sent to random users through the channel layer
+    comments  clients watch --objects threads, a tenth of them post comments that reach all viewers of the thread
+    chat      clients are paired into chats, one participant of every chat sends messages to the other
+
+The in-memory channel layer is used by default, --redis uses the configured Redis layer when it is reachable.
+Chat and comment scenarios create temporary users, threads and chats in the configured database and delete them
+afterwards. Every run is appended to the --output JSON file together with the current commit,
+so results of different commits can be compared.
+
+Usage:
+    python -m benchmarks.websocket_load --scenario notify --clients 1000 --rate 500
+    python -m benchmarks.websocket_load --scenario comments chat --clients 200 --rate 50 --redis
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+import tracemalloc
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from channels.db import database_sync_to_async  # noqa: E402
+from channels.layers import channel_layers, get_channel_layer  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.contenttypes.models import ContentType  # noqa: E402
+
+from app.consumers import notification_group  # noqa: E402
+from app.models import Thread  # noqa: E402
+from app.routing import websocket_urlpatterns  # noqa: E402
+from users.models import Chat, CustomUser  # noqa: E402
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+    "broadcast": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+}
+
+
+class Scenario(ABC):
+    """
+    Describes which sockets are opened, how a message is sent and where its send time is found in a received frame
+    """
+
+    name = ""
+
+    def __init__(self, clients: int, objects: int):
+        self.clients = clients
+        self.objects = objects
+        self.prefix = f"load_{uuid.uuid4().hex[:8]}_"
+
+    @abstractmethod
+    async def setup(self) -> list[tuple[str, CustomUser]]:
+        """
+        :return: List of socket paths and the users that open them
+        """
+
+    @abstractmethod
+    async def send(self, communicators: list[WebsocketCommunicator], sent_at: float) -> None:
+        pass
+
+    @abstractmethod
+    def sent_at(self, frame: dict, user: CustomUser) -> float | None:
+        """
+        :return: perf_counter() value at which the received frame was sent, None if the frame is not measured
+        """
+
+    @database_sync_to_async
+    def create_users(self) -> list[CustomUser]:
+        return CustomUser.objects.bulk_create(
+            [
+                CustomUser(username=f"{self.prefix}{i}", email=f"{self.prefix}{i}@load.local")
+                for i in range(self.clients)
+            ]
+        )
+
+    @database_sync_to_async
+    def teardown(self) -> None:
+        CustomUser.objects.filter(username__startswith=self.prefix).delete()
+
+
+class NotifyScenario(Scenario):
+    name = "notify"
+
+    async def setup(self):
+        # Unsaved users are enough, the consumer only needs an authenticated user with an id
+        self.channel_layer = get_channel_layer()
+        return [("/ws/notify/", CustomUser(id=i, username=f"user{i}")) for i in range(1, self.clients + 1)]
+
+    async def send(self, communicators, sent_at):
+        recipient_id = random.randint(1, self.clients)
+        event = {"type": "send_notification", "message": str(sent_at), "id": recipient_id}
+        await self.channel_layer.group_send(notification_group(recipient_id), event)
+
+    def sent_at(self, frame, user):
+        return float(frame["message"])
+
+    async def teardown(self):
+        pass
+
+
+class CommentsScenario(Scenario):
+    name = "comments"
+
+    async def setup(self):
+        users = await self.create_users()
+        threads = await database_sync_to_async(Thread.objects.bulk_create)(
+            [Thread(author=users[0], title=f"Load {i}", context="Load") for i in range(self.objects)]
+        )
+        content_type = await database_sync_to_async(ContentType.objects.get_for_model)(Thread)
+        self.commenters = range(0, self.clients, 10)
+        return [
+            (f"/ws/comments/{content_type.id}/{threads[i % len(threads)].id}/", user) for i, user in enumerate(users)
+        ]
+
+    async def send(self, communicators, sent_at):
+        await communicators[random.choice(self.commenters)].send_json_to({"content": str(sent_at)})
+
+    def sent_at(self, frame, user):
+        return float(frame["comment"]["content"])
+
+
+class ChatScenario(Scenario):
+    name = "chat"
+
+    async def setup(self):
+        users = await self.create_users()
+        chats = await database_sync_to_async(Chat.objects.bulk_create)(
+            [Chat(sender=users[i], recipient=users[i + 1]) for i in range(0, len(users) - 1, 2)]
+        )
+        self.senders = range(0, len(chats) * 2, 2)
+        paths = []
+        for chat in chats:
+            paths.append((f"/ws/message/{chat.id}/", chat.sender))
+            paths.append((f"/ws/message/{chat.id}/", chat.recipient))
+        return paths
+
+    async def send(self, communicators, sent_at):
+        await communicators[random.choice(self.senders)].send_json_to({"context": str(sent_at)})
+
+    def sent_at(self, frame, user):
+        # Senders receive their own messages too, only deliveries to the other participant are measured
+        if frame["message"]["userId"] == user.id:
+            return None
+        return float(frame["message"]["context"])
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (NotifyScenario, CommentsScenario, ChatScenario)}
+
+
+async def receive_frames(communicator: WebsocketCommunicator, scenario: Scenario, latencies: list) -> None:
+    # Runs until cancelled, a receive timeout of the communicator would stop the consumer
+    while True:
+        frame = await communicator.receive_json_from(timeout=None)
+        sent_at = scenario.sent_at(frame, communicator.scope["user"])
+        if sent_at is not None:
+            latencies.append(time.perf_counter() - sent_at)
+
+
+def percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def run(scenario: Scenario, rate: float, duration: float, drain: float) -> dict:
+    paths = await scenario.setup()
+    application = URLRouter(websocket_urlpatterns)
+
+    tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    communicators = []
+    for path, user in paths:
+        communicator = WebsocketCommunicator(application, path)
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect(timeout=10)
+        if not connected:
+            raise RuntimeError(f"Connection to {path} was rejected")
+        communicators.append(communicator)
+    memory_per_connection = (tracemalloc.get_traced_memory()[0] - memory_before) / len(communicators)
+    tracemalloc.stop()
+
+    latencies = []
+    receivers = [
+        asyncio.create_task(receive_frames(communicator, scenario, latencies)) for communicator in communicators
+    ]
+
+    messages = int(rate * duration)
+    started = time.perf_counter()
+    for i in range(messages):
+        # Messages are sent on a fixed schedule, a slow consumer shows up as growing latency
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await scenario.send(communicators, time.perf_counter())
+    sent = time.perf_counter() - started
+
+    # Wait until deliveries stop coming
+    delivered_count = -1
+    while delivered_count != len(latencies):
+        delivered_count = len(latencies)
+        await asyncio.sleep(drain)
+    elapsed = time.perf_counter() - started - drain
+
+    for receiver in receivers:
+        receiver.cancel()
+    await asyncio.gather(*receivers, return_exceptions=True)
+    for communicator in communicators:
+        await communicator.disconnect()
+    await scenario.teardown()
+
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "clients": len(communicators),
+        "messages": messages,
+        "deliveries": len(latencies),
+        "sent_per_second": messages / sent,
+        "delivered_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "memory_per_connection_kb": memory_per_connection / 1024,
+    }
+
+
+def redis_available() -> bool:
+    async def ping():
+        layer = get_channel_layer()
+        channel = await layer.new_channel()
+        await layer.send(channel, {"type": "ping"})
+        await layer.receive(channel)
+
+    try:
+        asyncio.run(asyncio.wait_for(ping(), 5))
+    except Exception:
+        return False
+    finally:
+        # The layer is bound to the event loop of the check, the benchmark creates it again
+        channel_layers.backends.clear()
+    return True
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(path: str, record: dict) -> None:
+    runs = []
+    if os.path.exists(path):
+        with open(path) as file:
+            runs = json.load(file)
+    runs.append(record)
+    with open(path, "w") as file:
+        json.dump(runs, file, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=1000, help="Concurrent sockets")
+    parser.add_argument("--rate", type=float, default=200, help="Messages sent per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of sending")
+    parser.add_argument("--objects", type=int, default=50, help="Threads watched in the comments scenario")
+    parser.add_argument("--drain", type=float, default=1.0, help="Seconds without deliveries that end a run")
+    parser.add_argument("--redis", action="store_true", help="Use the configured Redis channel layer if reachable")
+    parser.add_argument("--output", default="websocket_load.json", help="JSON file the results are appended to")
+    args = parser.parse_args()
+
+    layer = "redis" if args.redis and redis_available() else "memory"
+    if args.redis and layer == "memory":
+        print("Redis is not reachable, the in-memory channel layer is used")
+    if layer == "memory":
+        settings.CHANNEL_LAYERS = IN_MEMORY_CHANNEL_LAYERS
+
+    results = []
+    print(
+        f"{'scenario':>10} {'clients':>8} {'sent/s':>9} {'delivered/s':>12} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'KB/conn':>8}"
+    )
+    for name in args.scenario:
+        scenario = SCENARIOS[name](args.clients, args.objects)
+        result = asyncio.run(run(scenario, args.rate, args.duration, args.drain))
+        results.append(result)
+        print(
+            f"{result['scenario']:>10} {result['clients']:>8} {result['sent_per_second']:>9.1f} "
+            f"{result['delivered_per_second']:>12.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+            f"{result['p99_ms']:>8.2f} {result['memory_per_connection_kb']:>8.1f}"
+        )
+
+    save(
+        args.output,
+        {
+            "commit": current_commit(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "layer": layer,
+            "parameters": {
+                "clients": args.clients,
+                "rate": args.rate,
+                "duration": args.duration,
+                "objects": args.objects,
+            },
+            "results": results,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from django.shortcuts import get_object_or_404
+
+from users.models import Moderators
+from .models import Community
+
+
+class CommunityAccess:
+    """
+    Community of a request with its managers and the roles of the requesting user in it.
+    Roles are taken from the managers of this community only, managing another community grants nothing here.
+
+    :param community: Community instance
+    :param managers: Moderators of the community with their users loaded
+    :param user: Requesting user, may be anonymous
+    """
+
+    def __init__(self, community: Community, managers: list[Moderators], user):
+        self.community = community
+        self.managers = managers
+        self.owner = next((manager for manager in managers if manager.is_owner), None)
+        self.admins = [manager for manager in managers if manager.is_admin]
+        self.moderators = [manager for manager in managers if manager.is_moderator]
+
+        roles = [manager for manager in managers if user.is_authenticated and manager.user_id == user.id]
+        self.is_owner = any(role.is_owner for role in roles)
+        self.is_admin = any(role.is_admin for role in roles)
+        self.is_moderator = any(role.is_moderator for role in roles)
+
+    @property
+    def is_manager(self) -> bool:
+        return self.is_owner or self.is_admin or self.is_moderator
+
+
+def get_community_access(request, name: str) -> CommunityAccess:
+    """
+    Loads the community and its managers with two queries, the result is memoized on the request,
+    so the owner_required decorator, CommunityBaseContext and the views share one instance.
+
+    :param request: HTTP request of the requesting user
+    :param name: Community name
+    :return: Access context of the community
+    :raise Http404: If the community does not exist
+    """
+    memo = request.__dict__.setdefault("_community_access", {})
+    if name not in memo:
+        community = get_object_or_404(Community, name=name)
+        managers = list(community.admins.select_related("user").order_by("id"))
+        memo[name] = CommunityAccess(community, managers, request.user)
+    return memo[name]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CommunityConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "community"
+
+    def ready(self):
+        import community.signals
@@ -0,0 +1,4 @@
+from core.cache import CacheNamespace
+
+# Names of all communities shown by CommunityListView
+community_list_cache = CacheNamespace("community:list")
@@ -0,0 +1,186 @@
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+
+from core import counters
+from core.counters import CountedRows
+
+from app.constants import COMMUNITY_BANNED_PAGE_SIZE, COMMUNITY_FOLLOWERS_PAGE_SIZE
+from .models import BlackList, Community, CommunityFollowers, CommunityFollowRequests
+
+# ------------------------ COUNTERS ------------------------
+
+
+def counted_rows() -> CountedRows:
+    """
+    :return: Rows counted by every denormalized Community counter, keyed by the counter field
+    """
+    return {
+        "followers_count": (CommunityFollowers.objects.filter(is_follow=True), "community"),
+        "pending_requests_count": (
+            CommunityFollowRequests.objects.filter(accepted=False, send_status=True),
+            "community",
+        ),
+    }
+
+
+def change_counters(community_id: int, **deltas: int) -> None:
+    """
+    Moves Community counters by the given deltas with a single UPDATE, concurrent changes are not lost
+    """
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        Community.objects.filter(id=community_id).update(**changes)
+
+
+@transaction.atomic
+def remove_follow_requests(community_id: int, requests) -> int:
+    """
+    Deletes follow requests of the community and takes the pending ones off its pending counter.
+    Only rows this call really deleted are counted, so concurrent removals do not decrement twice.
+
+    :param community_id: Community of the requests
+    :param requests: Queryset of follow requests of the community
+    :return: Number of deleted requests
+    """
+    pending, _ = requests.filter(accepted=False, send_status=True).delete()
+    other, _ = requests.delete()
+    change_counters(community_id, pending_requests_count=-pending)
+    return pending + other
+
+
+@transaction.atomic
+def toggle_follow(user, community: Community) -> bool:
+    """
+    Follows the community or stops following it and updates its followers counter
+
+    :return: True if the user follows the community now
+    """
+    # A concurrent first follow hits unique_community_follower, get_or_create rolls back its savepoint
+    # and reads (and locks) the committed row instead
+    follower, created = CommunityFollowers.objects.select_for_update().get_or_create(user=user, community=community)
+    follower.is_follow = not follower.is_follow
+    follower.save(update_fields=["is_follow"])
+    change_counters(community.id, followers_count=1 if follower.is_follow else -1)
+    return follower.is_follow
+
+
+@transaction.atomic
+def mark_request_sent(follow_request: CommunityFollowRequests) -> bool:
+    """
+    Marks the follow request as sent, a request becomes pending only once
+
+    :return: True if the request was sent by this call, False if it had been sent before
+    """
+    sent = CommunityFollowRequests.objects.filter(id=follow_request.id, send_status=False).update(send_status=True)
+    follow_request.send_status = True
+    if sent and not follow_request.accepted:
+        change_counters(follow_request.community_id, pending_requests_count=1)
+    return bool(sent)
+
+
+@transaction.atomic
+def accept_follow_request(follow_request: CommunityFollowRequests) -> None:
+    """
+    Deletes the pending request and makes its user a follower of the community
+    """
+    remove_follow_requests(follow_request.community_id, CommunityFollowRequests.objects.filter(id=follow_request.id))
+    # Races with toggle_follow are resolved by unique_community_follower as there
+    follower, created = CommunityFollowers.objects.select_for_update().get_or_create(
+        user_id=follow_request.user_id, community_id=follow_request.community_id
+    )
+    if not follower.is_follow:
+        follower.is_follow = True
+        follower.save(update_fields=["is_follow"])
+        change_counters(follow_request.community_id, followers_count=1)
+
+
+def reconcile_counters(batch_size: int = 10000, dry_run: bool = False) -> dict[str, int]:
+    """
+    Recounts the denormalized counters of all communities and fixes those that drifted
+    (e.g. after followers were deleted together with their users)
+
+    :return: Number of drifted communities per counter field
+    """
+    return counters.reconcile_counters(Community, counted_rows(), batch_size, dry_run)
+
+
+# ------------------------ PAGES ------------------------
+
+
+def parse_page_cursor(value: str | None) -> int | None:
+    """
+    :param value: Cursor from the query string, the id of the last row of the previous page
+    :return: Row id, None for the first page
+    :raise ValueError: If the cursor is not a positive integer
+    """
+    if not value:
+        return None
+    cursor = int(value)
+    if cursor < 1:
+        raise ValueError("Invalid page cursor")
+    return cursor
+
+
+def get_followers_page(
+    community: Community, after: int | None = None, page_size: int = COMMUNITY_FOLLOWERS_PAGE_SIZE
+) -> tuple[list[CommunityFollowers], int | None]:
+    """
+    Reads one page of community followers that are not banned.
+    Banned followers are removed in the database by an anti-join with the black list,
+    the page is a range read over the (community, id) index of followers.
+
+    :param community: Community whose followers are listed
+    :param after: Id of the last follower of the previous page, None for the first page
+    :param page_size: Number of followers on the page
+    :return: Tuple of followers with their users and the cursor of the next page (None on the last page)
+    """
+    banned = BlackList.objects.filter(user=OuterRef("pk"))
+    queryset = (
+        CommunityFollowers.objects.filter(community=community, is_follow=True)
+        .exclude(Exists(banned))
+        .select_related("user")
+        .order_by("id")
+    )
+    if after:
+        queryset = queryset.filter(id__gt=after)
+
+    followers = list(queryset[: page_size + 1])
+    next_cursor = followers[page_size - 1].id if len(followers) > page_size else None
+    return followers[:page_size], next_cursor
+
+
+def get_banned_page(
+    community: Community, after: int | None = None, page_size: int = COMMUNITY_BANNED_PAGE_SIZE
+) -> tuple[list[dict], int | None]:
+    """
+    Reads one page of the community black list in order of banning
+
+    :param community: Community whose black list is read
+    :param after: Id of the last black list entry of the previous page, None for the first page
+    :param page_size: Number of entries on the page
+    :return: Tuple of banned followers and the cursor of the next page (None on the last page):
+        - id (int): Banned follower ID
+        - blacklist_id (int): Black list entry ID
+        - username (str): Username of the banned follower
+        - reason (str): Ban reason
+    """
+    queryset = (
+        BlackList.objects.filter(community=community)
+        .order_by("id")
+        .values("id", "user_id", "user__user__username", "reason")
+    )
+    if after:
+        queryset = queryset.filter(id__gt=after)
+
+    entries = list(queryset[: page_size + 1])
+    next_cursor = entries[page_size - 1]["id"] if len(entries) > page_size else None
+    banned_users = [
+        {
+            "id": entry["user_id"],
+            "blacklist_id": entry["id"],
+            "username": entry["user__user__username"],
+            "reason": entry["reason"],
+        }
+        for entry in entries[:page_size]
+    ]
+    return banned_users, next_cursor
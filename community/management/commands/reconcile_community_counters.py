@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from community.followers import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recounts followers and pending follow requests of every community and fixes the stored counters "
+        "that drifted from the rows. Follows made while a range is recounted may need another run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000, help="Community ids recounted at once")
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted communities")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        drifted = reconcile_counters(options["batch_size"], options["dry_run"])
+        verb = "Drifted" if options["dry_run"] else "Fixed"
+        for field, count in drifted.items():
+            self.stdout.write(f"{verb} {field}: {count} communities")
+        self.stdout.write(self.style.SUCCESS("Community counters reconciled"))
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    Community = apps.get_model("community", "Community")
+    Community.objects.update(
+        search_vector=SearchVector("name", weight="A", config="simple")
+        + SearchVector("description", weight="B", config="simple")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0006_alter_blacklist_user"),
+        ("users", "0018_timeline"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="community",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="community",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="community_search_idx"),
+        ),
+        TrigramExtension(),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS community_name_trgm_idx ON community_community "
+            "USING gin (UPPER(name) gin_trgm_ops);",
+            "DROP INDEX IF EXISTS community_name_trgm_idx;",
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
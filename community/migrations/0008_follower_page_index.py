@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0007_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="communityfollowers",
+            index=models.Index(
+                condition=models.Q(("is_follow", True)),
+                fields=["community", "id"],
+                name="community_follower_page_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:09
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(rows):
+    counts = rows.filter(community=OuterRef("pk")).order_by().values("community").annotate(n=Count("id")).values("n")
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Community = apps.get_model("community", "Community")
+    CommunityFollowers = apps.get_model("community", "CommunityFollowers")
+    CommunityFollowRequests = apps.get_model("community", "CommunityFollowRequests")
+    Community.objects.update(
+        followers_count=count_rows(CommunityFollowers.objects.filter(is_follow=True)),
+        pending_requests_count=count_rows(CommunityFollowRequests.objects.filter(accepted=False, send_status=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0008_follower_page_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="community",
+            name="followers_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="community",
+            name="pending_requests_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
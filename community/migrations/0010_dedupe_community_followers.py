@@ -0,0 +1,51 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:10
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(rows):
+    counts = rows.filter(community=OuterRef("pk")).order_by().values("community").annotate(n=Count("id")).values("n")
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def dedupe_followers(apps, schema_editor):
+    """
+    Keeps one CommunityFollowers row per user and community, the following one or else the oldest,
+    and moves bans of the removed duplicates to it, then recounts the counters that 0009 counted with the duplicates
+    """
+    Community = apps.get_model("community", "Community")
+    CommunityFollowers = apps.get_model("community", "CommunityFollowers")
+    CommunityFollowRequests = apps.get_model("community", "CommunityFollowRequests")
+    BlackList = apps.get_model("community", "BlackList")
+    duplicates = (
+        CommunityFollowers.objects.values("community_id", "user_id")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("community_id", "user_id")
+    )
+    for community_id, user_id in duplicates:
+        kept, *removed = (
+            CommunityFollowers.objects.filter(community_id=community_id, user_id=user_id)
+            .order_by("-is_follow", "id")
+            .values_list("id", flat=True)
+        )
+        BlackList.objects.filter(user_id__in=removed).update(user_id=kept)
+        CommunityFollowers.objects.filter(id__in=removed).delete()
+
+    Community.objects.update(
+        followers_count=count_rows(CommunityFollowers.objects.filter(is_follow=True)),
+        pending_requests_count=count_rows(CommunityFollowRequests.objects.filter(accepted=False, send_status=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0009_community_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_followers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0010_dedupe_community_followers"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="communityfollowers",
+            constraint=models.UniqueConstraint(fields=("community", "user"), name="unique_community_follower"),
+        ),
+    ]
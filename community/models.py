@@ -1,14 +1,26 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+from core.counters import CounterFieldsMixin
 from users.models import CustomUser
 
 
-class Community(models.Model):
+class Community(CounterFieldsMixin, models.Model):
+    counter_fields = ("followers_count", "pending_requests_count")
+
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(max_length=500)
     admins = models.ManyToManyField("users.Moderators", related_name="admins")
     posts = models.ManyToManyField("users.Publication", related_name="posts")
     is_private = models.BooleanField(default=False)
+    # Maintained by community.followers with F() updates, drift is fixed by 'reconcile_community_counters'
+    followers_count = models.IntegerField(default=0)
+    pending_requests_count = models.IntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [GinIndex(fields=["search_vector"], name="community_search_idx")]
 
     def __str__(self):
         return self.name
@@ -19,6 +31,16 @@ class CommunityFollowers(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="community_followers")
     is_follow = models.BooleanField(default=False)
 
+    class Meta:
+        # Pages of followers of one community in id order
+        indexes = [
+            models.Index(
+                fields=["community", "id"], condition=models.Q(is_follow=True), name="community_follower_page_idx"
+            )
+        ]
+        # One row per user and community, toggling updates it instead of racing to insert a second one
+        constraints = [models.UniqueConstraint(fields=("community", "user"), name="unique_community_follower")]
+
     def __str__(self):
         return f"{self.community.name} - {self.user}"
 
@@ -0,0 +1,4 @@
+from .caches import community_list_cache
+from .models import Community
+
+community_list_cache.invalidate_on(Community, fields=("name",))
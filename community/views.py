@@ -13,8 +13,13 @@ from django.views import View
 from django.views.generic import ListView
 
 from app.models import Notification
+from app.timeline import fan_out_community_publication, follow_community, unfollow_community
+from community.access import get_community_access
+from community.caches import community_list_cache
+from community.followers import accept_follow_request, mark_request_sent, remove_follow_requests, toggle_follow
 from community.forms import CreateCommunityForm
 from community.models import Community, CommunityFollowers, CommunityFollowRequests, BlackList
+from core.cache import cached_query
 from core.decorators import owner_required
 from core.helpers import base_post_method
 from core.mixins import ViewWitsContext, CommunityBaseContext
@@ -46,6 +51,10 @@ class CommunityListView(ListView):
     model = Community
     template_name = "community/community_list.html"
 
+    def get_queryset(self):
+        # Only names are listed, the cached rows are served until a community is created, renamed or deleted
+        return cached_query(community_list_cache, "all", Community.objects.order_by("id").values("name"))
+
 
 class CommunityView(CommunityBaseContext):
     """
@@ -67,8 +76,8 @@ class CommunityView(CommunityBaseContext):
         context = super().get_context_data(request, **kwargs)
 
         # PUBLICATION DATA
-        community_data = context["community_data"]
-        author_id = community_data.admins.get(is_owner=True).user.id
+        owner = context["owner"]
+        author_id = owner.user_id if owner else None
         publication_form = PublishForm(initial={"author_id": author_id})
 
         # FOLLOWERS DATA
@@ -142,8 +151,7 @@ class CommunityView(CommunityBaseContext):
             return self.handle_follow_action(context)
         elif action == "send_request" or action == "remove_request":
             request_obj = CommunityFollowRequests.objects.filter(community=community_data, user=user, send_status=True)
-            if request_obj.exists():
-                request_obj.delete()
+            if remove_follow_requests(community_data.id, request_obj):
                 return JsonResponse({"success": True})
             else:
                 return self.handle_send_request_action(context)
@@ -157,6 +165,7 @@ class CommunityView(CommunityBaseContext):
                 publication.save()
                 form.save()
                 community_data.posts.add(publication)
+                fan_out_community_publication(publication, community_data)
 
                 return redirect(f"/community/name-{context.get('community_name')}/")
 
@@ -177,14 +186,16 @@ class CommunityView(CommunityBaseContext):
             - is_following (bool): True if user is subscribed, otherwise False
         """
         community = context.get("community_data")
-        follower_obj, created = CommunityFollowers.objects.get_or_create(user=self.request.user, community=community)
-        follower_obj.is_follow = not follower_obj.is_follow
-        follower_obj.save()
-        followers_count = CommunityFollowers.objects.filter(community=community, is_follow=True).count()
+        is_following = toggle_follow(self.request.user, community)
+        if is_following:
+            follow_community(self.request.user.id, community)
+        else:
+            unfollow_community(self.request.user.id, community)
+        community.refresh_from_db(fields=["followers_count"])
         return JsonResponse(
             {
-                "followers_count": followers_count,
-                "is_following": follower_obj.is_follow,
+                "followers_count": community.followers_count,
+                "is_following": is_following,
             }
         )
 
@@ -202,22 +213,19 @@ class CommunityView(CommunityBaseContext):
             user=self.request.user, community=community
         )
 
-        if not request_obj.send_status:
+        if mark_request_sent(request_obj):
             follow_request_link = reverse("community_followers_requests", kwargs={"name": community.name})
             message = mark_safe(
                 f"There is your new follow request: {request_obj.user.username}\n"
                 f'Check your follow request list: <a href="{follow_request_link}">Request List</a>.'
             )
             Notification.objects.create(
-                user=community.admins.get(is_owner=True).user,
+                user=context["owner"].user,
                 message=message,
                 content_type=ContentType.objects.get_for_model(Community),
                 object_id=community.id,
             )
 
-            request_obj.send_status = True
-        request_obj.save()
-
         return JsonResponse(
             {
                 "request_status": request_obj.send_status,
@@ -230,8 +238,8 @@ class CommunityFollowersListView(ListView):
     template_name = "community/community_detail/community_followers/community_followers.html"
 
     def get_queryset(self):
-        community = get_object_or_404(Community, name=self.kwargs["name"])
-        followers = CommunityFollowers.objects.filter(community=community, is_follow=True).all()
+        community = get_community_access(self.request, self.kwargs["name"]).community
+        followers = CommunityFollowers.objects.filter(community=community, is_follow=True).select_related("user")
         return followers
 
 
@@ -243,8 +251,10 @@ class FollowersRequestListView(View):
         :param kwargs: Community name taken from URL
         :return: Dictionary with list users whose subscription requests were not accepted
         """
-        community = get_object_or_404(Community, name=self.kwargs["name"])
-        followers = CommunityFollowRequests.objects.filter(community=community, accepted=False, send_status=True).all()
+        community = get_community_access(self.request, self.kwargs["name"]).community
+        followers = CommunityFollowRequests.objects.filter(
+            community=community, accepted=False, send_status=True
+        ).select_related("user")
         return {"communityfollowers_list": followers}
 
     def get(self, request, *args, **kwargs):
@@ -267,20 +277,16 @@ class FollowersRequestListView(View):
         """
 
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
-            community = get_object_or_404(Community, name=self.kwargs["name"])
+            community = get_community_access(request, self.kwargs["name"]).community
             user_id = request.POST.get("user")
             accept_obj = CommunityFollowRequests.objects.get(
                 community=community, user=user_id, accepted=False, send_status=True
             )
             if request.POST.get("action") == "accept":
-                accept_obj.delete()
-                follow_r_obj, created = CommunityFollowers.objects.get_or_create(
-                    user=accept_obj.user, community=community
-                )
-                follow_r_obj.is_follow = True
-                follow_r_obj.save()
+                accept_follow_request(accept_obj)
+                follow_community(accept_obj.user_id, community)
             elif request.POST.get("action") == "reject":
-                accept_obj.delete()
+                remove_follow_requests(community.id, CommunityFollowRequests.objects.filter(id=accept_obj.id))
 
         return JsonResponse({"success": "ok"})
 
@@ -301,11 +307,9 @@ class AdminPanelView(CommunityBaseContext):
     def get_context_data(self, request, **kwargs):
         """
         :return: Dictionary context:
-            - owner (str): Owner username
-            - admins (list) or (str): If there are administrators in the community, a list will be returned,
-            otherwise a message "You have no admins yet" will be returned
-            - admins (list) or (str): If there are moderators in the community, a list will be returned,
-            otherwise a message "You have no moderators yet" will be returned
+            - owner (Moderators): Owner of the community, None if it has no owner
+            - admins (list): Administrators of the community
+            - moderators (list): Moderators of the community
             - instance (str): Community instance name
             - community_id (int): Community id
             - followers_count (int): Number of subscribed users
@@ -315,13 +319,13 @@ class AdminPanelView(CommunityBaseContext):
         instance = context["community_instance"]
 
         # COMMUNITY BASE DATA
-        context["followers_count"] = CommunityFollowers.objects.filter(community=instance, is_follow=True).count()
+        context["followers_count"] = instance.followers_count
         now = datetime.now()
         time_48_hours_ago = now - timedelta(hours=48)
         context["last_actions"] = instance.posts.filter(published_at__range=[time_48_hours_ago, now])
 
         # GET COMMUNITY PUBLICATIONS
-        owner = instance.admins.filter(is_owner=True).first()
+        owner = context["owner"]
         if owner:
             context["all_posts"] = list(instance.posts.filter(author_id=owner.user.id).values())
         else:
@@ -396,9 +400,13 @@ class UsersManagementView(CommunityBaseContext):
         :param kwargs: Expects 'name' as a string taken from the URL.
 
         :return: Rendered HTTP response with the following context:
-            - banned_users (list): List of banned users.
+            - banned_users (list): One page of banned users, the 'banned_after' query parameter selects the page.
+            - banned_next (int): Cursor of the next page of banned users, None on the last page.
             - instance (Community): Instance of the Community.
-            - followers (list): List of followers.
+            - followers (list): One page of followers that are not banned, the 'after' query parameter
+            selects the page.
+            - followers_next (int): Cursor of the next page of followers, None on the last page.
+            - banned_after, followers_after (int): Cursors of the shown pages, kept when the other list is paged.
             - csrf_token (str): CSRF token for the request.
         """
         context = self.get_context_data(request, **kwargs)
@@ -411,8 +419,12 @@ class UsersManagementView(CommunityBaseContext):
             self.template_name,
             {
                 "banned_users": context["banned_users"],
+                "banned_next": context["banned_next"],
                 "instance": context["community_instance"],
                 "followers": context["followers"],
+                "followers_next": context["followers_next"],
+                "banned_after": context["banned_after"],
+                "followers_after": context["followers_after"],
                 "csrf_token": get_token(request),
             },
         )
@@ -487,7 +499,7 @@ class UsersManagementView(CommunityBaseContext):
 
             # Check data from JSON response
             if follower_id and reason and instance_name:
-                community = get_object_or_404(Community, name=instance_name)
+                community = get_community_access(request, instance_name).community
                 blacklist, created = BlackList.objects.get_or_create(
                     user_id=follower_id, community=community, defaults={"reason": reason}
                 )
@@ -538,19 +550,10 @@ class UsersManagementView(CommunityBaseContext):
             user_id = data.get("follower_id")
             privilege = data.get("privilege")
             instance_name = data.get("instance")
-            community = get_object_or_404(Community, name=instance_name)
-
-            try:
-                owner = Moderators.objects.get(is_owner=True, user_id=request.user.id)
-                is_owner = Moderators.objects.filter(user=request.user, user__username=owner).exists()
-            except Moderators.DoesNotExist:
-                is_owner = False
-
-            try:
-                admin = Moderators.objects.get(is_admin=True, user_id=request.user.id)
-                is_admin = Moderators.objects.filter(user=request.user, user__username=admin).exists()
-            except Moderators.DoesNotExist:
-                is_admin = False
+            access = get_community_access(request, instance_name)
+            community = access.community
+            is_owner = access.is_owner
+            is_admin = access.is_admin
 
             if privilege == "Owner" and is_owner:
                 ...
@@ -576,7 +579,7 @@ class UsersManagementView(CommunityBaseContext):
     def remove_privileges(request, data: json):
         manager_id = data.get("manager_id")
         community_instance = data.get("instance")
-        community = get_object_or_404(Community, name=community_instance)
+        community = get_community_access(request, community_instance).community
         try:
             manager = get_object_or_404(Moderators, id=manager_id)
             community.admins.remove(manager)
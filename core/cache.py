@@ -0,0 +1,223 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, TypeVar
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+MISSING = object()
+
+
+class CacheMetrics:
+    """
+    Per-process counters of one cache namespace: hits, misses, backend errors and time spent in the backend
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+            self.errors = 0
+            self.get_seconds = 0.0
+            self.set_seconds = 0.0
+            self.sets = 0
+
+    def record_get(self, hit: bool, seconds: float) -> None:
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.get_seconds += seconds
+
+    def record_set(self, seconds: float) -> None:
+        with self.lock:
+            self.sets += 1
+            self.set_seconds += seconds
+
+    def record_error(self) -> None:
+        with self.lock:
+            self.errors += 1
+
+    def as_dict(self) -> dict:
+        """
+        :return: Dictionary:
+            - hits, misses, sets, errors (int)
+            - hit_rate (float): Share of reads served from the cache, 0 without reads
+            - get_ms, set_ms (float): Average backend latency of reads and writes in milliseconds
+        """
+        with self.lock:
+            reads = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "sets": self.sets,
+                "errors": self.errors,
+                "hit_rate": self.hits / reads if reads else 0.0,
+                "get_ms": self.get_seconds * 1000 / reads if reads else 0.0,
+                "set_ms": self.set_seconds * 1000 / self.sets if self.sets else 0.0,
+            }
+
+
+class CacheNamespace:
+    """
+    Group of cache keys of one app that are invalidated together.
+    Keys are '<name>:<version>:<key>', bumping the version shared through the cache makes every key of the namespace
+    unreachable in all processes at once, the old values expire by their timeout.
+    If the cache backend is unavailable values are computed on every call instead of failing the request.
+
+    :param name: Namespace name, prefixed with the app label, e.g. 'community:list'
+    :param timeout: Seconds values are kept, the CACHES default timeout if not given
+    """
+
+    registry: dict[str, "CacheNamespace"] = {}
+
+    def __init__(self, name: str, timeout: int = DEFAULT_TIMEOUT):
+        if name in self.registry:
+            raise ValueError(f"Cache namespace {name} is already registered")
+        self.name = name
+        self.timeout = timeout
+        self.version_key = f"{name}:version"
+        self.metrics = CacheMetrics()
+        self.local = threading.local()
+        self.registry[name] = self
+
+    def version(self) -> int:
+        return cache.get_or_set(self.version_key, time.time_ns(), timeout=None)
+
+    def bump(self) -> None:
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            self.version()
+        except RedisError:
+            self.metrics.record_error()
+            logger.exception("Cache namespace %s was not invalidated", self.name)
+
+    def make_key(self, key: str, version: int) -> str:
+        return f"{self.name}:{version}:{key}"
+
+    def get_or_compute(self, key: str, compute: Callable[[], T], timeout: int | None = None) -> T:
+        """
+        Returns the cached value of the key, computes and caches it on a miss. None is a valid cached value.
+
+        :param key: Key inside the namespace
+        :param compute: Function that returns the value on a miss, its exceptions are not cached
+        :param timeout: Seconds the value is kept, the namespace timeout by default
+        """
+        started = time.perf_counter()
+        try:
+            cache_key = self.make_key(key, self.version())
+            value = cache.get(cache_key, MISSING)
+        except RedisError:
+            self.metrics.record_error()
+            logger.warning("Cache namespace %s is unavailable, computing %s", self.name, key, exc_info=True)
+            return compute()
+        self.metrics.record_get(value is not MISSING, time.perf_counter() - started)
+        if value is not MISSING:
+            return value
+
+        value = compute()
+        started = time.perf_counter()
+        try:
+            cache.set(cache_key, value, self.timeout if timeout is None else timeout)
+        except RedisError:
+            self.metrics.record_error()
+            logger.warning("Cache namespace %s is unavailable, %s was not cached", self.name, key, exc_info=True)
+        else:
+            self.metrics.record_set(time.perf_counter() - started)
+        return value
+
+    def delete(self, *keys: str) -> None:
+        """
+        Removes single keys of the current version, for entries that are invalidated one by one
+        """
+        try:
+            version = self.version()
+            cache.delete_many([self.make_key(key, version) for key in keys])
+        except RedisError:
+            self.metrics.record_error()
+            logger.exception("Keys %s of cache namespace %s were not invalidated", keys, self.name)
+
+    @contextmanager
+    def deferred(self):
+        """
+        Mutes the invalidate_on receivers of the namespace in the current thread and bumps the version once
+        when the transaction commits, for bulk changes that would bump it for every saved or deleted row
+        """
+        self.local.deferred = True
+        try:
+            yield
+        finally:
+            self.local.deferred = False
+        transaction.on_commit(self.bump)
+
+    def invalidate_on(self, model, fields: tuple[str, ...] | None = None) -> None:
+        """
+        Bumps the namespace version when rows of the model are saved or deleted.
+        Changes inside a transaction bump it again on commit, so values other processes cached
+        from the data before the commit are not served afterwards.
+
+        :param model: Model whose changes invalidate the namespace, bulk operations send no signals
+        :param fields: Saves with update_fields that do not touch these fields keep the cache
+        """
+
+        def changed(sender, update_fields=None, **kwargs):
+            if getattr(self.local, "deferred", False):
+                return
+            if fields is not None and update_fields is not None and not set(update_fields) & set(fields):
+                return
+            self.bump()
+            if connection.in_atomic_block:
+                transaction.on_commit(self.bump)
+
+        uid = f"cache_{self.name}_{model._meta.label}"
+        post_save.connect(changed, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(changed, sender=model, weak=False, dispatch_uid=f"{uid}_delete")
+
+
+def cached_query(namespace: CacheNamespace, key: str, query: QuerySet | Callable[[], T], timeout: int | None = None):
+    """
+    Caches the result of a query in a namespace. Querysets are evaluated to a list, so only the rows are cached.
+
+    :param namespace: Namespace invalidated by changes of the queried models
+    :param key: Key of the query inside the namespace, must include every parameter of the query
+    :param query: Queryset or function that runs the query
+    :param timeout: Seconds the result is kept, the namespace timeout by default
+    :return: List of rows for a queryset, the function result otherwise
+    """
+    compute = (lambda: list(query)) if isinstance(query, QuerySet) else query
+    return namespace.get_or_compute(key, compute, timeout)
+
+
+def cache_metrics() -> dict[str, dict]:
+    """
+    :return: Metrics of every namespace of this process, see CacheMetrics.as_dict
+    """
+    return {name: namespace.metrics.as_dict() for name, namespace in sorted(CacheNamespace.registry.items())}
+
+
+def invalidate_all() -> None:
+    """
+    Bumps every namespace, used after bulk loads that send no model signals
+    """
+    for namespace in CacheNamespace.registry.values():
+        namespace.bump()
+
+
+def reset_cache_metrics() -> None:
+    for namespace in CacheNamespace.registry.values():
+        namespace.metrics.reset()
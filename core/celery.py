@@ -10,4 +10,4 @@ app = Celery("core")
 
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
-app.autodiscover_tasks(["users.views"])
+app.autodiscover_tasks(["users"])
@@ -0,0 +1,65 @@
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+
+# Counter field -> (counted rows, foreign key of the rows pointing to the object that carries the counter)
+CountedRows = dict[str, tuple[QuerySet, str]]
+
+
+class CounterFieldsMixin:
+    """
+    Model mixin for denormalized counters that are only changed by F() updates.
+    Saving a loaded instance without update_fields (e.g. by a model form) writes every field but the counters,
+    so values changed since the instance was loaded are not overwritten.
+    """
+
+    counter_fields: tuple[str, ...] = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+def count_expression(rows: QuerySet, key: str) -> Coalesce:
+    """
+    :param rows: Counted rows
+    :param key: Foreign key of the rows pointing to the counted object
+    :return: Correlated subquery counting the rows of the outer object
+    """
+    counts = rows.filter(**{key: OuterRef("pk")}).order_by().values(key).annotate(n=Count("pk")).values("n")
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def count_expressions(counted_rows: CountedRows) -> dict[str, Coalesce]:
+    """
+    :return: Count expression of every counter field, for updates that set all counters of a queryset
+    """
+    return {field: count_expression(rows, key) for field, (rows, key) in counted_rows.items()}
+
+
+def reconcile_counters(model, counted_rows: CountedRows, batch_size: int = 10000, dry_run: bool = False) -> dict:
+    """
+    Recounts the counters of all objects of the model and fixes those that drifted from the counted rows.
+    Objects are processed in id ranges, every range takes one UPDATE per counter that touches only drifted rows.
+
+    :param model: Model with the counter fields
+    :param counted_rows: Rows counted by every counter field, see CountedRows
+    :param batch_size: Number of ids per range
+    :param dry_run: Only count drifted objects
+    :return: Number of drifted objects per counter field
+    """
+    drifted = dict.fromkeys(counted_rows, 0)
+    bounds = model.objects.aggregate(first=Min("pk"), last=Max("pk"))
+    if bounds["first"] is None:
+        return drifted
+
+    for start in range(bounds["first"], bounds["last"] + 1, batch_size):
+        objects = model.objects.filter(pk__gte=start, pk__lt=start + batch_size)
+        for field, actual in count_expressions(counted_rows).items():
+            wrong = objects.annotate(actual=actual).exclude(**{field: F("actual")})
+            drifted[field] += wrong.count() if dry_run else wrong.update(**{field: actual})
+    return drifted
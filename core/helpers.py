@@ -1,4 +1,9 @@
+import base64
+import json
+from datetime import datetime
+
 from django import forms
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
 from django.http import HttpResponseRedirect
 
 
@@ -35,3 +40,51 @@ def form_check_len(context: str, min_len: int, max_len: int, min_error: str, max
         raise forms.ValidationError(f"{max_error}, maximum length is {max_len}")
 
     return context
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    Upload handler that stops reading the request body as soon as a file grows over max_size.
+    Must be placed before the default handlers, the accepted chunks are passed on to them.
+    """
+
+    def __init__(self, request=None, max_size: int = 0):
+        super().__init__(request)
+        self.max_size = max_size
+        self.exceeded = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            self.exceeded = True
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def encode_cursor(moment: datetime, *keys: int) -> str:
+    """
+    Packs the position of the last row of a keyset page, a date followed by integer keys,
+    into an opaque URL safe string
+    """
+    raw = json.dumps([moment.isoformat(), *keys])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, keys: int) -> tuple:
+    """
+    Unpacks a cursor created by encode_cursor
+
+    :param cursor: Cursor from the query string
+    :param keys: Number of integer keys after the date
+    :return: Tuple of the date and the keys
+    :raise ValueError: If the cursor is malformed
+    """
+    try:
+        moment, *values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != keys:
+            raise ValueError("Wrong number of cursor keys")
+        return datetime.fromisoformat(moment), *(int(value) for value in values)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid page cursor") from e
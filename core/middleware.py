@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+
+class QueryCounter:
+    """
+    Database execute wrapper that counts every SQL query passed through the connection
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryCountMiddleware:
+    """
+    Reports the number of SQL queries made while handling a request in the 'X-Query-Count' response header.
+    Enabled by the QUERY_COUNT_HEADER setting only, the header exposes internals and must stay off in production.
+    """
+
+    header_name = "X-Query-Count"
+
+    def __init__(self, get_response):
+        if not settings.QUERY_COUNT_HEADER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response[self.header_name] = str(counter.count)
+        return response
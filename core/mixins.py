@@ -1,13 +1,14 @@
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import BadRequest
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
 from django.views.generic import TemplateView, View, DetailView
 from abc import ABC, abstractmethod
 
-from community.models import Community, BlackList, CommunityFollowers
+from community.access import get_community_access
+from community.followers import get_banned_page, get_followers_page, parse_page_cursor
 from core.helpers import post_request_details
 from app.models import Comments
-from users.models import Moderators
 
 
 class RenderOrRedirect(ABC, TemplateView):
@@ -93,7 +94,7 @@ class DetailMixin(ABC, DetailView):
         model_class = self.get_model_class().objects.filter(pk=pk).all()
         content_type = ContentType.objects.get_for_model(self.get_model_class())
         model_detail = get_object_or_404(self.get_model_class(), pk=pk)
-        comments = Comments.objects.filter(object_id=pk, content_type=content_type).all()
+        comments = Comments.objects.filter(object_id=pk, content_type=content_type).select_related("user")
         context = {
             "user": user,
             "model_class": model_class,
@@ -181,56 +182,34 @@ class CommunityBaseContext(View):
     def get_context_data(self, request, **kwargs):
         context = {}
         community_name = self.kwargs.get("name")
-        community_id = Community.objects.get(name=community_name).id
-        community_instance = get_object_or_404(Community, name=community_name)
-        community_data = Community.objects.get(name=community_name)
+        access = get_community_access(request, community_name)
+        community_instance = access.community
 
         # Community base data: Name | ID | Instance
         context["community_name"] = community_name
-        context["community_id"] = community_id
+        context["community_id"] = community_instance.id
         context["community_instance"] = community_instance
-        context["community_data"] = community_data
+        context["community_data"] = community_instance
 
         # Owner | Admin | Moderator
-        context["owner"] = community_instance.admins.get(is_owner=True)
-        context["admins"] = community_instance.admins.filter(is_admin=True)
-        context["moderators"] = community_instance.admins.filter(is_moderator=True)
-        if not context["admins"]:
-            context["admins"] = "You have no admins yet"
-        if not context["moderators"]:
-            context["moderators"] = "You have no moderators yet"
+        context["owner"] = access.owner
+        context["admins"] = access.admins
+        context["moderators"] = access.moderators
 
         if request.user.is_authenticated:
-            is_owner = Moderators.objects.filter(user=self.request.user, is_owner=True).exists()
-            is_admin = Moderators.objects.filter(user=self.request.user, is_admin=True).exists()
-            is_moderator = Moderators.objects.filter(user=self.request.user, is_moderator=True).exists()
-            context["is_owner"] = is_owner
-            context["is_admin"] = is_admin
-            context["is_moderator"] = is_moderator
-
-        # Community black list
-        context["black_list"] = BlackList.objects.filter(community=community_instance).select_related("user__user")
-        banned_user_list = [
-            banned_user.user.id for banned_user in BlackList.objects.filter(community=community_instance)
-        ]
-
-        banned_users = [
-            {
-                "id": entry.user.id,
-                "blacklist_id": entry.id,
-                "username": entry.user.user.username,
-                "reason": entry.reason,
-            }
-            for entry in context["black_list"]
-        ]
-        context["banned_users"] = banned_users
-
-        # Community followers
-        followers = CommunityFollowers.objects.filter(community=community_instance, is_follow=True)
-        context["followers"] = []
-        if banned_user_list:
-            context["followers"] = [follower for follower in followers if follower.user.id not in banned_user_list]
-        else:
-            context["followers"] = followers
+            context["is_owner"] = access.is_owner
+            context["is_admin"] = access.is_admin
+            context["is_moderator"] = access.is_moderator
+        context["is_manager"] = access.is_manager
+
+        # Community black list and followers without banned ones, one page of each
+        try:
+            followers_after = parse_page_cursor(request.GET.get("after"))
+            banned_after = parse_page_cursor(request.GET.get("banned_after"))
+        except ValueError:
+            raise BadRequest("Invalid page cursor")
+        context["banned_users"], context["banned_next"] = get_banned_page(community_instance, banned_after)
+        context["followers"], context["followers_next"] = get_followers_page(community_instance, followers_after)
+        context["banned_after"], context["followers_after"] = banned_after, followers_after
 
         return context
@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 import os
 from pathlib import Path
 
-from decouple import config
+from decouple import Csv, config
 from django.contrib.messages import api
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     "channels_redis",
     "daphne",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django.contrib.sites",
     # TOOLS AND FRAMEWORKS
     "rest_framework",
@@ -61,7 +62,11 @@ INSTALLED_APPS = [
 ]
 
 
+# X-Query-Count response header of core.middleware.QueryCountMiddleware, used by tests and benchmarks
+QUERY_COUNT_HEADER = config("QUERY_COUNT_HEADER", default=DEBUG, cast=bool)
+
 MIDDLEWARE = [
+    "core.middleware.QueryCountMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -94,11 +99,45 @@ TEMPLATES = [
 ASGI_APPLICATION = "core.asgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
+# Comma separated Redis URLs, channels and groups are sharded between them by consistent hashing.
+# The socket timeout must stay above the 5 second blocking receive of the layer, otherwise idle consumers time out
+CHANNEL_REDIS_HOSTS = [
+    {"address": address, "socket_timeout": config("CHANNEL_REDIS_SOCKET_TIMEOUT", default=10, cast=int)}
+    for address in config("CHANNEL_REDIS_HOSTS", default="redis://localhost:6379", cast=Csv())
+]
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [("localhost", 6379)],
+            "hosts": CHANNEL_REDIS_HOSTS,
+            # Messages per channel before ChannelFull, and seconds an undelivered message is kept
+            "capacity": config("CHANNEL_LAYER_CAPACITY", default=1000, cast=int),
+            "expiry": config("CHANNEL_LAYER_EXPIRY", default=30, cast=int),
+            "group_expiry": config("CHANNEL_LAYER_GROUP_EXPIRY", default=86400, cast=int),
+        },
+    },
+}
+# Broadcast-heavy groups (comment streams) may use Redis pub/sub, one PUBLISH per group message
+# instead of one queue push per member
+if config("CHANNEL_BROADCAST_PUBSUB", default=False, cast=bool):
+    CHANNEL_LAYERS["broadcast"] = {
+        "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+        "CONFIG": {"hosts": CHANNEL_REDIS_HOSTS},
+    }
+else:
+    CHANNEL_LAYERS["broadcast"] = CHANNEL_LAYERS["default"]
+# Cache on the Redis server of the channel layer, in its own database: cache.clear() flushes only that database.
+# Keys are namespaced per app by core.cache.CacheNamespace, KEY_PREFIX separates projects sharing the server
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("CACHE_REDIS_URL", default=f"{CHANNEL_REDIS_HOSTS[0]['address']}/1"),
+        "KEY_PREFIX": config("CACHE_KEY_PREFIX", default="fpbp"),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=3600, cast=int),
+        "OPTIONS": {
+            # A slow or unavailable Redis must not stall requests, core.cache falls back to the database
+            "socket_connect_timeout": config("CACHE_SOCKET_TIMEOUT", default=1, cast=float),
+            "socket_timeout": config("CACHE_SOCKET_TIMEOUT", default=1, cast=float),
         },
     },
 }
@@ -190,6 +229,18 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_ENABLE_UTC = True
 CELERY_TASK_BACKEND = "rpc://"
+CELERY_BEAT_SCHEDULE = {
+    # Follows deleted together with their users leave the denormalized counters behind
+    "reconcile-follow-counters": {
+        "task": "users.tasks.reconcile_follow_counters",
+        "schedule": config("FOLLOW_COUNTERS_RECONCILE_SECONDS", default=3600, cast=int),
+    },
+    # Files uploaded for chat messages that were never sent
+    "delete-unclaimed-chat-uploads": {
+        "task": "users.tasks.delete_unclaimed_chat_uploads",
+        "schedule": config("CHAT_UPLOADS_CLEANUP_SECONDS", default=3600, cast=int),
+    },
+}
 
 # Email
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
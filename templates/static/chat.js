@@ -1,5 +1,7 @@
 $(document).ready(function () {
-    const socket = new WebSocket(`ws://${window.location.host}/ws/message/`);
+    const chatId = $('.chat-container').data('chat-id');
+    const currentUserId = $('.chat-container').data('user-id');
+    const socket = new WebSocket(`ws://${window.location.host}/ws/message/${chatId}/`);
 
     socket.onopen = function () {
         console.log("WebSocket connection established.");
@@ -8,7 +10,11 @@ $(document).ready(function () {
     socket.onmessage = function (event) {
         const data = JSON.parse(event.data);
         if (data.message) {
-            displayMessage(data.message);
+            displayMessage(data.message, data.attachment_url, data.voice_url);
+            // The conversation is open, so a received message is read right away
+            if (data.message.userId !== currentUserId) {
+                socket.send(JSON.stringify({read: data.message.id}));
+            }
         }
     };
 
@@ -16,6 +22,38 @@ $(document).ready(function () {
         console.log("WebSocket connection closed.");
     };
 
+    // Older messages are loaded page by page when the conversation is scrolled to the top
+    const messageContainer = $(`#message_container_${chatId}`);
+    let loadingHistory = false;
+
+    messageContainer.scrollTop(messageContainer.prop("scrollHeight"));
+    messageContainer.on('scroll', function () {
+        const cursor = messageContainer.data('cursor');
+        if (messageContainer.scrollTop() > 0 || !cursor || loadingHistory) {
+            return;
+        }
+        loadingHistory = true;
+
+        $.ajax({
+            url: `/user-chats/${chatId}/messages/`,
+            type: 'GET',
+            data: {cursor: cursor},
+            success: function (response) {
+                // Keep the currently visible message in place
+                const previousHeight = messageContainer.prop("scrollHeight");
+                messageContainer.prepend(response.html);
+                messageContainer.scrollTop(messageContainer.prop("scrollHeight") - previousHeight);
+                messageContainer.data('cursor', response.next_cursor || '');
+            },
+            error: function (xhr, status, error) {
+                console.error('Failed to load messages:', error);
+            },
+            complete: function () {
+                loadingHistory = false;
+            }
+        });
+    });
+
     // Handle form submission
     $('.messageForm').on('submit', async function (event) {
         event.preventDefault();
@@ -35,34 +73,54 @@ $(document).ready(function () {
             return;
         }
 
-        const fileBase64 = fileInput.files[0] ? await fileToBase64(fileInput.files[0]) : null;
-        const voiceBase64 = voiceInput.files[0] ? await fileToBase64(voiceInput.files[0]) : null;
+        // Files go to the upload endpoint, the WebSocket frame carries only their ids
+        const attachment = fileInput.files[0] ? await uploadFile(chatId, 'attachment', fileInput.files[0]) : null;
+        const voice = voiceInput.files[0] ? await uploadFile(chatId, 'voice', voiceInput.files[0]) : null;
 
         const message = {
-            username: $('#username').val(),
-            user_id: userId,
-            recipient: recipient,
-            sender: sender,
             context: context,
-            chatId: chatId,
-            file: fileBase64,
-            voice: voiceBase64,
+            attachment: attachment,
+            voice: voice,
         };
 
         socket.send(JSON.stringify(message));
         form[0].reset();
     });
 
-    async function fileToBase64(file) {
-        return new Promise((resolve, reject) => {
-            const reader = new FileReader();
-            reader.readAsDataURL(file);
-            reader.onload = () => resolve(reader.result);
-            reader.onerror = error => reject(error);
+    async function uploadFile(chatId, kind, file) {
+        const formData = new FormData();
+        formData.append('kind', kind);
+        formData.append('file', file);
+
+        const response = await fetch(`/user-chats/${chatId}/upload/`, {
+            method: 'POST',
+            headers: {'X-CSRFToken': getCookie('csrftoken')},
+            body: formData,
         });
+        if (!response.ok) {
+            console.error("Upload failed", await response.json());
+            return null;
+        }
+        return (await response.json()).id;
+    }
+
+    // Function to get the CSRF token from cookies
+    function getCookie(name) {
+        var cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            var cookies = document.cookie.split(';');
+            for (var i = 0; i < cookies.length; i++) {
+                var cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
     }
 
-    function displayMessage(message) {
+    function displayMessage(message, attachmentUrl, voiceUrl) {
         if (!message || !message.context) {
             console.error("Invalid message data", message);
             return;
@@ -71,13 +129,13 @@ $(document).ready(function () {
         const messageDiv = $(`#message_container_${message.chatId}`);
 
 
-        const messageClass = (message.userId === message.sender) ? 'sent' : 'received';
+        const messageClass = (message.userId === currentUserId) ? 'sent' : 'received';
         const commentElement = $(`
             <div class="message ${messageClass}">
                 <h5>${message.username}</h5>
                 <p>${message.context}</p>
-                ${message.file ? `<img src="${message.file}" alt="Image"/>` : ''}
-                ${message.voice ? `<audio controls src="${message.voice}"></audio>` : ''}
+                ${attachmentUrl ? `<img src="${attachmentUrl}" alt="Image"/>` : ''}
+                ${voiceUrl ? `<audio controls src="${voiceUrl}"></audio>` : ''}
             </div>
         `);
 
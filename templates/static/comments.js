@@ -1,14 +1,34 @@
 $(document).ready(function () {
+    // One socket carries the comment streams of all objects on the page, every object is subscribed by a frame.
+    // Streams are keyed by content type id and object id with a separator, so the keys of two objects never collide
+    const streams = {};
+    const queued = [];
     const socket = new WebSocket(`ws://${window.location.host}/ws/comments/`);
 
+    function streamKey(contentTypeId, objectId) {
+        return `${contentTypeId}:${objectId}`;
+    }
+
+    function sendFrame(frame) {
+        if (socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify(frame));
+        } else {
+            queued.push(frame);
+        }
+    }
+
     socket.onopen = function () {
         console.log("WebSocket connection established.");
+        queued.splice(0).forEach(frame => socket.send(JSON.stringify(frame)));
     };
 
     socket.onmessage = function (event) {
         const data = JSON.parse(event.data);
         if (data.comment) {
-            displayComment(data.comment);
+            const container = streams[streamKey(data.comment.content_type_id, data.comment.object_id)];
+            if (container) {
+                displayComment(container, data.comment);
+            }
         }
     };
 
@@ -16,34 +36,60 @@ $(document).ready(function () {
         console.log("WebSocket connection closed.");
     };
 
-    $('.commentForm').on('submit', async function (event) {
+    function subscribe(container) {
+        const contentTypeId = container.data('content-type-id');
+        const objectId = container.data('object-id');
+        const key = streamKey(contentTypeId, objectId);
+        if (streams[key]) {
+            return;
+        }
+        streams[key] = container;
+        sendFrame({action: 'subscribe', content_type_id: contentTypeId, object_id: objectId});
+    }
+
+    function unsubscribeRemoved() {
+        for (const [key, container] of Object.entries(streams)) {
+            if (!$.contains(document, container[0])) {
+                delete streams[key];
+                const [contentTypeId, objectId] = key.split(':').map(Number);
+                sendFrame({action: 'unsubscribe', content_type_id: contentTypeId, object_id: objectId});
+            }
+        }
+    }
+
+    function subscribeAll() {
+        unsubscribeRemoved();
+        $('.comments-stream').each(function () {
+            subscribe($(this));
+        });
+    }
+
+    subscribeAll();
+    $(document).on('feed:loaded', subscribeAll);
+
+    $(document).on('submit', '.commentForm', async function (event) {
         event.preventDefault();
 
         const form = $(this);
-        const contentId = form.attr('id').split('_')[1];
-        console.log(contentId)
-        const userId = $(`#user_id_${contentId}`).val();
-        const username = $(`#username_id_${contentId}`).val();
-        const objectId = $(`#object_id_${contentId}`).val();
-        const content = $(`#content_${contentId}`).val().trim();
-        const contentTypeId = $(`#content_type_id_${contentId}`).val();
+        const contentTypeId = form.data('content-type-id');
+        const objectId = form.data('object-id');
+        const suffix = `${contentTypeId}_${objectId}`;
+        const content = $(`#content_${suffix}`).val().trim();
 
-        const fileInput = $(`#file_${contentId}`)[0];
-        const imageInput = $(`#image_${contentId}`)[0];
+        const fileInput = $(`#file_${suffix}`)[0];
+        const imageInput = $(`#image_${suffix}`)[0];
 
 
         const message = {
-            username: username,
-            user_id: userId,
-            content: content,
+            action: 'comment',
             content_type_id: contentTypeId,
             object_id: objectId,
-            object_ct_id:contentId,
+            content: content,
             file: fileInput.files[0] ? await fileToBase64(fileInput.files[0]) : null,
             image: imageInput.files[0] ? await fileToBase64(imageInput.files[0]) : null,
         };
 
-        socket.send(JSON.stringify(message));
+        sendFrame(message);
         form[0].reset();
     });
 
@@ -56,19 +102,12 @@ $(document).ready(function () {
         });
     }
 
-   function displayComment(comment) {
+   function displayComment(commentsDiv, comment) {
     if (!comment || !comment.object_id || !comment.content) {
         console.error("Invalid comment data", comment);
         return;
     }
 
-    const commentsDiv = $(`#comments_${comment.object_ct_id}`);
-
-    if (commentsDiv.length === 0) {
-        console.error("Comments container not found for object ID:", comment.object_id);
-        return;
-    }
-
     const commentElement = $(`
         <div class="feedback" data-feedback-id="${comment.id}">
             <h5>User: ${comment.username}</h5>
@@ -0,0 +1,29 @@
+$(document).ready(function () {
+    const loadMoreButton = $('#load-more-btn');
+    const feed = $('#feed');
+
+    loadMoreButton.on('click', function () {
+        const cursor = loadMoreButton.data('cursor');
+        loadMoreButton.prop('disabled', true);
+
+        $.ajax({
+            url: '/feed/',
+            type: 'GET',
+            data: {cursor: cursor},
+            success: function (response) {
+                feed.append(response.html);
+                $(document).trigger('feed:loaded');
+                if (response.next_cursor) {
+                    loadMoreButton.data('cursor', response.next_cursor);
+                    loadMoreButton.prop('disabled', false);
+                } else {
+                    loadMoreButton.remove();
+                }
+            },
+            error: function (xhr, status, error) {
+                console.error('Failed to load feed:', error);
+                loadMoreButton.prop('disabled', false);
+            }
+        });
+    });
+});
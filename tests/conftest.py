@@ -0,0 +1,7 @@
+from django.conf import settings
+
+
+def pytest_configure(config):
+    # Tests must not flush or depend on the Redis cache of the developer,
+    # the outage fallback tests override CACHES with an unreachable Redis themselves
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
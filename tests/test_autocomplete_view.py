@@ -0,0 +1,113 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from app.autocomplete import PrefixIndex, AUTOCOMPLETE_SOURCES, change_key, prefix_index, suggest
+from app.models import Thread
+from community.models import Community
+from users.models import CustomUser
+
+
+class TestPrefixIndex(TestCase):
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.users, self.threads = AUTOCOMPLETE_SOURCES[0], AUTOCOMPLETE_SOURCES[1]
+
+    def test_prefix_matches_any_word(self):
+        self.index.add(self.threads, 1, "Python decorators")
+        self.index.add(self.threads, 2, "Decorating a room")
+        self.index.add(self.users, 3, "pythonista")
+
+        self.assertEqual(
+            [suggestion["label"] for suggestion in self.index.suggest("deco", 10)],
+            ["Decorating a room", "Python decorators"],
+        )
+        self.assertEqual(len(self.index.suggest("python dec", 10)), 1)
+        self.assertEqual(len(self.index.suggest("pyth", 10)), 2)
+        self.assertEqual(len(self.index.suggest("pyth", 1)), 1)
+        self.assertEqual(self.index.suggest("java", 10), [])
+
+    def test_update_and_remove(self):
+        self.index.add(self.threads, 1, "Python decorators")
+        self.index.add(self.threads, 1, "Rust lifetimes")
+        self.assertEqual(self.index.suggest("pyth", 10), [])
+        self.assertEqual(self.index.suggest("rust", 10), [{"label": "Rust lifetimes", "url": "/thread-detail/1"}])
+
+        self.index.remove(self.threads, 1)
+        self.assertEqual(self.index.suggest("rust", 10), [])
+        self.assertEqual(self.index.keys, [])
+
+
+@pytest.mark.django_db
+class TestAutocompleteView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(username="pythonista", email="<EMAIL>", password="<PASSWORD>")
+        self.thread = Thread.objects.create(title="Python decorators", context="Context", author=self.user)
+        self.community = Community.objects.create(name="Python community", description="")
+        self.url = reverse("autocomplete")
+
+    def test_suggestions(self):
+        response = self.client.get(self.url, {"term": "pyth"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {"label": "Python community", "url": "/community/name-Python community/"},
+                {"label": "Python decorators", "url": f"/thread-detail/{self.thread.id}"},
+                {"label": "pythonista", "url": "/user-page/pythonista/"},
+            ],
+        )
+
+    def test_index_follows_changes(self):
+        self.assertEqual(len(self.client.get(self.url, {"term": "decor"}).json()), 1)
+
+        self.thread.title = "Rust lifetimes"
+        self.thread.save()
+        self.assertEqual(self.client.get(self.url, {"term": "decor"}).json(), [])
+        self.assertEqual(len(self.client.get(self.url, {"term": "rust"}).json()), 1)
+
+        self.community.delete()
+        self.assertEqual(self.client.get(self.url, {"term": "python com"}).json(), [])
+
+    def test_other_processes_replay_changes(self):
+        suggest("pyth")
+        with mock.patch.object(prefix_index, "rebuild") as rebuild:
+            Thread.objects.create(title="Python generators", context="Context", author=self.user)
+            self.community.delete()
+            labels = [suggestion["label"] for suggestion in suggest("pyth")]
+        rebuild.assert_not_called()
+        self.assertEqual(labels, ["Python decorators", "Python generators", "pythonista"])
+
+    def test_missing_changes_rebuild_once_per_interval(self):
+        suggest("pyth")
+        Thread.objects.create(title="Python generators", context="Context", author=self.user)
+        cache.delete(change_key(cache.get("autocomplete:version")))
+        # The index was just rebuilt, the stale index is served until the interval passes
+        self.assertEqual(len(suggest("python gen")), 0)
+        prefix_index.rebuilt_at -= 3600
+        self.assertEqual(len(suggest("python gen")), 1)
+
+
+DEAD_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://127.0.0.1:1/1",
+        "OPTIONS": {"socket_connect_timeout": 0.1, "socket_timeout": 0.1},
+    }
+}
+
+
+@pytest.mark.django_db
+@override_settings(CACHES=DEAD_CACHES)
+class TestAutocompleteWithoutCache(TestCase):
+    def test_changes_and_suggestions_without_cache(self):
+        user = CustomUser.objects.create_user(username="pythonista", email="<EMAIL>", password="<PASSWORD>")
+        thread = Thread.objects.create(title="Python decorators", context="Context", author=user)
+        thread.delete()
+        response = self.client.get(reverse("autocomplete"), {"term": "pyth"})
+        self.assertEqual(response.json(), [{"label": "pythonista", "url": "/user-page/pythonista/"}])
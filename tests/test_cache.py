@@ -0,0 +1,105 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from redis.exceptions import ConnectionError
+
+from community.caches import community_list_cache
+from community.models import Community
+from core.cache import CacheNamespace, cache_metrics, cached_query, reset_cache_metrics
+from users.caches import user_list_cache
+from users.models import CustomUser
+
+test_cache = CacheNamespace("tests:cache", timeout=60)
+test_cache.invalidate_on(Community, fields=("name",))
+
+
+@pytest.mark.django_db
+class TestCacheNamespace(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_metrics()
+        self.community = Community.objects.create(name="first", description="Description")
+
+    def names(self):
+        return cached_query(test_cache, "names", Community.objects.order_by("id").values_list("name", flat=True))
+
+    def test_query_is_cached(self):
+        self.assertEqual(self.names(), ["first"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ["first"])
+
+        metrics = cache_metrics()["tests:cache"]
+        self.assertEqual((metrics["hits"], metrics["misses"], metrics["sets"], metrics["errors"]), (1, 1, 1, 0))
+        self.assertEqual(metrics["hit_rate"], 0.5)
+
+    def test_none_is_cached(self):
+        compute = mock.Mock(return_value=None)
+        cached_query(test_cache, "none", compute)
+        self.assertIsNone(cached_query(test_cache, "none", compute))
+        compute.assert_called_once()
+
+    def test_model_changes_invalidate_namespace(self):
+        self.names()
+        Community.objects.create(name="second", description="Description")
+        self.assertEqual(self.names(), ["first", "second"])
+
+        self.community.delete()
+        self.assertEqual(self.names(), ["second"])
+
+    def test_saves_of_other_fields_keep_cache(self):
+        self.names()
+        self.community.description = "Changed"
+        self.community.save(update_fields=["description"])
+        with self.assertNumQueries(0):
+            self.names()
+
+    def test_deferred_invalidation(self):
+        with mock.patch.object(test_cache, "bump") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                with test_cache.deferred():
+                    Community.objects.create(name="second", description="Description")
+                    self.community.delete()
+        bump.assert_called_once_with()
+
+    def test_backend_errors_fall_back_to_query(self):
+        with mock.patch("core.cache.cache.get_or_set", side_effect=ConnectionError):
+            self.assertEqual(self.names(), ["first"])
+        self.assertEqual(cache_metrics()["tests:cache"]["errors"], 1)
+
+    def test_namespaces_are_unique(self):
+        with self.assertRaises(ValueError):
+            CacheNamespace("tests:cache")
+
+
+@pytest.mark.django_db
+class TestCachedListViews(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_metrics()
+        self.user = CustomUser.objects.create_user(username="user", email="user@example.com", password="password")
+        Community.objects.create(name="python", description="Description")
+        self.client.force_login(self.user)
+
+    def test_community_list(self):
+        self.client.get(reverse("community_list"))
+        self.assertEqual(cache_metrics()[community_list_cache.name]["misses"], 1)
+        response = self.client.get(reverse("community_list"))
+        self.assertEqual(cache_metrics()[community_list_cache.name]["hits"], 1)
+        self.assertContains(response, "/community/name-python/")
+
+        Community.objects.create(name="django", description="Description")
+        self.assertContains(self.client.get(reverse("community_list")), "/community/name-django/")
+
+    def test_all_users(self):
+        self.client.get(reverse("make-friends"))
+        CustomUser.objects.create_user(username="new", email="new@example.com", password="password")
+        self.assertContains(self.client.get(reverse("make-friends")), "/user-page/new")
+
+    def test_login_keeps_user_list(self):
+        self.client.get(reverse("make-friends"))
+        self.client.login(username="user", password="password")
+        self.client.get(reverse("make-friends"))
+        self.assertEqual(cache_metrics()[user_list_cache.name]["hits"], 1)
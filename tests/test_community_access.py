@@ -0,0 +1,151 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from community.access import get_community_access
+from community.followers import get_banned_page, get_followers_page
+from community.models import BlackList, Community, CommunityFollowers
+from users.models import CustomUser, Moderators
+
+
+@pytest.mark.django_db
+class TestCommunityAccess(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username="owner", email="owner@example.com", password="password")
+        self.moderator = CustomUser.objects.create_user(username="moder", email="moder@example.com", password="pass")
+        self.other = CustomUser.objects.create_user(username="other", email="other@example.com", password="password")
+        self.community = Community.objects.create(name="python", description="Description")
+        self.community.admins.create(user=self.owner, is_owner=True)
+        self.community.admins.create(user=self.moderator, is_moderator=True)
+        # Owner of another community has no role in 'python'
+        self.other_community = Community.objects.create(name="django", description="Description")
+        self.other_community.admins.create(user=self.other, is_owner=True)
+
+    def request(self, user):
+        request = RequestFactory().get("/")
+        request.user = user
+        return request
+
+    def test_roles(self):
+        access = get_community_access(self.request(self.moderator), "python")
+        self.assertEqual(access.owner.user, self.owner)
+        self.assertEqual([manager.user for manager in access.moderators], [self.moderator])
+        self.assertEqual(access.admins, [])
+        self.assertEqual((access.is_owner, access.is_admin, access.is_moderator), (False, False, True))
+        self.assertTrue(access.is_manager)
+
+    def test_roles_are_scoped_to_community(self):
+        self.assertFalse(get_community_access(self.request(self.other), "python").is_manager)
+        self.assertFalse(get_community_access(self.request(AnonymousUser()), "python").is_manager)
+
+    def test_memoized_on_request(self):
+        request = self.request(self.owner)
+        with self.assertNumQueries(2):
+            access = get_community_access(request, "python")
+        with self.assertNumQueries(0):
+            self.assertIs(get_community_access(request, "python"), access)
+            self.assertEqual(str(access.owner), "owner")
+        self.assertIsNot(get_community_access(self.request(self.owner), "python"), access)
+
+    def test_unknown_community(self):
+        with self.assertRaises(Http404):
+            get_community_access(self.request(self.owner), "unknown")
+
+    def test_admin_panel_for_managers_only(self):
+        url = reverse("admin_panel", args=("python",))
+        self.client.force_login(self.moderator)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.client.force_login(self.other)
+        self.assertRedirects(self.client.get(url), reverse("community", args=("python",)))
+
+    def test_managers_list(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse("users_management", args=("python",)) + "?managers_list")
+        self.assertContains(response, "You have no admins yet")
+        self.assertContains(response, "<strong>Username:</strong> moder", html=True)
+
+    def test_grant_privileges_needs_role_in_community(self):
+        self.client.force_login(self.other)
+        self.client.post(
+            reverse("users_management", args=("django",)),
+            data={
+                "action": "grant_privileges",
+                "follower_id": self.other.id,
+                "privilege": "Admin",
+                "instance": "python",
+            },
+            content_type="application/json",
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertFalse(self.community.admins.filter(user=self.other).exists())
+        self.assertFalse(Moderators.objects.filter(user=self.other, is_admin=True).exists())
+
+
+@pytest.mark.django_db
+class TestCommunityFollowersPages(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username="owner", email="owner@example.com", password="password")
+        self.community = Community.objects.create(name="python", description="Description")
+        self.community.admins.create(user=self.owner, is_owner=True)
+        self.followers = [
+            CommunityFollowers.objects.create(
+                community=self.community,
+                user=CustomUser.objects.create_user(username=f"user{i}", email=f"user{i}@example.com"),
+                is_follow=True,
+            )
+            for i in range(5)
+        ]
+        BlackList.objects.create(user=self.followers[1], community=self.community, reason="Spam")
+        BlackList.objects.create(user=self.followers[3], community=self.community, reason="Flood")
+
+    def test_banned_followers_are_excluded(self):
+        with self.assertNumQueries(1):
+            followers, next_cursor = get_followers_page(self.community)
+            self.assertEqual([follower.user.username for follower in followers], ["user0", "user2", "user4"])
+        self.assertIsNone(next_cursor)
+
+    def test_followers_pages(self):
+        first, cursor = get_followers_page(self.community, page_size=2)
+        second, last_cursor = get_followers_page(self.community, after=cursor, page_size=2)
+        self.assertEqual([follower.id for follower in first + second], [self.followers[i].id for i in (0, 2, 4)])
+        self.assertEqual(cursor, self.followers[2].id)
+        self.assertIsNone(last_cursor)
+
+    def test_banned_pages(self):
+        first, cursor = get_banned_page(self.community, page_size=1)
+        self.assertEqual(first[0]["username"], "user1")
+        self.assertEqual(first[0]["id"], self.followers[1].id)
+        second, last_cursor = get_banned_page(self.community, after=cursor, page_size=1)
+        self.assertEqual([(entry["username"], entry["reason"]) for entry in second], [("user3", "Flood")])
+        self.assertIsNone(last_cursor)
+
+    def test_users_management(self):
+        self.client.force_login(self.owner)
+        url = reverse("users_management", args=("python",))
+        response = self.client.get(url)
+        self.assertEqual(
+            [follower.user.username for follower in response.context["followers"]], ["user0", "user2", "user4"]
+        )
+        self.assertEqual(len(response.context["banned_users"]), 2)
+
+        response = self.client.get(url, {"after": self.followers[2].id})
+        self.assertEqual([follower.user.username for follower in response.context["followers"]], ["user4"])
+        self.assertEqual(self.client.get(url, {"after": "x"}).status_code, 400)
+
+    def test_next_links_keep_other_list_page(self):
+        self.client.force_login(self.owner)
+        url = reverse("users_management", args=("python",))
+        first_ban = BlackList.objects.order_by("id").first().id
+        with (
+            mock.patch("core.mixins.get_followers_page", lambda c, after: get_followers_page(c, after, page_size=1)),
+            mock.patch("core.mixins.get_banned_page", lambda c, after: get_banned_page(c, after, page_size=1)),
+        ):
+            both_paged = self.client.get(url, {"after": self.followers[0].id, "banned_after": first_ban})
+            followers_paged = self.client.get(url, {"after": self.followers[0].id})
+        self.assertContains(both_paged, f'href="?after={self.followers[2].id}&banned_after={first_ban}"')
+        self.assertContains(followers_paged, f'href="?banned_after={first_ban}&after={self.followers[0].id}"')
@@ -0,0 +1,98 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from community.followers import toggle_follow
+from community.models import Community, CommunityFollowers, CommunityFollowRequests
+from users.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestCommunityCounters(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username="owner", email="owner@example.com", password="password")
+        self.user = CustomUser.objects.create_user(username="user", email="user@example.com", password="password")
+        self.community = Community.objects.create(name="python", description="Description", is_private=True)
+        self.community.admins.create(user=self.owner, is_owner=True)
+        self.url = reverse("community", args=("python",))
+
+    def counters(self):
+        self.community.refresh_from_db()
+        return self.community.followers_count, self.community.pending_requests_count
+
+    def test_follow_toggle(self):
+        self.client.force_login(self.user)
+        response = self.client.post(self.url, data={"action": "follow"})
+        self.assertEqual(response.json(), {"followers_count": 1, "is_following": True})
+        response = self.client.post(self.url, data={"action": "unfollow"})
+        self.assertEqual(response.json(), {"followers_count": 0, "is_following": False})
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_send_and_remove_request(self):
+        self.client.force_login(self.user)
+        self.client.post(self.url, data={"action": "send_request"})
+        self.assertEqual(self.counters(), (0, 1))
+        self.client.post(self.url, data={"action": "remove_request"})
+        self.assertEqual(self.counters(), (0, 0))
+        self.assertFalse(CommunityFollowRequests.objects.exists())
+
+    def answer_request(self, action):
+        self.client.force_login(self.user)
+        self.client.post(self.url, data={"action": "send_request"})
+        self.client.force_login(self.owner)
+        self.client.post(
+            reverse("community_followers_requests", args=("python",)),
+            data={"user": self.user.id, "action": action},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+
+    def test_accept_request(self):
+        self.answer_request("accept")
+        self.assertEqual(self.counters(), (1, 0))
+        self.assertTrue(CommunityFollowers.objects.get(user=self.user).is_follow)
+
+    def test_reject_request(self):
+        self.answer_request("reject")
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_duplicate_follower_rejected(self):
+        CommunityFollowers.objects.create(community=self.community, user=self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CommunityFollowers.objects.create(community=self.community, user=self.user, is_follow=True)
+
+    def test_toggle_reuses_row(self):
+        for _ in range(3):
+            toggle_follow(self.user, self.community)
+        self.assertEqual(CommunityFollowers.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(self.counters(), (1, 0))
+        self.assertFalse(toggle_follow(self.user, self.community))
+        self.assertEqual(self.counters(), (0, 0))
+
+    def test_admin_panel_counters(self):
+        Community.objects.filter(id=self.community.id).update(followers_count=7, pending_requests_count=3)
+        self.client.force_login(self.owner)
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse("admin_panel", args=("python",)))
+        self.assertContains(response, "Followers: 7")
+        self.assertContains(response, "Follow requests: 3")
+
+    def test_reconcile_command(self):
+        CommunityFollowers.objects.create(community=self.community, user=self.user, is_follow=True)
+        CommunityFollowRequests.objects.create(community=self.community, user=self.owner, send_status=True)
+        other = Community.objects.create(name="django", description="Description")
+
+        out = StringIO()
+        call_command("reconcile_community_counters", "--dry-run", stdout=out)
+        self.assertIn("Drifted followers_count: 1 communities", out.getvalue())
+        self.assertEqual(self.counters(), (0, 0))
+
+        out = StringIO()
+        call_command("reconcile_community_counters", "--batch-size", "1", stdout=out)
+        self.assertIn("Fixed pending_requests_count: 1 communities", out.getvalue())
+        self.assertEqual(self.counters(), (1, 1))
+        other.refresh_from_db()
+        self.assertEqual((other.followers_count, other.pending_requests_count), (0, 0))
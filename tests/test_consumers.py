@@ -0,0 +1,244 @@
+import pytest
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
+from django.test import TransactionTestCase, override_settings
+
+from app.routing import websocket_urlpatterns
+from app.models import Comments, Notification, Thread
+from users.models import Chat, ChatReadState, ChatUpload, CustomUser
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+    "broadcast": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+}
+
+
+def connect(path, user):
+    communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), path)
+    communicator.scope["user"] = user
+    return communicator
+
+
+@pytest.mark.django_db
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TestChatConsumer(TransactionTestCase):
+    def setUp(self):
+        self.sender = CustomUser.objects.create_user(username="sender", email="<EMAIL>", password="<PASSWORD>")
+        self.recipient = CustomUser.objects.create_user(username="recipient", email="<EMAIL>", password="<PASSWORD>")
+        self.stranger = CustomUser.objects.create_user(username="stranger", email="<EMAIL>", password="<PASSWORD>")
+        self.chat = Chat.objects.create(sender=self.sender, recipient=self.recipient)
+        self.other_chat = Chat.objects.create(sender=self.stranger, recipient=self.recipient)
+
+    async def test_only_participants_can_connect(self):
+        communicator = connect(f"/ws/message/{self.chat.id}/", self.stranger)
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_message_delivered_to_chat_participants_only(self):
+        sender = connect(f"/ws/message/{self.chat.id}/", self.sender)
+        recipient = connect(f"/ws/message/{self.chat.id}/", self.recipient)
+        other_chat = connect(f"/ws/message/{self.other_chat.id}/", self.stranger)
+        for communicator in (sender, recipient, other_chat):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+        await sender.send_json_to({"context": "Hello", "recipient": self.recipient.id})
+        for communicator in (sender, recipient):
+            response = await communicator.receive_json_from()
+            self.assertEqual(response["message"]["context"], "Hello")
+            self.assertEqual(response["message"]["chatId"], self.chat.id)
+        self.assertTrue(await other_chat.receive_nothing())
+
+        for communicator in (sender, recipient, other_chat):
+            await communicator.disconnect()
+
+    async def test_message_attaches_upload_by_id(self):
+        upload = await ChatUpload.objects.acreate(
+            chat=self.chat, user=self.sender, kind=ChatUpload.ATTACHMENT, file="chat_uploads/photo.png", size=10
+        )
+        sender = connect(f"/ws/message/{self.chat.id}/", self.sender)
+        await sender.connect()
+
+        await sender.send_json_to({"context": "Photo", "attachment": str(upload.id), "voice": "not-an-id"})
+        response = await sender.receive_json_from()
+        self.assertEqual(response["attachment_url"], "/media/chat_uploads/photo.png")
+        self.assertNotIn("voice_url", response)
+        await sender.disconnect()
+
+        # An upload is attached once
+        self.assertFalse(await ChatUpload.objects.aexists())
+
+
+@pytest.mark.django_db
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TestNotificationConsumer(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="user", email="<EMAIL>", password="<PASSWORD>")
+        self.other_user = CustomUser.objects.create_user(username="other", email="<EMAIL>", password="<PASSWORD>")
+        self.chat = Chat.objects.create(sender=self.other_user, recipient=self.user)
+        self.chat_content_type = ContentType.objects.get_for_model(Chat)
+
+    async def test_anonymous_user_rejected(self):
+        communicator = connect("/ws/notify/", AnonymousUser())
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_notification_delivered_to_recipient_only(self):
+        user = connect("/ws/notify/", self.user)
+        other_user = connect("/ws/notify/", self.other_user)
+        for communicator in (user, other_user):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+        notification = await Notification.objects.acreate(
+            user=self.user, message="Hello", content_type=self.chat_content_type
+        )
+        self.assertEqual(await user.receive_json_from(), {"message": "Hello", "id": notification.id})
+        self.assertTrue(await other_user.receive_nothing())
+
+        await user.disconnect()
+        await other_user.disconnect()
+
+    async def test_chat_message_notifies_other_participant(self):
+        sender = connect(f"/ws/message/{self.chat.id}/", self.other_user)
+        notifications = connect("/ws/notify/", self.user)
+        sender_notifications = connect("/ws/notify/", self.other_user)
+        for communicator in (sender, notifications, sender_notifications):
+            await communicator.connect()
+
+        for i in range(2):
+            await sender.send_json_to({"context": "Hello"})
+            await sender.receive_json_from()
+            notification = await notifications.receive_json_from()
+            self.assertEqual(notification["message"], f"You got a new message {i + 1}")
+            self.assertTrue(await notifications.receive_nothing())
+        self.assertTrue(await sender_notifications.receive_nothing())
+
+        for communicator in (sender, notifications, sender_notifications):
+            await communicator.disconnect()
+
+        read_state = await ChatReadState.objects.aget(chat=self.chat, user=self.user)
+        self.assertEqual(read_state.unread_count, 2)
+
+    async def test_read_frame_resets_unread_counter(self):
+        sender = connect(f"/ws/message/{self.chat.id}/", self.other_user)
+        reader = connect(f"/ws/message/{self.chat.id}/", self.user)
+        for communicator in (sender, reader):
+            await communicator.connect()
+
+        message_ids = []
+        for context in ("First", "Second", "Third"):
+            await sender.send_json_to({"context": context})
+            await sender.receive_json_from()
+            message_ids.append((await reader.receive_json_from())["message"]["id"])
+
+        await reader.send_json_to({"read": message_ids[1]})
+        await reader.send_json_to({"context": "Reply"})
+        await reader.receive_json_from()
+        read_state = await ChatReadState.objects.aget(chat=self.chat, user=self.user)
+        self.assertEqual((read_state.last_read_message_id, read_state.unread_count), (message_ids[1], 1))
+
+        for communicator in (sender, reader):
+            await communicator.disconnect()
+
+
+@pytest.mark.django_db
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class TestCommentsConsumer(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="user", email="<EMAIL>", password="<PASSWORD>")
+        self.thread = Thread.objects.create(author=self.user, title="Thread", context="Context")
+        self.other_thread = Thread.objects.create(author=self.user, title="Other", context="Context")
+        self.content_type_id = ContentType.objects.get_for_model(Thread).id
+
+    def path(self, thread):
+        return f"/ws/comments/{self.content_type_id}/{thread.id}/"
+
+    async def test_comment_delivered_to_viewers_of_same_object_only(self):
+        author = connect(self.path(self.thread), self.user)
+        viewer = connect(self.path(self.thread), AnonymousUser())
+        other_viewer = connect(self.path(self.other_thread), AnonymousUser())
+        for communicator in (author, viewer, other_viewer):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+        await author.send_json_to({"content": "Nice thread"})
+        for communicator in (author, viewer):
+            comment = (await communicator.receive_json_from())["comment"]
+            self.assertEqual(comment["content"], "Nice thread")
+            self.assertEqual(comment["object_id"], self.thread.id)
+            self.assertEqual(comment["username"], "user")
+        self.assertTrue(await other_viewer.receive_nothing())
+
+        for communicator in (author, viewer, other_viewer):
+            await communicator.disconnect()
+
+        comment = await Comments.objects.aget()
+        self.assertEqual(comment.object_id, self.thread.id)
+        self.assertEqual(comment.content_type_id, self.content_type_id)
+
+    async def test_anonymous_user_cannot_comment(self):
+        viewer = connect(self.path(self.thread), AnonymousUser())
+        await viewer.connect()
+
+        await viewer.send_json_to({"content": "Spam"})
+        self.assertTrue(await viewer.receive_nothing())
+        await viewer.disconnect()
+
+        self.assertFalse(await Comments.objects.aexists())
+
+    async def test_one_socket_carries_subscribed_streams(self):
+        page = connect("/ws/comments/", self.user)
+        viewer = connect(self.path(self.other_thread), AnonymousUser())
+        for communicator in (page, viewer):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+        for thread in (self.thread, self.other_thread):
+            await page.send_json_to(
+                {"action": "subscribe", "content_type_id": self.content_type_id, "object_id": thread.id}
+            )
+        for thread in (self.thread, self.other_thread):
+            await page.send_json_to(
+                {
+                    "action": "comment",
+                    "content_type_id": self.content_type_id,
+                    "object_id": thread.id,
+                    "content": f"About {thread.title}",
+                }
+            )
+            comment = (await page.receive_json_from())["comment"]
+            self.assertEqual((comment["object_id"], comment["content"]), (thread.id, f"About {thread.title}"))
+        self.assertEqual((await viewer.receive_json_from())["comment"]["object_id"], self.other_thread.id)
+
+        await page.send_json_to(
+            {"action": "unsubscribe", "content_type_id": self.content_type_id, "object_id": self.other_thread.id}
+        )
+        await page.send_json_to(
+            {
+                "action": "comment",
+                "content_type_id": self.content_type_id,
+                "object_id": self.other_thread.id,
+                "content": "Unseen",
+            }
+        )
+        self.assertEqual((await viewer.receive_json_from())["comment"]["content"], "Unseen")
+        self.assertTrue(await page.receive_nothing())
+
+        for communicator in (page, viewer):
+            await communicator.disconnect()
+        self.assertEqual(await Comments.objects.filter(object_id=self.other_thread.id).acount(), 2)
+
+    async def test_invalid_stream_ignored(self):
+        page = connect("/ws/comments/", self.user)
+        await page.connect()
+
+        await page.send_json_to({"action": "comment", "content": "Lost"})
+        await page.send_json_to({"action": "subscribe", "content_type_id": "x", "object_id": self.thread.id})
+        await page.send_json_to({"action": "comment", "object_id": self.thread.id, "content": "Lost"})
+        self.assertTrue(await page.receive_nothing())
+        await page.disconnect()
+
+        self.assertFalse(await Comments.objects.aexists())
@@ -0,0 +1,65 @@
+import pytest
+from django.test import TestCase
+
+from community.models import Community, CommunityFollowers
+from core.counters import count_expressions, reconcile_counters
+from users.followers import counted_rows
+from users.models import CustomUser, Followers
+
+
+@pytest.mark.django_db
+class TestCounters(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username="author", email="author@example.com", password="pass")
+        self.reader = CustomUser.objects.create_user(username="reader", email="reader@example.com", password="pass")
+
+    def user_counters(self):
+        return dict(CustomUser.objects.values_list("username", "followers_count"))
+
+    def test_save_keeps_counters(self):
+        community = Community.objects.create(name="python", description="Description")
+        stale = Community.objects.get(id=community.id)
+        Community.objects.filter(id=community.id).update(followers_count=1, pending_requests_count=2)
+        stale.description = "Changed"
+        stale.save()
+        community.refresh_from_db()
+        self.assertEqual((community.followers_count, community.pending_requests_count), (1, 2))
+        self.assertEqual(community.description, "Changed")
+
+    def test_save_with_update_fields(self):
+        user = CustomUser.objects.get(id=self.author.id)
+        user.followers_count = 3
+        user.save(update_fields=["followers_count"])
+        self.assertEqual(self.user_counters(), {"author": 3, "reader": 0})
+
+    def test_count_expressions(self):
+        Followers.objects.create(user=self.author, following=self.reader, is_follow=True)
+        CommunityFollowers.objects.create(
+            community=Community.objects.create(name="python", description="Description"), user=self.reader
+        )
+        CustomUser.objects.update(**count_expressions(counted_rows()))
+        self.assertEqual(
+            list(CustomUser.objects.order_by("id").values_list("followers_count", "followings_count")),
+            [(1, 0), (0, 1)],
+        )
+
+    def test_reconcile_counters(self):
+        Followers.objects.create(user=self.author, following=self.reader, is_follow=True)
+        Followers.objects.create(user=self.reader, following=self.author, is_follow=False)
+        CustomUser.objects.filter(id=self.reader.id).update(followers_count=5)
+
+        drifted = reconcile_counters(CustomUser, counted_rows(), batch_size=1, dry_run=True)
+        self.assertEqual(drifted, {"followers_count": 2, "followings_count": 1})
+        self.assertEqual(self.user_counters(), {"author": 0, "reader": 5})
+
+        fixed = reconcile_counters(CustomUser, counted_rows(), batch_size=1)
+        self.assertEqual(fixed, drifted)
+        self.assertEqual(self.user_counters(), {"author": 1, "reader": 0})
+        self.assertEqual(reconcile_counters(CustomUser, counted_rows()), {"followers_count": 0, "followings_count": 0})
+
+    def test_reconcile_empty_table(self):
+        CommunityFollowers.objects.all().delete()
+        self.assertEqual(
+            reconcile_counters(Community, {"followers_count": (CommunityFollowers.objects.all(), "community")}),
+            {"followers_count": 0},
+        )
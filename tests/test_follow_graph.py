@@ -0,0 +1,70 @@
+import pytest
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.cache import cache_metrics, reset_cache_metrics
+from users.caches import follow_graph_cache
+from users.followers import follows, get_follower_ids, get_following_ids, get_mutual_ids, get_users_page, toggle_follow
+from users.models import CustomUser
+
+
+@pytest.mark.django_db
+class TestFollowGraph(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_metrics()
+        self.users = [
+            CustomUser.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="password")
+            for i in range(4)
+        ]
+        self.author = self.users[0]
+        for follower in self.users[1:]:
+            toggle_follow(self.author, follower)
+        toggle_follow(self.users[1], self.author)
+
+    def ids(self, *indexes):
+        return frozenset(self.users[i].id for i in indexes)
+
+    def test_adjacency(self):
+        self.assertEqual(get_follower_ids(self.author.id), self.ids(1, 2, 3))
+        self.assertEqual(get_following_ids(self.author.id), self.ids(1))
+        self.assertEqual(get_mutual_ids(self.author.id), self.ids(1))
+
+    def test_follows_is_cached(self):
+        self.assertTrue(follows(self.users[2].id, self.author.id))
+        with self.assertNumQueries(0):
+            self.assertTrue(follows(self.users[2].id, self.author.id))
+            self.assertFalse(follows(self.users[2].id, self.users[3].id))
+        self.assertEqual(cache_metrics()[follow_graph_cache.name]["hits"], 2)
+
+    def test_toggle_invalidates(self):
+        get_follower_ids(self.author.id)
+        get_following_ids(self.users[2].id)
+        toggle_follow(self.author, self.users[2])
+        self.assertEqual(get_follower_ids(self.author.id), self.ids(1, 3))
+        self.assertFalse(follows(self.users[2].id, self.author.id))
+
+    def test_deleted_user_leaves_graph(self):
+        get_follower_ids(self.author.id)
+        self.users[3].delete()
+        self.assertEqual(get_follower_ids(self.author.id), self.ids(1, 2))
+
+    def test_users_page(self):
+        followers = get_follower_ids(self.author.id)
+        first, cursor = get_users_page(followers, page_size=2)
+        self.assertEqual([user.username for user in first], ["user1", "user2"])
+        second, last_cursor = get_users_page(followers, after=cursor, page_size=2)
+        self.assertEqual([user.username for user in second], ["user3"])
+        self.assertIsNone(last_cursor)
+
+    def test_list_views(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse("user_followers", args=("user0",)))
+        self.assertEqual([user.username for user in response.context["object_list"]], ["user1", "user2", "user3"])
+        self.assertContains(response, "/user-page/user2/")
+
+        response = self.client.get(reverse("user_followings", args=("user0",)), {"after": self.users[1].id})
+        self.assertEqual(list(response.context["object_list"]), [])
+        self.assertEqual(self.client.get(reverse("user_followers", args=("user0",)), {"after": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("user_followers", args=("unknown",))).status_code, 404)
@@ -0,0 +1,83 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from app.models import Comments, Thread
+from users.models import CustomUser, Publication
+
+
+@pytest.mark.django_db
+class TestMainPageView(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(username="user", email="test@example.com", password="password")
+        self.publication_ct = ContentType.objects.get_for_model(Publication)
+        self.thread_ct = ContentType.objects.get_for_model(Thread)
+
+    def create_content(self, amount):
+        for i in range(amount):
+            publication = Publication.objects.create(
+                content_type=ContentType.objects.get_for_model(CustomUser),
+                author_id=self.user.id,
+                title=f"Publication {i}",
+                context="Context",
+            )
+            thread = Thread.objects.create(title=f"Thread {i}", context="Context", author=self.user)
+            Comments.objects.create(
+                user=self.user,
+                context=f"Publication comment {i}",
+                content_type=self.publication_ct,
+                object_id=publication.id,
+            )
+            Comments.objects.create(
+                user=self.user, context=f"Thread comment {i}", content_type=self.thread_ct, object_id=thread.id
+            )
+
+    def test_comments_attached_to_their_objects(self):
+        self.create_content(2)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.status_code, 200)
+
+        contents = response.context["contents"]
+        self.assertEqual(len(contents), 4)
+        for content in contents:
+            self.assertEqual(len(content["comments"]), 1)
+            comment = content["comments"][0]
+            self.assertEqual(comment.object_id, content["id"])
+            self.assertEqual(comment.content_type_id, content["content_type"].id)
+
+    def test_query_count_does_not_grow_with_feed(self):
+        self.client.force_login(self.user)
+        self.create_content(1)
+        small_feed = int(self.client.get(reverse("index"))["X-Query-Count"])
+
+        self.create_content(20)
+        large_feed = int(self.client.get(reverse("index"))["X-Query-Count"])
+
+        self.assertEqual(small_feed, large_feed)
+
+    def test_feed_pages_through_all_items(self):
+        self.create_content(15)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("index"))
+        self.assertEqual(len(response.context["contents"]), 20)
+        seen = [(content["content_type"].id, content["id"]) for content in response.context["contents"]]
+
+        cursor = response.context["next_cursor"]
+        while cursor:
+            response = self.client.get(reverse("feed"), {"cursor": cursor})
+            self.assertEqual(response.status_code, 200)
+            seen += [(content["content_type"].id, content["id"]) for content in response.context["contents"]]
+            cursor = response.json()["next_cursor"]
+
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(set(seen)), 30)
+        published = [content["published_at"] for content in response.context["contents"]]
+        self.assertEqual(published, sorted(published, reverse=True))
+
+    def test_feed_invalid_cursor(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("feed"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,34 @@
+import pytest
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from benchmarks.query_budgets import QUERY_BUDGETS, SKIPPED_ROUTES, route_names, seed, view_requests
+from core.middleware import QueryCountMiddleware
+
+
+@pytest.mark.django_db
+class TestQueryBudgets(TestCase):
+    def test_every_route_has_budget(self):
+        missing = [name for name in route_names() if name not in QUERY_BUDGETS and name not in SKIPPED_ROUTES]
+        self.assertEqual(missing, [])
+
+    def test_views_within_budget(self):
+        data = seed(scale=0.01)
+        requests = view_requests(data)
+        self.assertEqual({name for name, path, user in requests}, set(QUERY_BUDGETS))
+
+        for name, path, user in requests:
+            with self.subTest(name):
+                if user:
+                    self.client.force_login(user)
+                else:
+                    self.client.logout()
+                response = self.client.get(path)
+                self.assertLess(response.status_code, 400)
+                self.assertLessEqual(int(response[QueryCountMiddleware.header_name]), QUERY_BUDGETS[name])
+
+    def test_header_disabled(self):
+        with override_settings(QUERY_COUNT_HEADER=False):
+            response = Client().get(reverse("index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(QueryCountMiddleware.header_name, response)
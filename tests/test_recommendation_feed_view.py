@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from app.models import TimelineEntry
+from users.models import CustomUser, Publication
+
+
+@pytest.mark.django_db
+class TestRecommendationFeedView(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.author = CustomUser.objects.create_user(username="author", email="<EMAIL>", password="<PASSWORD>")
+        self.follower = CustomUser.objects.create_user(username="follower", email="<EMAIL>", password="<PASSWORD>")
+        self.publication_data = {
+            "author_id": self.author.id,
+            "title": "New Post",
+            "context": "updated_contextxcvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvvv",
+        }
+
+    def follow_author(self):
+        self.client.force_login(self.follower)
+        url = reverse("user_page", kwargs={"username": self.author.username})
+        self.client.post(url, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+    def create_publication(self):
+        self.client.force_login(self.author)
+        url = reverse("new_publication", kwargs={"username": self.author.username})
+        self.client.post(url, self.publication_data)
+        return Publication.objects.get(title="New Post")
+
+    def test_publication_fanned_out_to_followers(self):
+        self.follow_author()
+        publication = self.create_publication()
+        self.assertTrue(publication.fanned_out)
+        self.assertTrue(TimelineEntry.objects.filter(user=self.follower, publication=publication).exists())
+
+        self.client.force_login(self.follower)
+        response = self.client.get(reverse("recommendations"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["content_from_follow"], [publication])
+
+    def test_unfollow_removes_author_from_timeline(self):
+        self.follow_author()
+        self.create_publication()
+        self.follow_author()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.follower).exists())
+
+        response = self.client.get(reverse("recommendations"))
+        self.assertEqual(response.context["content_from_follow"], [])
+
+    def test_popular_author_read_on_request(self):
+        self.follow_author()
+        with patch("app.timeline.TIMELINE_FANOUT_LIMIT", 0):
+            publication = self.create_publication()
+        self.assertFalse(publication.fanned_out)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+        self.client.force_login(self.follower)
+        response = self.client.get(reverse("recommendations"))
+        self.assertEqual(response.context["content_from_follow"], [publication])
@@ -0,0 +1,66 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from app.models import Thread
+from app.search import search
+from community.models import Community
+from users.models import CustomUser, Publication
+
+
+@pytest.mark.django_db
+class TestSearchView(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(username="pythonista", email="<EMAIL>", password="<PASSWORD>")
+        self.title_thread = Thread.objects.create(
+            title="Python decorators", context="How do they work?", author=self.user
+        )
+        self.context_thread = Thread.objects.create(
+            title="Question about loops", context="I am learning python and loops confuse me", author=self.user
+        )
+        self.community = Community.objects.create(name="Python community", description="")
+        self.publication = Publication.objects.create(
+            content_type=ContentType.objects.get_for_model(CustomUser),
+            author_id=self.user.id,
+            title="Release notes",
+            context="New python version released",
+        )
+
+    def test_search_covers_all_sources(self):
+        response = self.client.get(reverse("search"), {"search": "pyth"})
+        self.assertEqual(response.status_code, 200)
+        links = [result["link"] for result in response.context["results"]]
+        self.assertIn(f"/user-page/{self.user.username}/", links)
+        self.assertIn(f"/thread-detail/{self.title_thread.id}", links)
+        self.assertIn(f"/thread-detail/{self.context_thread.id}", links)
+        self.assertIn(f"/community/name-{self.community.name}/", links)
+        self.assertIn(f"/publication/{self.publication.id}/", links)
+
+    def test_title_match_ranked_above_context_match(self):
+        response = self.client.get(reverse("search"), {"search": "python"})
+        links = [result["link"] for result in response.context["results"]]
+        self.assertLess(
+            links.index(f"/thread-detail/{self.title_thread.id}"),
+            links.index(f"/thread-detail/{self.context_thread.id}"),
+        )
+
+    def test_search_vector_updated_on_save(self):
+        self.title_thread.title = "Rust lifetimes"
+        self.title_thread.save()
+        response = self.client.get(reverse("search"), {"search": "lifetimes"})
+        self.assertEqual(
+            [result["link"] for result in response.context["results"]], [f"/thread-detail/{self.title_thread.id}"]
+        )
+
+    def test_results_limited(self):
+        self.assertEqual(len(search("python", limit=2)), 2)
+
+    def test_rows_without_search_vector(self):
+        Thread.objects.bulk_create([Thread(title="Python bulk", context="No vector", author=self.user)])
+        response = self.client.get(reverse("search"), {"search": "python"})
+        self.assertEqual(response.status_code, 200)
+        results = response.context["results"]
+        self.assertEqual(results[-1]["title"], "Python bulk")
+        self.assertEqual(results[-1]["rank"], 0.0)
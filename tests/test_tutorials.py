@@ -0,0 +1,199 @@
+import io
+import tempfile
+from pathlib import Path
+
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from app.models import ProgrammingLanguage, SubSection, TutorialPage
+from app.tutorials import (
+    get_languages,
+    get_navigation,
+    import_tutorials,
+    parse_page,
+    subsection_anchors,
+    tutorial_cache,
+)
+
+INTRODUCTION = """# Introduction
+
+Python is a *programming* language.
+
+## Installation
+
+```
+pip install django
+```
+
+## First program
+
+Print a greeting.
+"""
+
+
+@pytest.mark.django_db
+class TestTutorialImport(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = Path(tempfile.mkdtemp())
+        self.write("mainpy/README.md", "# Python\n")
+        self.write("mainpy/01-introduction.md", INTRODUCTION)
+        self.write("mainpy/02-control-flow.md", "Text without headings")
+
+    def write(self, name, text):
+        path = self.directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def test_parse_page(self):
+        title, sections = parse_page(INTRODUCTION, "default")
+        self.assertEqual(title, "Introduction")
+        self.assertEqual([section_title for section_title, content in sections], ["", "Installation", "First program"])
+        self.assertEqual(parse_page("Only text", "default"), ("default", [("", "Only text")]))
+
+    def test_import(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            stats = import_tutorials(self.directory)
+        self.assertEqual(stats, {"languages": 1, "pages": 2, "subsections": 4, "deleted_pages": 0})
+
+        language = ProgrammingLanguage.objects.get(slug="mainpy")
+        self.assertEqual(language.name, "Python")
+        pages = list(language.pages.all())
+        self.assertEqual([page.title for page in pages], ["Introduction", "control flow"])
+        subsection = SubSection.objects.get(page=pages[0], title="Installation")
+        self.assertIn("<code>pip install django", subsection.content_html)
+        self.assertIn("<em>programming</em>", SubSection.objects.get(page=pages[0], order=1).content_html)
+
+    def test_reimport_keeps_page_ids(self):
+        import_tutorials(self.directory)
+        page = TutorialPage.objects.get(order=1)
+
+        (self.directory / "mainpy/02-control-flow.md").unlink()
+        self.write("mainpy/01-introduction.md", "# Getting started\n\nNew text")
+        stats = import_tutorials(self.directory)
+
+        self.assertEqual(stats["deleted_pages"], 1)
+        self.assertEqual(list(TutorialPage.objects.values_list("id", "title")), [(page.id, "Getting started")])
+        self.assertEqual(list(SubSection.objects.values_list("content", flat=True)), ["New text"])
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command("import_tutorials", str(self.directory), stdout=stdout)
+        self.assertIn("Imported 1 languages, 2 pages", stdout.getvalue())
+
+
+@pytest.mark.django_db
+class TestTutorialPageView(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = Path(tempfile.mkdtemp())
+        (self.directory / "mainpy").mkdir()
+        (self.directory / "mainpy/01-introduction.md").write_text(INTRODUCTION)
+        with self.captureOnCommitCallbacks(execute=True):
+            import_tutorials(self.directory)
+        self.page = TutorialPage.objects.get()
+        self.url = reverse("tutorials", args=("mainpy", self.page.id))
+
+    def test_cached_page_makes_no_queries(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "<em>programming</em>", html=True)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "<em>programming</em>", html=True)
+
+    def test_import_invalidates_cache(self):
+        self.client.get(self.url)
+        (self.directory / "mainpy/01-introduction.md").write_text("# Introduction\n\nUpdated **text**")
+        with self.captureOnCommitCallbacks(execute=True):
+            import_tutorials(self.directory)
+
+        response = self.client.get(self.url)
+        self.assertContains(response, "<strong>text</strong>", html=True)
+
+    def test_import_bumps_cache_once(self):
+        import_tutorials(self.directory)
+        (self.directory / "mainpy/01-introduction.md").write_text("# Introduction\n\nUpdated **text**")
+        with mock.patch.object(tutorial_cache, "bump") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                import_tutorials(self.directory)
+        bump.assert_called_once_with()
+
+    def test_unknown_page(self):
+        response = self.client.get(reverse("tutorials", args=("mainpy", self.page.id + 1)))
+        self.assertEqual(response.status_code, 404)
+
+
+@pytest.mark.django_db
+class TestTutorialNavigation(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = Path(tempfile.mkdtemp())
+        (self.directory / "mainpy").mkdir()
+        (self.directory / "mainpy/README.md").write_text("# Python")
+        (self.directory / "mainpy/01-introduction.md").write_text(INTRODUCTION)
+        (self.directory / "mainpy/02-loops.md").write_text("## For\n\nText\n\n## For\n\nMore text")
+        (self.directory / "mainjs").mkdir()
+        with self.captureOnCommitCallbacks(execute=True):
+            import_tutorials(self.directory)
+        self.first, self.second = TutorialPage.objects.filter(language__slug="mainpy")
+
+    def test_subsection_anchors(self):
+        self.assertEqual(
+            subsection_anchors(["For loop", "", "For loop", "?"]),
+            [
+                {"id": "for-loop", "title": "For loop"},
+                {"id": "for-loop-2", "title": "For loop"},
+                {"id": "section", "title": "?"},
+            ],
+        )
+
+    def test_navigation(self):
+        navigation = get_navigation("mainpy")
+        self.assertEqual(navigation["url"], reverse("tutorials", args=("mainpy", self.first.id)))
+        first, second = navigation["pages"]
+        self.assertIsNone(first["previous"])
+        self.assertEqual(first["next"], {"title": "loops", "url": second["url"]})
+        self.assertEqual(second["previous"], {"title": "Introduction", "url": first["url"]})
+        self.assertIsNone(second["next"])
+        self.assertEqual([anchor["id"] for anchor in first["anchors"]], ["installation", "first-program"])
+        self.assertEqual([anchor["id"] for anchor in second["anchors"]], ["for", "for-2"])
+        self.assertIsNone(get_navigation("unknown"))
+
+    def test_navigation_is_cached_until_tutorials_change(self):
+        get_navigation("mainpy")
+        with self.assertNumQueries(0):
+            get_navigation("mainpy")
+
+        self.second.title = "Loops"
+        self.second.save()
+        self.assertEqual(get_navigation("mainpy")["pages"][1]["title"], "Loops")
+
+    def test_languages_without_pages_are_not_listed(self):
+        self.assertEqual(get_languages(), [{"name": "Python", "slug": "mainpy", "url": self.first_url()}])
+        with self.assertNumQueries(0):
+            get_languages()
+
+    def test_page_links(self):
+        response = self.client.get(reverse("tutorials", args=("mainpy", self.first.id)))
+        self.assertContains(response, '<h3 id="installation">Installation</h3>', html=True)
+        self.assertContains(response, '<a href="#first-program">First program</a>', html=True)
+        self.assertContains(
+            response, f'<a href="{reverse("tutorials", args=("mainpy", self.second.id))}">loops &rarr;</a>', html=True
+        )
+
+    def test_page_of_other_language(self):
+        response = self.client.get(reverse("tutorials", args=("mainjs", self.first.id)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_main_page_links(self):
+        response = self.client.get(reverse("index"))
+        self.assertContains(response, f'<a href="{self.first_url()}">Python</a>', html=True)
+
+    def first_url(self):
+        return reverse("tutorials", args=("mainpy", self.first.id))
@@ -0,0 +1,69 @@
+import io
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase
+
+from app.models import Comments, Thread, TimelineEntry, TutorialPage
+from community.models import Community, CommunityFollowers
+from users.models import Chat, ChatReadState, CustomUser, Followers, Message, Publication
+
+
+@pytest.mark.django_db
+class TestUploadData(TestCase):
+    def load(self, prefix, method="copy", *args):
+        call_command("upload_data", *args, scale=0.005, prefix=prefix, method=method, stdout=io.StringIO())
+
+    def test_generated_data_is_consistent(self):
+        self.load("load")
+
+        users = CustomUser.objects.filter(username__startswith="load_")
+        self.assertEqual(users.count(), 50)
+        self.assertEqual(Community.objects.filter(name__startswith="load_").count(), 2)
+        self.assertEqual(Thread.objects.count(), 100)
+        self.assertTrue(Comments.objects.exists())
+        self.assertEqual(TutorialPage.objects.filter(language__slug="mainpy").count(), 20)
+
+        for user in users:
+            self.assertEqual(user.followers_count, Followers.objects.filter(user=user).count())
+            self.assertEqual(user.followings_count, Followers.objects.filter(following=user).count())
+
+        # Publications are fanned out to the timelines of followers of their author or community
+        publication = Publication.objects.filter(content_type=ContentType.objects.get_for_model(CustomUser)).first()
+        self.assertTrue(publication.fanned_out)
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(publication=publication).values_list("user_id", flat=True)),
+            set(Followers.objects.filter(user_id=publication.author_id).values_list("following_id", flat=True)),
+        )
+        post = Publication.objects.filter(posts__isnull=False).first()
+        self.assertTrue(post.fanned_out)
+        self.assertEqual(
+            TimelineEntry.objects.filter(publication=post).count(),
+            CommunityFollowers.objects.filter(community__posts=post).count(),
+        )
+
+        chat = Chat.objects.first()
+        last_message = Message.objects.filter(chat=chat).order_by("-date_added", "-id").first()
+        self.assertEqual(chat.last_message_preview, last_message.context)
+        for state in ChatReadState.objects.filter(chat=chat):
+            self.assertEqual(state.last_message_at, last_message.date_added)
+            self.assertEqual(state.last_read_message_id, last_message.id)
+
+    def test_same_seed_same_data(self):
+        self.load("first")
+        first = list(Thread.objects.order_by("id").values_list("title", flat=True))
+        Thread.objects.all().delete()
+        self.load("second")
+        second = list(Thread.objects.order_by("id").values_list("title", flat=True))
+        self.assertEqual(first, second)
+
+    def test_bulk_create_method(self):
+        self.load("bulk", method="bulk")
+        self.assertEqual(CustomUser.objects.filter(username__startswith="bulk_").count(), 50)
+        self.assertEqual(Thread.objects.count(), 100)
+
+    def test_without_fan_out(self):
+        self.load("pull", "copy", "--no-fan-out")
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(Publication.objects.filter(fanned_out=True).exists())
@@ -0,0 +1,64 @@
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users.followers import toggle_follow
+from users.models import CustomUser, Followers
+from users.tasks import reconcile_follow_counters
+
+
+@pytest.mark.django_db
+class TestUserCounters(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username="author", email="author@example.com", password="pass")
+        self.reader = CustomUser.objects.create_user(username="reader", email="reader@example.com", password="pass")
+
+    def counters(self):
+        return list(CustomUser.objects.order_by("id").values_list("followers_count", "followings_count"))
+
+    def test_toggle_follow(self):
+        self.assertTrue(toggle_follow(self.author, self.reader))
+        self.assertEqual(self.counters(), [(1, 0), (0, 1)])
+        self.assertFalse(toggle_follow(self.author, self.reader))
+        self.assertEqual(self.counters(), [(0, 0), (0, 0)])
+
+    def test_duplicate_follow_rejected(self):
+        Followers.objects.create(user=self.author, following=self.reader)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Followers.objects.create(user=self.author, following=self.reader, is_follow=True)
+
+    def test_toggle_reuses_row(self):
+        for _ in range(3):
+            toggle_follow(self.author, self.reader)
+        self.assertEqual(Followers.objects.count(), 1)
+        self.assertEqual(self.counters(), [(1, 0), (0, 1)])
+
+    def test_unfollow_keeps_counters_non_negative(self):
+        Followers.objects.create(user=self.author, following=self.reader, is_follow=True)
+        self.assertFalse(toggle_follow(self.author, self.reader))
+        self.assertEqual(self.counters(), [(0, 0), (0, 0)])
+
+    def test_follow_view(self):
+        self.client.force_login(self.reader)
+        url = reverse("user_page", args=("author",))
+        response = self.client.post(url, data={"action": "follow"}, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(response.json(), {"followers_count": 1, "is_following": True})
+        self.assertEqual(self.counters(), [(1, 0), (0, 1)])
+
+    def test_profile_reads_counters(self):
+        CustomUser.objects.filter(id=self.author.id).update(followers_count=12, followings_count=3)
+        self.client.force_login(self.reader)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("user_page", args=("author",)))
+        self.assertEqual((response.context["followers_count"], response.context["followings_count"]), (12, 3))
+        self.assertFalse([query["sql"] for query in queries if "COUNT(" in query["sql"]])
+
+    def test_reconcile_task(self):
+        Followers.objects.create(user=self.author, following=self.reader, is_follow=True)
+
+        with self.assertLogs("users.tasks", "WARNING"):
+            fixed = reconcile_follow_counters.apply(kwargs={"batch_size": 1}).get()
+        self.assertEqual(fixed, {"followers_count": 1, "followings_count": 1})
+        self.assertEqual(self.counters(), [(1, 0), (0, 1)])
@@ -1,3 +1,6 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 import pytest
@@ -5,13 +8,18 @@ from allauth.socialaccount import providers
 from allauth.socialaccount.models import SocialAccount
 from bs4 import BeautifulSoup
 from django.contrib.contenttypes.models import ContentType
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
+from app.constants import CHAT_LIST_PAGE_SIZE, CHAT_PAGE_SIZE
 from app.models import Comments
-from users.models import CustomUser, Publication
+from users.models import Chat, ChatReadState, ChatUpload, CustomUser, Message, Publication
+from users.read_state import mark_read, message_sent
 
 
 @pytest.mark.django_db
@@ -230,3 +238,190 @@ class TestCommentsView(TestCase):
         response = self.client.post(url)
         self.assertEqual(response.status_code, 204)
         self.assertFalse(Comments.objects.filter(pk=self.comment.pk).exists())
+
+
+@pytest.mark.django_db
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestChatUploadView(TestCase):
+    def setUp(self):
+        self.sender = CustomUser.objects.create_user(username="sender", password="password", email="<EMAIL>")
+        self.recipient = CustomUser.objects.create_user(username="recipient", password="password", email="<EMAIL>")
+        self.stranger = CustomUser.objects.create_user(username="stranger", password="password", email="<EMAIL>")
+        self.chat = Chat.objects.create(sender=self.sender, recipient=self.recipient)
+        self.url = reverse("chat_upload", kwargs={"chat_id": self.chat.id})
+
+    def test_upload_attachment(self):
+        self.client.force_login(self.sender)
+        file = SimpleUploadedFile("note.txt", b"attachment", content_type="text/plain")
+        response = self.client.post(self.url, {"kind": "attachment", "file": file})
+        self.assertEqual(response.status_code, 201)
+        upload = ChatUpload.objects.get(id=response.json()["id"])
+        self.assertEqual(
+            (upload.chat, upload.user, upload.kind, upload.size), (self.chat, self.sender, "attachment", 10)
+        )
+        self.assertEqual(response.json()["url"], upload.file.url)
+
+    def test_upload_rejected(self):
+        self.client.force_login(self.sender)
+        file = SimpleUploadedFile("note.txt", b"attachment", content_type="text/plain")
+        response = self.client.post(self.url, {"kind": "video", "file": file})
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_login(self.stranger)
+        file = SimpleUploadedFile("note.txt", b"attachment", content_type="text/plain")
+        response = self.client.post(self.url, {"kind": "attachment", "file": file})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ChatUpload.objects.exists())
+
+    @patch("users.views.CHAT_UPLOAD_MAX_SIZE", 1024)
+    def test_upload_too_large(self):
+        self.client.force_login(self.sender)
+        file = SimpleUploadedFile("voice.ogg", b"0" * 2048, content_type="audio/ogg")
+        response = self.client.post(self.url, {"kind": "voice", "file": file})
+        self.assertEqual(response.status_code, 413)
+        self.assertFalse(ChatUpload.objects.exists())
+
+    def test_malformed_content_length(self):
+        self.client.force_login(self.sender)
+        response = self.client.post(self.url, CONTENT_LENGTH="ten")
+        self.assertEqual(response.status_code, 400)
+
+    def test_delete_unclaimed_uploads(self):
+        self.client.force_login(self.sender)
+        for name in ("old.txt", "new.txt"):
+            file = SimpleUploadedFile(name, b"attachment", content_type="text/plain")
+            self.client.post(self.url, {"kind": "attachment", "file": file})
+        old = ChatUpload.objects.get(file__endswith="old.txt")
+        ChatUpload.objects.filter(id=old.id).update(uploaded_at=timezone.now() - timedelta(days=2))
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("delete_unclaimed_uploads", stdout=out)
+        self.assertIn("Deleted 1 unclaimed chat uploads", out.getvalue())
+        self.assertTrue(ChatUpload.objects.get().file.name.startswith("chat_uploads/new"))
+        self.assertFalse(old.file.storage.exists(old.file.name))
+
+
+@pytest.mark.django_db
+class TestChatHistoryView(TestCase):
+    def setUp(self):
+        self.sender = CustomUser.objects.create_user(username="sender", password="password", email="<EMAIL>")
+        self.recipient = CustomUser.objects.create_user(username="recipient", password="password", email="<EMAIL>")
+        self.stranger = CustomUser.objects.create_user(username="stranger", password="password", email="<EMAIL>")
+        self.chat = Chat.objects.create(sender=self.sender, recipient=self.recipient)
+        self.messages_count = CHAT_PAGE_SIZE * 2 + 1
+        Message.objects.bulk_create(
+            [Message(chat=self.chat, user=self.sender, context=f"Message {i}") for i in range(self.messages_count)]
+        )
+
+    def test_history_pages(self):
+        self.client.force_login(self.recipient)
+        response = self.client.get(reverse("conversation", kwargs={"username": self.sender.username}))
+        self.assertEqual(response.status_code, 200)
+        soup = BeautifulSoup(response.content, "html.parser")
+        pages = [[p.text for p in soup.select(".message p")]]
+
+        cursor = soup.find("div", {"class": "message-container"})["data-cursor"]
+        url = reverse("chat_history", kwargs={"chat_id": self.chat.id})
+        while cursor:
+            response = self.client.get(url, {"cursor": cursor})
+            soup = BeautifulSoup(response.json()["html"], "html.parser")
+            pages.append([p.text for p in soup.select(".message p")])
+            cursor = response.json()["next_cursor"]
+
+        self.assertEqual([len(page) for page in pages], [CHAT_PAGE_SIZE, CHAT_PAGE_SIZE, 1])
+        # Every page is chronological, older pages are prepended
+        loaded = [text for page in reversed(pages) for text in page]
+        self.assertEqual(loaded, [f"Message {i}" for i in range(self.messages_count)])
+
+    def test_history_rejected(self):
+        url = reverse("chat_history", kwargs={"chat_id": self.chat.id})
+        self.client.force_login(self.sender)
+        self.assertEqual(self.client.get(url, {"cursor": "invalid"}).status_code, 400)
+
+        self.client.force_login(self.stranger)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_unread_counter(self):
+        self.client.force_login(self.recipient)
+        response = self.client.get(reverse("user-chats"))
+        soup = BeautifulSoup(response.content, "html.parser")
+        self.assertEqual(soup.find("span", {"class": "unread-count"}), None)
+
+        ChatReadState.objects.filter(chat=self.chat, user=self.recipient).update(unread_count=self.messages_count)
+        response = self.client.get(reverse("user-chats"))
+        soup = BeautifulSoup(response.content, "html.parser")
+        self.assertEqual(soup.find("span", {"class": "unread-count"}).text, str(self.messages_count))
+
+        # Opening the conversation reads it up to the latest message
+        self.client.get(reverse("conversation", kwargs={"username": self.sender.username}))
+        read_state = ChatReadState.objects.get(chat=self.chat, user=self.recipient)
+        self.assertEqual(read_state.unread_count, 0)
+        self.assertEqual(read_state.last_read_message_id, Message.objects.latest("id").id)
+
+    def test_read_position_from_client(self):
+        messages = list(Message.objects.filter(chat=self.chat).order_by("id").values_list("id", flat=True))
+        other_chat = Chat.objects.create(sender=self.stranger, recipient=self.recipient)
+        foreign = Message.objects.create(chat=other_chat, user=self.stranger, context="Other chat")
+        ChatReadState.objects.filter(chat=self.chat, user=self.recipient).update(unread_count=self.messages_count)
+
+        # Unknown and earlier ids are ignored, ids beyond the chat resolve to its last message up to them
+        self.assertEqual(mark_read(self.chat.id, self.recipient.id, 0), self.messages_count)
+        self.assertEqual(mark_read(self.chat.id, self.recipient.id, messages[9]), self.messages_count - 10)
+        self.assertEqual(mark_read(self.chat.id, self.recipient.id, messages[3]), self.messages_count - 10)
+        self.assertEqual(mark_read(self.chat.id, self.recipient.id, foreign.id), 0)
+        read_state = ChatReadState.objects.get(chat=self.chat, user=self.recipient)
+        self.assertEqual(read_state.last_read_message_id, messages[-1])
+        self.assertEqual(mark_read(self.chat.id, self.recipient.id, 10**9), 0)
+
+
+@pytest.mark.django_db
+class TestChatListView(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="user", password="password", email="<EMAIL>")
+        others = CustomUser.objects.bulk_create(
+            [CustomUser(username=f"other{i}", email=f"{i}<EMAIL>") for i in range(CHAT_LIST_PAGE_SIZE + 1)]
+        )
+        self.chats = [Chat.objects.create(sender=self.user, recipient=other) for other in others]
+
+    def send(self, chat, user, context):
+        message = Message.objects.create(chat=chat, user=user, context=context)
+        message_sent(message, chat.recipient_id if user.id == chat.sender_id else chat.sender_id)
+
+    def chat_names(self, response):
+        soup = BeautifulSoup(response.content, "html.parser")
+        return [a.text for a in soup.select(".chat-preview a")], soup.find("a", {"id": "next-page"})
+
+    def test_chats_ordered_by_activity(self):
+        self.send(self.chats[0], self.chats[0].recipient, "Oldest chat is active again")
+        self.send(self.chats[1], self.user, "Hello")
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("user-chats"))
+        names, next_page = self.chat_names(response)
+        self.assertEqual(names[:2], ["other1", "other0"])
+        self.assertEqual(len(names), CHAT_LIST_PAGE_SIZE)
+
+        soup = BeautifulSoup(response.content, "html.parser")
+        preview = soup.select(".chat-preview")[1]
+        self.assertEqual(preview.find("span", {"class": "unread-count"}).text, "1")
+        self.assertEqual(preview.find("p", {"class": "last-message"}).text, "Oldest chat is active again")
+
+        response = self.client.get(reverse("user-chats") + next_page["href"])
+        names, next_page = self.chat_names(response)
+        self.assertEqual(len(names), 1)
+        self.assertIsNone(next_page)
+
+        # Only the recipient's counter grows
+        self.assertEqual(ChatReadState.objects.get(chat=self.chats[1], user=self.user).unread_count, 0)
+
+    def test_query_count_does_not_depend_on_chats(self):
+        self.client.force_login(self.user)
+        first_page = self.client.get(reverse("user-chats"))
+        _, next_page = self.chat_names(first_page)
+        last_page = self.client.get(reverse("user-chats") + next_page["href"])
+        self.assertEqual(first_page["X-Query-Count"], last_page["X-Query-Count"])
+
+    def test_invalid_cursor(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("user-chats"), {"cursor": "invalid"}).status_code, 400)
@@ -0,0 +1,7 @@
+from app.constants import FOLLOW_GRAPH_CACHE_TTL
+from core.cache import CacheNamespace
+
+# Usernames of all users shown by AllUsers
+user_list_cache = CacheNamespace("users:list")
+# Follower and following id sets of single users, entries are dropped by the Followers signals
+follow_graph_cache = CacheNamespace("users:follow_graph", timeout=FOLLOW_GRAPH_CACHE_TTL)
@@ -0,0 +1,70 @@
+from django.db.models import Q
+
+from app.constants import CHAT_LIST_PAGE_SIZE, CHAT_PAGE_SIZE
+from core.helpers import decode_cursor, encode_cursor
+from .models import Chat, ChatReadState, CustomUser, Message
+
+
+def get_message_page(
+    chat: Chat, cursor: str | None = None, page_size: int = CHAT_PAGE_SIZE
+) -> tuple[list[Message], str | None]:
+    """
+    Reads one page of chat history, going back from the newest message.
+    Every page is a range read over the (chat, date_added, id) index, so its cost does not depend
+    on the length of the conversation.
+
+    :param chat: Chat whose messages are read
+    :param cursor: Cursor returned with the previous (newer) page, None for the latest messages
+    :param page_size: Number of messages on the page
+    :return: Tuple of messages in chronological order and the cursor of the older page (None on the oldest page)
+    :raise ValueError: If the cursor is malformed
+    """
+    queryset = Message.objects.filter(chat=chat).select_related("user").order_by("-date_added", "-id")
+    if cursor:
+        date_added, message_id = decode_cursor(cursor, 1)
+        queryset = queryset.filter(Q(date_added__lt=date_added) | Q(date_added=date_added, id__lt=message_id))
+
+    messages = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(messages) > page_size:
+        last = messages[page_size - 1]
+        next_cursor = encode_cursor(last.date_added, last.id)
+    return messages[:page_size][::-1], next_cursor
+
+
+def get_inbox_page(
+    user: CustomUser, cursor: str | None = None, page_size: int = CHAT_LIST_PAGE_SIZE
+) -> tuple[list[ChatReadState], str | None]:
+    """
+    Reads one page of the user's chats ordered by recent activity.
+    The page is a single range read over the (user, last_message_at, id) index with both participants joined.
+
+    :param user: Inbox owner
+    :param cursor: Cursor returned with the previous page, None for the most recent chats
+    :param page_size: Number of chats on the page
+    :return: Tuple of inbox rows and the cursor of the next page (None on the last page),
+        every row got 'counterpart' (CustomUser) - the other participant of the chat
+    :raise ValueError: If the cursor is malformed
+    """
+    queryset = (
+        ChatReadState.objects.filter(user=user)
+        .select_related("chat__sender", "chat__recipient")
+        .order_by("-last_message_at", "-id")
+    )
+    if cursor:
+        last_message_at, state_id = decode_cursor(cursor, 1)
+        queryset = queryset.filter(
+            Q(last_message_at__lt=last_message_at) | Q(last_message_at=last_message_at, id__lt=state_id)
+        )
+
+    states = list(queryset[: page_size + 1])
+    next_cursor = None
+    if len(states) > page_size:
+        last = states[page_size - 1]
+        next_cursor = encode_cursor(last.last_message_at, last.id)
+
+    states = states[:page_size]
+    for state in states:
+        chat = state.chat
+        state.counterpart = chat.recipient if chat.sender_id == user.id else chat.sender
+    return states, next_cursor
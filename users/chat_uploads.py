@@ -0,0 +1,37 @@
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from app.constants import CHAT_UPLOAD_TTL
+from .models import ChatUpload
+
+
+def delete_files(names: list[str]) -> None:
+    storage = ChatUpload.file.field.storage
+    for name in names:
+        storage.delete(name)
+
+
+def delete_unclaimed_uploads(max_age: int = CHAT_UPLOAD_TTL, batch_size: int = 1000) -> int:
+    """
+    Deletes uploads that no chat message claimed within max_age together with their files.
+    A claimed upload loses its row but keeps the file, which belongs to the message then.
+
+    :param max_age: Seconds an upload waits for its message
+    :param batch_size: Number of uploads deleted per transaction
+    :return: Number of deleted uploads
+    """
+    expired = ChatUpload.objects.filter(uploaded_at__lt=timezone.now() - timedelta(seconds=max_age))
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            # Uploads being claimed by a message right now are locked and left for the next run
+            uploads = list(expired.select_for_update(skip_locked=True)[:batch_size])
+            if not uploads:
+                return deleted
+            ChatUpload.objects.filter(id__in=[upload.id for upload in uploads]).delete()
+            # Files are removed only once the rows are gone for good
+            transaction.on_commit(partial(delete_files, [upload.file.name for upload in uploads]))
+        deleted += len(uploads)
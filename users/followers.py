@@ -0,0 +1,141 @@
+import heapq
+
+from django.db import connection, transaction
+from django.db.models import Case, F, When
+from django.db.models.functions import Greatest
+
+from app.constants import USER_FOLLOWERS_PAGE_SIZE
+from core import counters
+from core.counters import CountedRows
+from .caches import follow_graph_cache
+from .models import CustomUser, Followers
+
+# ------------------------ COUNTERS ------------------------
+
+
+def counted_rows() -> CountedRows:
+    """
+    Followers(user=X, following=Y) means that Y follows X, so followers are counted by 'user'
+    and followings by 'following'
+
+    :return: Rows counted by every denormalized CustomUser counter, keyed by the counter field
+    """
+    follows = Followers.objects.filter(is_follow=True)
+    return {"followers_count": (follows, "user"), "followings_count": (follows, "following")}
+
+
+@transaction.atomic
+def toggle_follow(user: CustomUser, follower: CustomUser) -> bool:
+    """
+    Makes the follower follow the user or stop following and moves the followers counter of the user
+    and the followings counter of the follower with one UPDATE, concurrent toggles are not lost
+
+    :param user: Followed user
+    :param follower: Requesting user
+    :return: True if the follower follows the user now
+    """
+    # A concurrent first follow hits unique_follower, get_or_create rolls back its savepoint
+    # and reads (and locks) the committed row instead
+    follow, created = Followers.objects.select_for_update().get_or_create(user=user, following=follower)
+    follow.is_follow = not follow.is_follow
+    follow.save(update_fields=["is_follow"])
+
+    # Clamped at 0, a counter that missed the follow must not go negative on the unfollow
+    delta = 1 if follow.is_follow else -1
+    CustomUser.objects.filter(id__in=(user.id, follower.id)).update(
+        followers_count=Case(
+            When(id=user.id, then=Greatest(F("followers_count") + delta, 0)), default=F("followers_count")
+        ),
+        followings_count=Case(
+            When(id=follower.id, then=Greatest(F("followings_count") + delta, 0)), default=F("followings_count")
+        ),
+    )
+    return follow.is_follow
+
+
+def reconcile_counters(batch_size: int = 10000, dry_run: bool = False) -> dict[str, int]:
+    """
+    Recounts the followers and followings counters of all users and fixes those that drifted
+    (e.g. after follows were deleted together with a user)
+
+    :return: Number of drifted users per counter field
+    """
+    return counters.reconcile_counters(CustomUser, counted_rows(), batch_size, dry_run)
+
+
+# ------------------------ GRAPH ------------------------
+
+# Adjacency direction: Followers field of the user whose set is read, Followers field of the ids in the set
+ADJACENCY = {"followers": ("user_id", "following_id"), "followings": ("following_id", "user_id")}
+
+
+def get_adjacency(direction: str, user_id: int) -> frozenset[int]:
+    """
+    Reads the ids of users adjacent to the user in the follow graph, the set is cached until a follow of the user changes
+
+    :param direction: 'followers' for users following the user, 'followings' for users the user follows
+    :param user_id: User ID
+    :return: Set of user ids
+    """
+    own_field, other_field = ADJACENCY[direction]
+
+    def compute():
+        follows = Followers.objects.filter(is_follow=True, **{own_field: user_id})
+        return frozenset(follows.values_list(other_field, flat=True))
+
+    return follow_graph_cache.get_or_compute(f"{direction}:{user_id}", compute)
+
+
+def get_follower_ids(user_id: int) -> frozenset[int]:
+    return get_adjacency("followers", user_id)
+
+
+def get_following_ids(user_id: int) -> frozenset[int]:
+    return get_adjacency("followings", user_id)
+
+
+def follows(follower_id: int, user_id: int) -> bool:
+    """
+    :return: True if the follower follows the user, a set lookup once the followings of the follower are cached
+    """
+    return user_id in get_following_ids(follower_id)
+
+
+def get_mutual_ids(user_id: int) -> frozenset[int]:
+    """
+    :return: Ids of users that follow the user and are followed back
+    """
+    return get_follower_ids(user_id) & get_following_ids(user_id)
+
+
+def invalidate_follow(follow: Followers) -> None:
+    """
+    Drops the cached sets touched by the follow row, again on commit when the change is part of a transaction,
+    so sets other processes read before the commit are not served afterwards
+    """
+    keys = (f"followers:{follow.user_id}", f"followings:{follow.following_id}")
+    follow_graph_cache.delete(*keys)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: follow_graph_cache.delete(*keys))
+
+
+# ------------------------ PAGES ------------------------
+
+
+def get_users_page(
+    user_ids: frozenset[int], after: int | None = None, page_size: int = USER_FOLLOWERS_PAGE_SIZE
+) -> tuple[list[CustomUser], int | None]:
+    """
+    Reads one page of users from an adjacency set in id order.
+    The page ids are picked from the set in memory, a single query loads their users.
+
+    :param user_ids: Adjacency set, see get_adjacency
+    :param after: Id of the last user of the previous page, None for the first page
+    :param page_size: Number of users on the page
+    :return: Tuple of users and the cursor of the next page (None on the last page)
+    """
+    candidates = user_ids if after is None else (user_id for user_id in user_ids if user_id > after)
+    page_ids = heapq.nsmallest(page_size + 1, candidates)
+    next_cursor = page_ids[page_size - 1] if len(page_ids) > page_size else None
+    users = list(CustomUser.objects.filter(id__in=page_ids[:page_size]).order_by("id").only("id", "username"))
+    return users, next_cursor
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.constants import CHAT_UPLOAD_TTL
+from users.chat_uploads import delete_unclaimed_uploads
+
+
+class Command(BaseCommand):
+    help = "Deletes chat uploads that no message claimed within the TTL, together with their files."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-age", type=int, default=CHAT_UPLOAD_TTL, help="Seconds an upload is kept")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Uploads deleted at once")
+
+    def handle(self, *args, **options):
+        if options["max_age"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--max-age must not be negative and --batch-size must be positive")
+
+        deleted = delete_unclaimed_uploads(options["max_age"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} unclaimed chat uploads"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("users", "0016_chatblacklist_chatsettings"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="publication",
+            index=models.Index(fields=["-published_at", "-id"], name="publication_feed_idx"),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("users", "0017_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publication",
+            name="fanned_out",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=models.Index(fields=["author_id", "-published_at"], name="publication_author_idx"),
+        ),
+    ]
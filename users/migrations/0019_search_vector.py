@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-17 01:54
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+    Publication = apps.get_model("users", "Publication")
+    CustomUser.objects.update(search_vector=SearchVector("username", weight="A", config="simple"))
+    Publication.objects.update(
+        search_vector=SearchVector("title", weight="A", config="english")
+        + SearchVector("context", weight="B", config="english")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("users", "0018_timeline"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="publication",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="user_search_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="publication_search_idx"),
+        ),
+        TrigramExtension(),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS user_username_trgm_idx ON users_customuser "
+            "USING gin (UPPER(username) gin_trgm_ops);",
+            "DROP INDEX IF EXISTS user_username_trgm_idx;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS publication_title_trgm_idx ON users_publication "
+            "USING gin (UPPER(title) gin_trgm_ops);",
+            "DROP INDEX IF EXISTS publication_title_trgm_idx;",
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0020_chat_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="chat",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="messages",
+                to="users.chat",
+            ),
+        ),
+    ]
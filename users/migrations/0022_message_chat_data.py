@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:12
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def copy_chat_links(apps, schema_editor):
+    Chat = apps.get_model("users", "Chat")
+    Message = apps.get_model("users", "Message")
+    links = Chat.message.through.objects.filter(message_id=OuterRef("pk")).order_by("chat_id").values("chat_id")
+    Message.objects.update(chat_id=Subquery(links[:1]))
+    # Messages that were never linked to a chat cannot be shown anywhere
+    Message.objects.filter(chat__isnull=True).delete()
+
+
+def restore_chat_links(apps, schema_editor):
+    Chat = apps.get_model("users", "Chat")
+    Message = apps.get_model("users", "Message")
+    Chat.message.through.objects.bulk_create(
+        [
+            Chat.message.through(chat_id=chat_id, message_id=message_id)
+            for message_id, chat_id in Message.objects.values_list("id", "chat_id").iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0021_message_chat"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_chat_links, restore_chat_links),
+    ]
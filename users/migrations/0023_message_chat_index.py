@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0022_message_chat_data"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="chat",
+            name="message",
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="chat",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="messages", to="users.chat"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["chat", "date_added", "id"], name="message_chat_idx"),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_read_states(apps, schema_editor):
+    # Existing conversations start as read, there is no record of what was read before
+    Chat = apps.get_model("users", "Chat")
+    ChatReadState = apps.get_model("users", "ChatReadState")
+    states = []
+    for chat in Chat.objects.annotate(last_message_id=Max("messages__id")).iterator():
+        for user_id in {chat.sender_id, chat.recipient_id}:
+            states.append(ChatReadState(chat_id=chat.id, user_id=user_id, last_read_message_id=chat.last_message_id))
+    ChatReadState.objects.bulk_create(states, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0023_message_chat_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatReadState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                (
+                    "chat",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="read_states",
+                        to="users.chat",
+                    ),
+                ),
+                (
+                    "last_read_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="users.message",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="chat_read_states",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("chat", "user")},
+            },
+        ),
+        migrations.RunPython(create_read_states, migrations.RunPython.noop),
+    ]
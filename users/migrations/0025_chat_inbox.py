@@ -0,0 +1,47 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:18
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Left
+
+
+def populate_inbox(apps, schema_editor):
+    Chat = apps.get_model("users", "Chat")
+    ChatReadState = apps.get_model("users", "ChatReadState")
+    Message = apps.get_model("users", "Message")
+    chat_ids = Message.objects.values("chat_id")
+
+    last_messages = Message.objects.filter(chat_id=OuterRef("chat_id")).order_by("-date_added", "-id")
+    ChatReadState.objects.filter(chat_id__in=chat_ids).update(
+        last_message_at=Subquery(last_messages.values("date_added")[:1])
+    )
+    last_messages = Message.objects.filter(chat_id=OuterRef("pk")).order_by("-date_added", "-id")
+    Chat.objects.filter(id__in=chat_ids).update(
+        last_message_preview=Subquery(last_messages.annotate(preview=Left("context", 100)).values("preview")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0024_chat_read_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="last_message_preview",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddField(
+            model_name="chatreadstate",
+            name="last_message_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="chatreadstate",
+            index=models.Index(fields=["user", "-last_message_at", "-id"], name="chat_inbox_idx"),
+        ),
+        migrations.RunPython(populate_inbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_followers(apps, schema_editor):
+    """
+    Keeps one Followers row per pair, the following one or else the oldest.
+    Counters are fixed by the 'reconcile_follow_counters' task.
+    """
+    Followers = apps.get_model("users", "Followers")
+    duplicates = (
+        Followers.objects.values("user_id", "following_id")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("user_id", "following_id")
+    )
+    for user_id, following_id in duplicates:
+        kept, *removed = (
+            Followers.objects.filter(user_id=user_id, following_id=following_id)
+            .order_by("-is_follow", "id")
+            .values_list("id", flat=True)
+        )
+        Followers.objects.filter(id__in=removed).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0025_chat_inbox"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_followers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="followers",
+            constraint=models.UniqueConstraint(fields=("user", "following"), name="unique_follower"),
+        ),
+    ]
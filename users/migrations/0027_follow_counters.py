@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-17 05:02
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_follows(Followers, field):
+    counts = (
+        Followers.objects.filter(is_follow=True, **{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def populate_counters(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+    Followers = apps.get_model("users", "Followers")
+    CustomUser.objects.update(
+        followers_count=count_follows(Followers, "user"),
+        followings_count=count_follows(Followers, "following"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0026_unique_follower"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,17 @@
+import uuid
 from datetime import date
 
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 
+from core.counters import CounterFieldsMixin
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -33,7 +39,9 @@ class UserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class CustomUser(AbstractUser):
+class CustomUser(CounterFieldsMixin, AbstractUser):
+    counter_fields = ("followers_count", "followings_count")
+
     birthday = models.DateField(
         default=date.today,
     )
@@ -44,10 +52,15 @@ class CustomUser(AbstractUser):
     )
     phone_number = PhoneNumberField(blank=True, null=True)
     photo = models.ImageField(upload_to="photos/", null=True, blank=True)
+    # Maintained by users.followers with F() updates, drift is fixed by the 'reconcile_follow_counters' task
     followers_count = models.IntegerField(default=0)
     followings_count = models.IntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        indexes = [GinIndex(fields=["search_vector"], name="user_search_idx")]
+
     def __str__(self):
         return self.username
 
@@ -57,6 +70,10 @@ class Followers(models.Model):
     following = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="followers")
     is_follow = models.BooleanField(default=False)
 
+    class Meta:
+        # One row per pair, toggling updates it instead of racing to insert a second one
+        constraints = [models.UniqueConstraint(fields=("user", "following"), name="unique_follower")]
+
     def __str__(self):
         return f"{self.following}"
 
@@ -79,9 +96,17 @@ class Publication(models.Model):
         ),
         default="draft",
     )
+    # True when the publication was delivered to the followers' timelines on write
+    fanned_out = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ("-published_at",)
+        indexes = [
+            models.Index(fields=["-published_at", "-id"], name="publication_feed_idx"),
+            models.Index(fields=["author_id", "-published_at"], name="publication_author_idx"),
+            GinIndex(fields=["search_vector"], name="publication_search_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -98,6 +123,7 @@ class Moderators(models.Model):
 
 
 class Message(models.Model):
+    chat = models.ForeignKey("Chat", on_delete=models.CASCADE, related_name="messages")
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     context = models.TextField()
     attachment = models.FileField(upload_to="attachments", default=None)
@@ -106,18 +132,56 @@ class Message(models.Model):
 
     class Meta:
         ordering = ("date_added",)
+        indexes = [models.Index(fields=["chat", "date_added", "id"], name="message_chat_idx")]
 
 
 class Chat(models.Model):
     chat_name = models.TextField(default="")
     sender = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="sender")
     recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="recipient")
-    message = models.ManyToManyField(Message, related_name="messages")
+    last_message_preview = models.CharField(max_length=100, default="", blank=True)
 
     def __str__(self):
         return self.chat_name
 
 
+class ChatReadState(models.Model):
+    """
+    Read position of one participant in a chat, also the row of the chat in the participant's inbox
+    """
+
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="read_states")
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="chat_read_states")
+    last_read_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    unread_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = (("chat", "user"),)
+        indexes = [models.Index(fields=["user", "-last_message_at", "-id"], name="chat_inbox_idx")]
+
+
+class ChatUpload(models.Model):
+    """
+    File uploaded to a chat before the message that references it is sent
+    """
+
+    ATTACHMENT = "attachment"
+    VOICE = "voice"
+    KIND_CHOICES = (
+        (ATTACHMENT, "Attachment"),
+        (VOICE, "Voice"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="uploads")
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="chat_uploads")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    file = models.FileField(upload_to="chat_uploads")
+    size = models.PositiveIntegerField()
+    uploaded_at = models.DateTimeField(auto_now_add=True)
+
+
 class ChatBlackList(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="chat_black_list")
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="chat_black_list")
@@ -0,0 +1,72 @@
+from django.db import models, transaction
+from django.db.models import Case, F, When
+from django.db.models.functions import Greatest
+
+from app.constants import CHAT_PREVIEW_LENGTH
+from .models import Chat, ChatReadState, Message
+
+
+def create_read_states(chat: Chat) -> None:
+    """
+    Adds the chat to the inboxes of both participants
+    """
+    ChatReadState.objects.bulk_create(
+        [ChatReadState(chat=chat, user_id=user_id) for user_id in {chat.sender_id, chat.recipient_id}],
+        ignore_conflicts=True,
+    )
+
+
+def message_sent(message: Message, recipient_id: int) -> int:
+    """
+    Moves the chat to the top of both participants' inboxes and counts the message as unread for the recipient
+
+    :param message: Saved chat message
+    :param recipient_id: Id of the other chat participant
+    :return: Unread counter of the recipient after the message
+    """
+    Chat.objects.filter(id=message.chat_id).update(last_message_preview=message.context[:CHAT_PREVIEW_LENGTH])
+
+    states = ChatReadState.objects.filter(chat_id=message.chat_id)
+    changes = {
+        "last_message_at": message.date_added,
+        "unread_count": Case(
+            When(user_id=recipient_id, then=F("unread_count") + 1),
+            default=F("unread_count"),
+            output_field=models.PositiveIntegerField(),
+        ),
+    }
+    if not states.update(**changes):
+        create_read_states(message.chat)
+        states.update(**changes)
+    return states.filter(user_id=recipient_id).values_list("unread_count", flat=True).get()
+
+
+def mark_read(chat_id: int, user_id: int, message_id: int | None = None) -> int:
+    """
+    Moves the read position of the user forward, only messages between the old and the new position are counted.
+    The reported id comes from the client, it is resolved to the last message of this chat up to it,
+    ids that match no message of the chat are ignored.
+
+    :param chat_id: Chat id
+    :param user_id: Reading participant
+    :param message_id: Last read message, the latest message of the chat by default
+    :return: Unread counter after reading
+    """
+    received = Message.objects.filter(chat_id=chat_id).exclude(user_id=user_id)
+    if message_id is None:
+        message_id = received.order_by("-id").values_list("id", flat=True).first()
+    else:
+        messages = Message.objects.filter(chat_id=chat_id, id__lte=message_id)
+        message_id = messages.order_by("-id").values_list("id", flat=True).first()
+
+    with transaction.atomic():
+        state, created = ChatReadState.objects.select_for_update().get_or_create(chat_id=chat_id, user_id=user_id)
+        last_read_id = state.last_read_message_id or 0
+        if message_id is None or message_id <= last_read_id:
+            return state.unread_count
+
+        newly_read = received.filter(id__gt=last_read_id, id__lte=message_id).count()
+        ChatReadState.objects.filter(pk=state.pk).update(
+            last_read_message_id=message_id, unread_count=Greatest(F("unread_count") - newly_read, 0)
+        )
+    return max(state.unread_count - newly_read, 0)
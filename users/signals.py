@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caches import user_list_cache
+from .followers import invalidate_follow
+from .models import CustomUser, Followers
+
+# Logins save only last_login and keep the list
+user_list_cache.invalidate_on(CustomUser, fields=("username",))
+
+
+@receiver([post_save, post_delete], sender=Followers)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_follow(instance)
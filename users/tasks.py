@@ -0,0 +1,31 @@
+import logging
+
+from celery import shared_task
+
+from .chat_uploads import delete_unclaimed_uploads
+from .followers import reconcile_counters
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_follow_counters(batch_size: int = 10000) -> dict[str, int]:
+    """
+    Periodic repair of the followers and followings counters of users, scheduled by CELERY_BEAT_SCHEDULE
+
+    :return: Number of fixed users per counter field
+    """
+    fixed = reconcile_counters(batch_size)
+    if any(fixed.values()):
+        logger.warning("Follow counters drifted and were fixed: %s", fixed)
+    return fixed
+
+
+@shared_task
+def delete_unclaimed_chat_uploads() -> int:
+    """
+    Periodic cleanup of chat uploads abandoned before their message was sent, scheduled by CELERY_BEAT_SCHEDULE
+
+    :return: Number of deleted uploads
+    """
+    return delete_unclaimed_uploads()
@@ -15,6 +15,8 @@ urlpatterns = [
     path("change-data/", views.CustomUserChangeView.as_view(), name="socialaccount_connections"),
     ######################### Chat Urls #################################
     path("user-chats/", views.ChatList.as_view(), name="user-chats"),
+    path("user-chats/<int:chat_id>/upload/", views.ChatUploadView.as_view(), name="chat_upload"),
+    path("user-chats/<int:chat_id>/messages/", views.ChatHistoryView.as_view(), name="chat_history"),
     path("user-page/<username>/chat/", views.ConversationView.as_view(), name="conversation"),
     path("user-page/<username>/chat/settings/", views.ChatSettings.as_view(), name="conversation_settings"),
     ######################### Publication Urls ##########################
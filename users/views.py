@@ -7,14 +7,24 @@ from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.utils.decorators import method_decorator
 from django.views import View
-from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.generic import ListView
 
+from app.constants import CHAT_UPLOAD_MAX_SIZE
+from app.timeline import fan_out_user_publication, follow_author, unfollow_author
+from community.followers import parse_page_cursor
+from core.cache import cached_query
+from core.helpers import MaxSizeUploadHandler
 from core.mixins import RemoveCommentsMixin, DetailMixin
+from .caches import user_list_cache
+from .chat_history import get_inbox_page, get_message_page
+from .followers import follows, get_adjacency, get_users_page, toggle_follow
 from .forms import CustomUserChangeForm, PublishForm
-from .models import CustomUser, Followers, Publication, Chat, ChatBlackList
+from .models import CustomUser, Publication, Chat, ChatBlackList, ChatUpload
+from .read_state import mark_read
 
 
 # ------------------------ Users Form ------------------------
@@ -59,18 +69,40 @@ class CustomUserChangeView(LoginRequiredMixin, View):
             )
 
 
-class FollowersListView(ListView):
-    template_name = "account/followers_list.html"
+class FollowGraphListView(ListView):
+    """
+    Paginated list of users adjacent to the user of the URL, read from the cached follow graph.
+    The page after a user id is requested with '?after=<id>'.
+    """
+
+    direction = None
+
+    def get(self, request, *args, **kwargs):
+        try:
+            self.after = parse_page_cursor(request.GET.get("after"))
+        except ValueError:
+            return HttpResponse("Invalid cursor", status=400)
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        return Followers.objects.filter(user__username=self.kwargs["username"], is_follow=True)
+        user = get_object_or_404(CustomUser.objects.only("id"), username=self.kwargs["username"])
+        users, self.next_cursor = get_users_page(get_adjacency(self.direction, user.id), self.after)
+        return users
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.next_cursor
+        return context
 
-class FollowingsListView(ListView):
-    template_name = "account/followings_list.html"
 
-    def get_queryset(self):
-        return Followers.objects.filter(following__username=self.kwargs["username"], is_follow=True)
+class FollowersListView(FollowGraphListView):
+    template_name = "account/followers_list.html"
+    direction = "followers"
+
+
+class FollowingsListView(FollowGraphListView):
+    template_name = "account/followings_list.html"
+    direction = "followings"
 
 
 # ------------------------ Disconnect Account func ------------------------
@@ -93,6 +125,10 @@ class AllUsers(ListView):
     model = CustomUser
     template_name = "account/all_users.html"
 
+    def get_queryset(self):
+        # Only usernames are listed, the cached rows are served until a user is created, renamed or deleted
+        return cached_query(user_list_cache, "all", CustomUser.objects.order_by("id").values("username"))
+
 
 class UserPageView(LoginRequiredMixin, View):
     template_name = "account/user_page.html"
@@ -108,12 +144,10 @@ class UserPageView(LoginRequiredMixin, View):
         """
         username = self.kwargs.get("username")
         user = CustomUser.objects.get(username=username)
-        user.followers_count = Followers.objects.filter(user=user, is_follow=True).count()
-        user.followings_count = Followers.objects.filter(following=user, is_follow=True).count()
         publications = Publication.objects.filter(
             author_id=user.id, content_type=ContentType.objects.get_for_model(CustomUser)
         )
-        is_following = Followers.objects.filter(user=user, following=request.user, is_follow=True).exists()
+        is_following = follows(request.user.id, user.id)
         context = {
             "user": user,
             "followers_count": user.followers_count,
@@ -152,13 +186,13 @@ class UserPageView(LoginRequiredMixin, View):
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
             username = self.kwargs.get("username")
             user = CustomUser.objects.get(username=username)
-            follows_obj, created = Followers.objects.get_or_create(user=user, following=request.user)
-            follows_obj.is_follow = not follows_obj.is_follow
-            follows_obj.save()
-
-            user.followers_count = Followers.objects.filter(user=user, is_follow=True).count()
-            is_following = follows_obj.is_follow
+            is_following = toggle_follow(user, request.user)
+            if is_following:
+                follow_author(request.user.id, user.id)
+            else:
+                unfollow_author(request.user.id, user.id)
 
+            user.refresh_from_db(fields=["followers_count"])
             return JsonResponse({"followers_count": user.followers_count, "is_following": is_following})
         else:
             context = self.get_context_data(request, **kwargs)
@@ -184,6 +218,7 @@ class CreatePublication(View):
             publication.content_type = ContentType.objects.get_for_model(request.user)
             publication.save()
             form.save()
+            fan_out_user_publication(publication)
             return redirect(f"/publication/{publication.id}/")
         else:
             return render(request, self.template_name, {"form": form})
@@ -239,12 +274,13 @@ class ConversationView(View):
             Q(sender__username=request.user.username, recipient__username=recipient)
             | Q(sender__username=recipient, recipient__username=request.user.username)
         )
-        messages = chat.message.filter().all()
+        messages, next_cursor = get_message_page(chat)
         context = {
             "recipient": recipient,
             "sender": sender,
             "chat": chat,
             "messages": messages,
+            "next_cursor": next_cursor,
         }
         return context
 
@@ -254,6 +290,7 @@ class ConversationView(View):
         if "settings" in request.GET:
             return redirect("settings/")
         if chat:
+            mark_read(chat.id, request.user.id)
             black_list = ChatBlackList.objects.filter(user=request.user, chat_id=chat.id)
             if black_list:
                 context["not_allowed"] = True
@@ -265,12 +302,93 @@ class ConversationView(View):
             )
 
 
-class ChatList(ListView):
-    model = Chat
+class ChatHistoryView(LoginRequiredMixin, View):
+    template_name = "conversations/messages.html"
+
+    def get(self, request, *args, **kwargs):
+        """
+        Returns the page of older messages loaded when the conversation is scrolled up
+
+        :param request: GET request with 'cursor' parameter taken from the previous page
+        :param args: Additional arguments.
+        :param kwargs: Additional position arguments.
+        :return: JSON response
+            - html (str): Rendered messages in chronological order
+            - next_cursor (str): Cursor of the older page, None if there are no more messages
+            - If cursor is invalid: {"error": "Invalid cursor"} and status code 400
+        """
+        chat = get_object_or_404(
+            Chat, Q(sender=request.user) | Q(recipient=request.user), id=self.kwargs.get("chat_id")
+        )
+        try:
+            messages, next_cursor = get_message_page(chat, request.GET.get("cursor"))
+        except ValueError:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+
+        html = render_to_string(self.template_name, {"messages": messages}, request=request)
+        return JsonResponse({"html": html, "next_cursor": next_cursor})
+
+
+class ChatList(LoginRequiredMixin, View):
     template_name = "conversations/chat_list.html"
 
-    def get_queryset(self):
-        return Chat.objects.filter(Q(sender=self.request.user) | Q(recipient=self.request.user))
+    def get(self, request, *args, **kwargs):
+        """
+        Renders the user's chats with the last message preview and unread counter, most recent first
+
+        :param request: GET request with optional 'cursor' parameter taken from the previous page
+        :param args: Additional arguments.
+        :param kwargs: Additional position arguments.
+        :return: HttpResponse, status code 400 if cursor is invalid
+        """
+        try:
+            chats, next_cursor = get_inbox_page(request.user, request.GET.get("cursor"))
+        except ValueError:
+            return HttpResponse("Invalid cursor", status=400)
+
+        return render(request, self.template_name, {"chats": chats, "next_cursor": next_cursor})
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class ChatUploadView(LoginRequiredMixin, View):
+    """
+    Receives a chat attachment or voice note as multipart data and streams it to media storage.
+    The message itself is sent over WebSocket with only the returned upload id.
+    """
+
+    def post(self, request, *args, **kwargs):
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return JsonResponse({"error": "Invalid upload."}, status=400)
+        if content_length > CHAT_UPLOAD_MAX_SIZE:
+            return JsonResponse({"error": "File is too large."}, status=413)
+
+        # Upload handlers can be changed only before the body is read, so CSRF is checked afterwards
+        size_limit = MaxSizeUploadHandler(request, max_size=CHAT_UPLOAD_MAX_SIZE)
+        request.upload_handlers.insert(0, size_limit)
+        return self.upload(request, size_limit, *args, **kwargs)
+
+    @method_decorator(csrf_protect)
+    def upload(self, request, size_limit, *args, **kwargs):
+        """
+        :return: JSON response:
+            - id (str): Upload id to send with the chat message
+            - url (str): URL of the uploaded file
+        """
+        chat = get_object_or_404(
+            Chat, Q(sender=request.user) | Q(recipient=request.user), id=self.kwargs.get("chat_id")
+        )
+        kind = request.POST.get("kind")
+        file = request.FILES.get("file")
+
+        if size_limit.exceeded:
+            return JsonResponse({"error": "File is too large."}, status=413)
+        if kind not in dict(ChatUpload.KIND_CHOICES) or file is None:
+            return JsonResponse({"error": "Invalid upload."}, status=400)
+
+        upload = ChatUpload.objects.create(chat=chat, user=request.user, kind=kind, file=file, size=file.size)
+        return JsonResponse({"id": str(upload.id), "url": upload.file.url}, status=201)
 
 
 class ChatSettings(View):